@@ -1,8 +1,14 @@
 import os
 from flask import Flask, request, render_template, send_file, jsonify
 from werkzeug.utils import secure_filename
-from pdf_to_ppt import convert_pdf_to_ppt
-import uuid
+from jobs import JobQueue, QueueFullError, DONE
+from spool import SpoolQueue
+from pdf_to_ppt import MODES, convert_pdf_to_ppt, parse_page_ranges
+from conversion_cache import ConversionCache
+from warm_pool import WarmPool
+from artifacts import ArtifactStore
+from upload_stream import save_upload, spooling_request_class, UploadTooLargeError
+from preflight import preflight, admit, PreflightError, HEAVY_LANE
 
 app = Flask(__name__)
 
@@ -15,11 +21,86 @@ if not os.path.exists(UPLOAD_FOLDER):
 ALLOWED_EXTENSIONS = {'pdf'}
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_UPLOAD_BYTES'] = 512 * 1024 * 1024  # 512MB max file size
+# Uploads are streamed to disk; leave some room for the rest of the form
+app.config['MAX_CONTENT_LENGTH'] = app.config['MAX_UPLOAD_BYTES'] + 1024 * 1024
+app.config['CONVERSION_WORKERS'] = 2
+app.config['MAX_QUEUED_JOBS'] = 16
+app.config['MAX_PAGES'] = 2000
+app.config['MAX_ESTIMATED_MS'] = 10 * 60 * 1000  # reject conversions estimated to take longer
+app.config['HEAVY_JOB_MS'] = 30 * 1000  # conversions estimated above this use the heavy lane
+app.config['HEAVY_WORKERS'] = 1
+app.config['MAX_QUEUED_HEAVY_JOBS'] = 4
+app.config['CACHE_FOLDER'] = os.path.join(UPLOAD_FOLDER, 'cache')
+app.config['CACHE_MAX_BYTES'] = 512 * 1024 * 1024
+# Slides of single pages, reused when a revised document is converted again
+app.config['PAGE_CACHE_FOLDER'] = os.path.join(UPLOAD_FOLDER, 'page_cache')
+app.config['RESULTS_FOLDER'] = os.path.join(UPLOAD_FOLDER, 'results')
+app.config['RESULTS_TTL'] = 24 * 3600  # seconds a converted file can be downloaded
+app.config['RESULTS_MAX_BYTES'] = 2 * 1024 * 1024 * 1024
+app.config['PREFORK_WORKERS'] = True  # convert in pre-started, warmed-up processes
+# Shared spool directory: when set, jobs are only enqueued here and converted by
+# `python spool.py` workers, which must write to RESULTS_FOLDER (--output-dir)
+app.config['SPOOL_FOLDER'] = None
+# Set to True behind a front server that handles X-Sendfile
+app.config['USE_X_SENDFILE'] = False
+
+# Let werkzeug write uploads where they are kept, so saving one is a rename
+app.request_class = spooling_request_class(app.request_class,
+                                           app.config['SPOOL_FOLDER'] or UPLOAD_FOLDER)
+
+# Fork the conversion processes before any other thread is started. With
+# app.run(debug=True) below, the reloader's watching process (the one started
+# from the command line) imports this module too but never serves requests,
+# so only the serving process it restarts (WERKZEUG_RUN_MAIN) starts a pool
+reloader_process = __name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+warm_pool = None
+if app.config['PREFORK_WORKERS'] and not app.config['SPOOL_FOLDER'] and not reloader_process:
+    warm_pool = WarmPool(app.config['CONVERSION_WORKERS'] + app.config['HEAVY_WORKERS'])
+conversion_cache = ConversionCache(app.config['CACHE_FOLDER'],
+                                   max_bytes=app.config['CACHE_MAX_BYTES'],
+                                   convert=warm_pool.convert if warm_pool else convert_pdf_to_ppt)
+results = ArtifactStore(app.config['RESULTS_FOLDER'], ttl=app.config['RESULTS_TTL'],
+                        max_bytes=app.config['RESULTS_MAX_BYTES'])
+results.start()
+
+def convert(pdf_path, output_path, **options):
+    """Convert through the cache, writing the result atomically into the store."""
+    with results.writer(os.path.basename(output_path)) as tmp_path:
+        conversion_cache.convert(pdf_path, tmp_path,
+                                 page_cache=app.config['PAGE_CACHE_FOLDER'], **options)
+
+if app.config['SPOOL_FOLDER']:
+    job_queue = SpoolQueue(app.config['SPOOL_FOLDER'],
+                           max_queue=app.config['MAX_QUEUED_JOBS'],
+                           output_dir=app.config['RESULTS_FOLDER'],
+                           ttl=app.config['RESULTS_TTL'])
+    heavy_queue = SpoolQueue(app.config['SPOOL_FOLDER'], lane=HEAVY_LANE,
+                             max_queue=app.config['MAX_QUEUED_HEAVY_JOBS'],
+                             output_dir=app.config['RESULTS_FOLDER'],
+                             ttl=app.config['RESULTS_TTL'])
+else:
+    job_queue = JobQueue(os.path.join(UPLOAD_FOLDER, 'jobs'),
+                         workers=app.config['CONVERSION_WORKERS'],
+                         max_queue=app.config['MAX_QUEUED_JOBS'],
+                         convert=convert, ttl=app.config['RESULTS_TTL'])
+    # Jobs estimated to be slow get their own workers so they cannot hold up
+    # small ones; both queues share the jobs directory, so either can look up a job
+    heavy_queue = JobQueue(os.path.join(UPLOAD_FOLDER, 'jobs'),
+                           workers=app.config['HEAVY_WORKERS'],
+                           max_queue=app.config['MAX_QUEUED_HEAVY_JOBS'],
+                           convert=convert, ttl=app.config['RESULTS_TTL'])
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def admit_upload(pdf_path, options):
+    """Preflight a saved upload; returns its lane or raises PreflightError."""
+    report = preflight(pdf_path, pages=options.get('pages'),
+                       mode=options.get('mode', 'vector'))
+    return admit(report, app.config['MAX_PAGES'], app.config['MAX_ESTIMATED_MS'],
+                 app.config['HEAVY_JOB_MS'])
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -33,47 +114,97 @@ def upload_file():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
     
+    options = {}
+    pages = request.form.get('pages', '').strip()
+    if pages:
+        try:
+            parse_page_ranges(pages)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        options['pages'] = pages
+    mode = request.form.get('mode', '').strip()
+    if mode:
+        if mode not in MODES:
+            return jsonify({'error': f"Unknown mode '{mode}'"}), 400
+        options['mode'] = mode
+    
     if file and allowed_file(file.filename):
-        # Generate unique filename
-        unique_id = str(uuid.uuid4())
-        pdf_filename = secure_filename(f"{unique_id}.pdf")
-        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], pdf_filename)
+        job_id, pdf_path = job_queue.new_job()
+        try:
+            _, options['pdf_digest'] = save_upload(file.stream, pdf_path,
+                                                   app.config['MAX_UPLOAD_BYTES'])
+        except UploadTooLargeError as e:
+            job_queue.discard(job_id)
+            return jsonify({'error': str(e)}), 413
+        except Exception:
+            job_queue.discard(job_id)
+            raise
         
-        # Save uploaded file
-        file.save(pdf_path)
+        try:
+            lane = admit_upload(pdf_path, options)
+        except PreflightError as e:
+            job_queue.discard(job_id)
+            return jsonify({'error': str(e), 'reason': e.reason}), 422
+        except Exception:
+            job_queue.discard(job_id)
+            raise
         
+        ppt_filename = f"{job_id}.pptx"
+        queue = heavy_queue if lane == HEAVY_LANE else job_queue
         try:
-            # Convert PDF to PPT
-            ppt_filename = f"{unique_id}.pptx"
-            ppt_path = os.path.join(app.config['UPLOAD_FOLDER'], ppt_filename)
-            convert_pdf_to_ppt(pdf_path, ppt_path)
-            
-            # Clean up PDF file
-            os.remove(pdf_path)
-            
-            return jsonify({
-                'success': True,
-                'filename': ppt_filename,
-                'message': 'File converted successfully!'
-            })
-            
-        except Exception as e:
-            # Clean up files in case of error
-            if os.path.exists(pdf_path):
-                os.remove(pdf_path)
-            if os.path.exists(ppt_path):
-                os.remove(ppt_path)
-            return jsonify({'error': str(e)}), 500
+            queue.submit(job_id, results.path(ppt_filename), options)
+        except QueueFullError as e:
+            return jsonify({'error': str(e)}), 429
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/jobs/{job_id}',
+            'lane': lane,
+            'message': 'File queued for conversion'
+        }), 202
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    record = job_queue.get(job_id)
+    if record is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    response = {'job_id': job_id, 'status': record['status']}
+    if record['status'] == DONE:
+        filename = os.path.basename(record['output'])
+        if results.get(filename) is None:
+            response.update(status='expired', error='The converted file has expired')
+        else:
+            response.update(filename=filename, download_url=f'/download/{filename}')
+    elif 'error' in record:
+        response['error'] = record['error']
+    return jsonify(response)
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(conversion_cache.stats())
+
+@app.route('/results/stats')
+def results_stats():
+    return jsonify(results.stats())
+
 @app.route('/download/<filename>')
 def download_file(filename):
+    path = results.get(filename)
+    if path is None:
+        return jsonify({'error': 'File not found or expired'}), 404
     try:
+        # Served by path so Range and conditional requests are answered by
+        # werkzeug and the body goes through the server's sendfile support
         return send_file(
-            os.path.join(app.config['UPLOAD_FOLDER'], filename),
+            path,
             as_attachment=True,
-            download_name=filename
+            download_name=filename,
+            conditional=True,
+            etag=True
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 404
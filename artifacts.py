@@ -0,0 +1,161 @@
+"""
+Store for finished conversion results.
+
+Results are written atomically (into a temporary file that is renamed into
+place) and expire after a time-to-live. A background thread removes expired
+results and, when the store is over its size quota, the oldest ones, so the
+results directory no longer grows without bound.
+"""
+import contextlib
+import os
+import tempfile
+import threading
+import time
+
+TEMP_SUFFIX = '.part'
+
+
+class ArtifactTooLargeError(Exception):
+    """Raised by ArtifactStore.writer for a result larger than the whole quota."""
+
+
+class ArtifactStore:
+    """
+    Directory of conversion results with a TTL and a size quota.
+
+    Args:
+        root (str): Directory that holds the results
+        ttl (float): Seconds a result is kept after it was written
+        max_bytes (int): Total size of the results before the oldest are
+                         evicted early
+        sweep_interval (float): Seconds between background eviction runs
+    """
+
+    def __init__(self, root, ttl=24 * 3600, max_bytes=2 * 1024 ** 3, sweep_interval=60):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, name):
+        """Path of the result called name; raises ValueError for names that are not plain file names."""
+        if not name or name != os.path.basename(name) or name.startswith('.'):
+            raise ValueError(f"Invalid artifact name '{name}'")
+        return os.path.join(self.root, name)
+
+    @contextlib.contextmanager
+    def writer(self, name):
+        """
+        Context manager yielding a temporary path to write the result name to.
+
+        The file is renamed into place when the block finishes, and removed if
+        it raises, so readers never see a partial result. A result larger
+        than max_bytes could never be kept; ArtifactTooLargeError is raised
+        for it instead. Making room for the new result evicts older ones only.
+        """
+        final_path = self.path(name)
+        fd, tmp_path = tempfile.mkstemp(suffix=TEMP_SUFFIX, dir=self.root)
+        os.close(fd)
+        try:
+            yield tmp_path
+            size = os.path.getsize(tmp_path)
+            if size > self.max_bytes:
+                raise ArtifactTooLargeError(f'Result of {size} bytes is larger than the '
+                                            f'storage limit of {self.max_bytes} bytes')
+            os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict(keep=name)
+
+    def get(self, name):
+        """Return the path of an unexpired result, or None."""
+        try:
+            path = self.path(name)
+            stat = os.stat(path)
+        except (ValueError, FileNotFoundError):
+            return None
+        if stat.st_mtime + self.ttl < time.time():
+            return None
+        return path
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            try:
+                stat = os.stat(os.path.join(self.root, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def _remove(self, name):
+        try:
+            os.remove(os.path.join(self.root, name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def evict(self, keep=None):
+        """
+        Remove expired results, then the oldest ones until under max_bytes.
+        The result called keep is never removed for the quota.
+        """
+        with self._lock:
+            expires_before = time.time() - self.ttl
+            kept = []
+            for mtime, size, name in sorted(self._entries()):
+                # Temporary files of writes in progress are only removed once
+                # they are as old as the TTL, i.e. clearly abandoned
+                if mtime < expires_before:
+                    if self._remove(name) and not name.endswith(TEMP_SUFFIX):
+                        self.evictions += 1
+                elif not name.endswith(TEMP_SUFFIX):
+                    kept.append((size, name))
+            total = sum(size for size, _ in kept)
+            for size, name in kept:
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                if self._remove(name):
+                    self.evictions += 1
+                total -= size
+
+    def start(self):
+        """Start the background eviction thread (once)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._sweep, daemon=True,
+                                            name='artifact-eviction')
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _sweep(self):
+        while not self._stopped.wait(self.sweep_interval):
+            try:
+                self.evict()
+            except OSError:
+                pass  # try again on the next sweep
+
+    def stats(self):
+        """Return the number and total size of stored results."""
+        entries = [(size, name) for _, size, name in self._entries()
+                   if not name.endswith(TEMP_SUFFIX)]
+        with self._lock:
+            return {
+                'entries': len(entries),
+                'bytes': sum(size for size, _ in entries),
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'evictions': self.evictions,
+            }
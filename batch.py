@@ -0,0 +1,216 @@
+"""
+Batch conversion of many PDFs on a long-lived worker pool.
+
+Inputs can be PDF files, directories (searched recursively), glob patterns
+or manifest files listing one input per line. Outputs that are already up
+to date are skipped, a failing file does not stop the run, and a summary
+manifest with per-file status and timing is written at the end.
+"""
+import contextlib
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from conversion_cache import OUTPUT_NEUTRAL_OPTIONS, hash_file
+from pdf_to_ppt import CONVERTER_VERSION, convert_pdf_to_ppt
+
+DEFAULT_SUMMARY = 'conversion_summary.json'
+
+
+def read_manifest(path):
+    """Read input paths from a manifest file (one per line, # for comments)."""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    entries = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                entries.append(line if os.path.isabs(line) else os.path.join(base_dir, line))
+    return entries
+
+
+def collect_inputs(inputs, manifests=()):
+    """
+    Expand files, directories, glob patterns and manifests into PDF paths.
+
+    Returns a sorted list of unique paths; raises FileNotFoundError for an
+    input that matches nothing.
+    """
+    pending = list(inputs)
+    for manifest in manifests:
+        pending.extend(read_manifest(manifest))
+
+    found = set()
+    for entry in pending:
+        if os.path.isdir(entry):
+            matches = glob.glob(os.path.join(entry, '**', '*.pdf'), recursive=True)
+            matches += glob.glob(os.path.join(entry, '**', '*.PDF'), recursive=True)
+        elif os.path.isfile(entry):
+            matches = [entry]
+        else:
+            matches = [path for path in glob.glob(entry, recursive=True)
+                       if os.path.isfile(path)]
+            if not matches:
+                raise FileNotFoundError(f"No PDF files match '{entry}'")
+        found.update(os.path.abspath(path) for path in matches)
+    return sorted(found)
+
+
+def output_path_for(pdf_path, output_dir=None, base_dir=None):
+    """
+    Return the presentation path for pdf_path: next to it, or in output_dir
+    at the same place relative to output_dir as pdf_path is to base_dir
+    (default: directly in output_dir).
+    """
+    name = os.path.splitext(os.path.basename(pdf_path))[0] + '.pptx'
+    if not output_dir:
+        return os.path.join(os.path.dirname(pdf_path), name)
+    relative_dir = os.path.relpath(os.path.dirname(pdf_path), base_dir) if base_dir else ''
+    return os.path.normpath(os.path.join(output_dir, relative_dir, name))
+
+
+def _common_dir(pdf_paths):
+    """Deepest directory containing all pdf_paths, or None (e.g. on different drives)."""
+    try:
+        return os.path.commonpath([os.path.dirname(os.path.abspath(path))
+                                   for path in pdf_paths])
+    except ValueError:
+        return None
+
+
+def output_options(options):
+    """The options that shape the output, as recorded in the summary."""
+    return {name: value for name, value in (options or {}).items()
+            if name not in OUTPUT_NEUTRAL_OPTIONS}
+
+
+def is_up_to_date(pdf_path, output_path, previous=None, check_hash=False, options=None):
+    """
+    Check whether output_path can be reused for pdf_path.
+
+    The previous run must have produced the output successfully, with the
+    same converter version and output options. By default the output must
+    also be newer than the input. With check_hash the input hash is compared
+    to the one recorded by the previous run instead, so touched-but-unchanged
+    inputs are skipped too.
+    """
+    if not previous or not os.path.exists(output_path):
+        return False
+    # A skipped record was itself carried over from a successful conversion
+    if previous.get('status') not in ('converted', 'skipped'):
+        return False
+    if (previous.get('converter_version') != CONVERTER_VERSION or
+            previous.get('options') != output_options(options)):
+        return False
+    if check_hash:
+        return previous.get('sha256') == hash_file(pdf_path)
+    return os.path.getmtime(output_path) >= os.path.getmtime(pdf_path)
+
+
+def _convert_one(pdf_path, output_path, options):
+    """Pool task: convert one file and report its outcome instead of raising."""
+    started = time.perf_counter()
+    record = {'input': pdf_path, 'output': output_path, 'sha256': hash_file(pdf_path),
+              'converter_version': CONVERTER_VERSION, 'options': output_options(options)}
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            convert_pdf_to_ppt(pdf_path, output_path, **options)
+        record['status'] = 'converted'
+    except Exception as e:
+        record.update(status='failed', error=str(e))
+    record['seconds'] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def _load_previous(summary_path):
+    try:
+        with open(summary_path) as f:
+            return {record['input']: record for record in json.load(f)['files']}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def convert_batch(pdf_paths, output_dir=None, jobs=None, summary_path=DEFAULT_SUMMARY,
+                  force=False, check_hash=False, options=None):
+    """
+    Convert many PDFs on one process pool and write a summary manifest.
+
+    Args:
+        pdf_paths (list): PDF files to convert (see collect_inputs)
+        output_dir (str, optional): Where to write the presentations; defaults
+                                    to next to each PDF. Subdirectories of
+                                    the inputs' common directory are
+                                    mirrored in it, so same-named PDFs in
+                                    different directories do not collide
+        jobs (int, optional): Number of worker processes (default: CPU count)
+        summary_path (str): Path of the JSON summary manifest
+        force (bool): Convert even when the output is up to date
+        check_hash (bool): Decide whether an output is up to date by comparing
+                           input hashes with the previous summary
+        options (dict, optional): Extra keyword arguments for convert_pdf_to_ppt
+
+    Returns:
+        dict: The summary that was written to summary_path
+    """
+    options = options or {}
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    previous = _load_previous(summary_path)
+    started = time.time()
+
+    base_dir = _common_dir(pdf_paths) if output_dir and pdf_paths else None
+    records = []
+    pending = []
+    claimed = {}
+    for pdf_path in pdf_paths:
+        output_path = output_path_for(pdf_path, output_dir, base_dir)
+        # e.g. report.pdf and report.PDF, which would overwrite each other
+        if output_path in claimed:
+            records.append({'input': pdf_path, 'output': output_path, 'status': 'failed',
+                            'error': f"Same output path as {claimed[output_path]}",
+                            'seconds': 0.0})
+            continue
+        claimed[output_path] = pdf_path
+        if not force and is_up_to_date(pdf_path, output_path, previous.get(pdf_path),
+                                       check_hash, options):
+            record = dict(previous[pdf_path])
+            record.update(status='skipped', seconds=0.0)
+            records.append(record)
+        else:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            pending.append((pdf_path, output_path))
+
+    print(f"Converting {len(pending)} of {len(pdf_paths)} files "
+          f"({len(records)} up to date)...")
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_convert_one, pdf_path, output_path, options)
+                       for pdf_path, output_path in pending]
+            for done, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                records.append(record)
+                outcome = record['status']
+                if outcome == 'failed':
+                    outcome += f": {record['error']}"
+                print(f"[{done}/{len(pending)}] {record['input']} - {outcome} "
+                      f"({record['seconds']}s)")
+
+    records.sort(key=lambda record: record['input'])
+    counts = {status: sum(1 for record in records if record['status'] == status)
+              for status in ('converted', 'skipped', 'failed')}
+    summary = {
+        'started': started,
+        'finished': time.time(),
+        'total': len(records),
+        **counts,
+        'files': records,
+    }
+    tmp_path = summary_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, summary_path)
+    print(f"Done: {counts['converted']} converted, {counts['skipped']} skipped, "
+          f"{counts['failed']} failed. Summary written to {summary_path}")
+    return summary
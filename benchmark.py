@@ -0,0 +1,149 @@
+"""
+Conversion benchmark.
+
+Converts every PDF of a corpus made by ``create_test_pdf.py --corpus`` through
+convert_pdf_to_ppt and records wall time, pages/sec, peak RSS and output size
+per case as JSON, so results can be compared between releases.
+
+Usage:
+    python create_test_pdf.py --corpus bench_corpus
+    python benchmark.py bench_corpus -o bench_results.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+import fitz  # PyMuPDF
+
+from pdf_to_ppt import CONVERTER_VERSION, convert_pdf_to_ppt
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_bytes(children=False):
+    """
+    Peak RSS of this process, or with children=True of the largest finished
+    child process (the --workers extraction pool).
+    """
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _run_case(pdf_path, output_path, options, results):
+    """Convert one PDF in a fresh process so peak RSS belongs to this case alone."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        convert_pdf_to_ppt(pdf_path, output_path, **options)
+        wall_time = time.perf_counter() - start
+    results.put((wall_time, _peak_rss_bytes(), _peak_rss_bytes(children=True)))
+
+
+def benchmark_case(name, pdf_path, output_dir, options=None):
+    """Benchmark a single PDF and return its result record."""
+    options = options or {}
+    output_path = os.path.join(output_dir, f'{name}.pptx')
+    with fitz.open(pdf_path) as pdf_document:
+        pages = len(pdf_document)
+
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_case,
+                                      args=(pdf_path, output_path, options, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        return {'case': name, 'pages': pages, 'status': 'failed',
+                'exitcode': process.exitcode}
+
+    wall_time, peak_rss, peak_rss_workers = results.get()
+    return {
+        'case': name,
+        'status': 'ok',
+        'pages': pages,
+        'wall_time_s': round(wall_time, 4),
+        'pages_per_sec': round(pages / wall_time, 2) if wall_time else None,
+        'peak_rss_bytes': peak_rss,
+        # Only the converting process above; pool workers are reported separately
+        'peak_rss_workers_bytes': peak_rss_workers,
+        'input_bytes': os.path.getsize(pdf_path),
+        'output_bytes': os.path.getsize(output_path),
+    }
+
+
+def run_benchmark(corpus_dir, output_dir, options=None, cases=None):
+    """
+    Benchmark every case listed in corpus_dir/corpus.json.
+
+    Args:
+        corpus_dir (str): Directory created by create_test_pdf.generate_corpus
+        output_dir (str): Where the converted presentations are written
+        options (dict, optional): Extra keyword arguments for convert_pdf_to_ppt
+        cases (list, optional): Only run these case names
+    """
+    with open(os.path.join(corpus_dir, 'corpus.json')) as f:
+        corpus = json.load(f)
+    os.makedirs(output_dir, exist_ok=True)
+
+    records = []
+    for name, entry in corpus.items():
+        if cases and name not in cases:
+            continue
+        print(f'Benchmarking {name}...')
+        record = benchmark_case(name, os.path.join(corpus_dir, entry['file']),
+                                output_dir, options)
+        record['params'] = entry['params']
+        records.append(record)
+        if record['status'] == 'ok':
+            print(f"  {record['pages']} pages in {record['wall_time_s']:.2f}s "
+                  f"({record['pages_per_sec']} pages/sec), "
+                  f"output {record['output_bytes']} bytes")
+        else:
+            print(f"  failed with exit code {record['exitcode']}")
+
+    return {
+        'converter_version': CONVERTER_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'options': options or {},
+        'cases': records,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PDF to PowerPoint conversion')
+    parser.add_argument('corpus_dir', help='Corpus directory from create_test_pdf.py --corpus')
+    parser.add_argument('--output', '-o', default='bench_results.json',
+                        help='Path for the JSON results (default: bench_results.json)')
+    parser.add_argument('--work-dir', default=None,
+                        help='Directory for converted files (default: <corpus_dir>/out)')
+    parser.add_argument('--case', action='append', dest='cases',
+                        help='Only run this case (can be repeated)')
+    parser.add_argument('--workers', '-w', type=int, default=1)
+    parser.add_argument('--streaming', action='store_true')
+    parser.add_argument('--coalesce', action='store_true')
+    args = parser.parse_args()
+
+    options = {'workers': args.workers, 'streaming': args.streaming,
+               'coalesce': args.coalesce}
+    work_dir = args.work_dir or os.path.join(args.corpus_dir, 'out')
+    results = run_benchmark(args.corpus_dir, work_dir, options, args.cases)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Drawing coalescing.
+
+Reduces the number of paths coming out of ``page.get_drawings()`` before they
+are classified and emitted:
+
+* touching or overlapping paths with an identical style are merged into one
+  freeform drawing (their path items are concatenated), and
+* clusters of touching paths that are still denser than ``raster_density``
+  are replaced by a single raster region of the page.
+
+Neighbour lookups go through a uniform grid so the cost stays close to linear
+in the number of paths.
+"""
+from collections import defaultdict
+
+import fitz  # PyMuPDF
+
+# Drawing keys that make up the visual style of a path
+STYLE_KEYS = ('type', 'color', 'fill', 'width', 'dashes', 'lineCap', 'lineJoin',
+              'closePath', 'even_odd', 'stroke_opacity', 'fill_opacity', 'layer')
+
+DEFAULT_RASTER_DENSITY = 50
+DEFAULT_CELL_SIZE = 32.0
+
+
+class _DisjointSet:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _touching_groups(rects, tolerance, cell_size):
+    """
+    Group indices of rects that touch or overlap (within tolerance).
+
+    Returns a list of index lists, each sorted, ordered by their first index.
+    """
+    grid = defaultdict(list)
+    for i, (x0, y0, x1, y1) in enumerate(rects):
+        for cx in range(int((x0 - tolerance) // cell_size), int((x1 + tolerance) // cell_size) + 1):
+            for cy in range(int((y0 - tolerance) // cell_size), int((y1 + tolerance) // cell_size) + 1):
+                grid[(cx, cy)].append(i)
+
+    groups = _DisjointSet(len(rects))
+    for members in grid.values():
+        for n, i in enumerate(members):
+            ax0, ay0, ax1, ay1 = rects[i]
+            for j in members[n + 1:]:
+                bx0, by0, bx1, by1 = rects[j]
+                if (ax0 - tolerance <= bx1 and bx0 - tolerance <= ax1 and
+                        ay0 - tolerance <= by1 and by0 - tolerance <= ay1):
+                    groups.union(i, j)
+
+    clusters = defaultdict(list)
+    for i in range(len(rects)):
+        clusters[groups.find(i)].append(i)
+    return [clusters[root] for root in sorted(clusters)]
+
+
+def _union(rects):
+    """Bounding rect of rects; unlike Rect.__or__ this keeps zero-height lines."""
+    x0s, y0s, x1s, y1s = zip(*(tuple(rect) for rect in rects))
+    return fitz.Rect(min(x0s), min(y0s), max(x1s), max(y1s))
+
+
+def _merge(drawings):
+    """Merge same-style drawings into one freeform drawing."""
+    if len(drawings) == 1:
+        return drawings[0]
+    merged = dict(drawings[0])
+    merged['items'] = [item for drawing in drawings for item in drawing['items']]
+    merged['rect'] = _union(drawing['rect'] for drawing in drawings)
+    return merged
+
+
+def coalesce_drawings(drawings, tolerance=1.0, raster_density=DEFAULT_RASTER_DENSITY,
+                      cell_size=DEFAULT_CELL_SIZE):
+    """
+    Coalesce the output of page.get_drawings().
+
+    Args:
+        drawings (list): Drawing dicts as returned by page.get_drawings()
+        tolerance (float): Gap in PDF points below which paths count as touching
+        raster_density (int, optional): Clusters with at least this many paths
+                                        after merging become raster regions.
+                                        None disables rasterization.
+        cell_size (float): Size of the spatial grid cells in PDF points
+
+    Returns:
+        tuple: (drawings, raster_regions, removed) where drawings is the
+               coalesced list in original paint order, raster_regions is a
+               list of fitz.Rect to render as images and removed is the
+               number of input paths that no longer need their own shape
+    """
+    if not drawings:
+        return [], [], 0
+
+    # Merge touching paths of identical style
+    by_style = defaultdict(list)
+    for i, drawing in enumerate(drawings):
+        by_style[tuple(drawing.get(key) for key in STYLE_KEYS)].append(i)
+
+    merged = []
+    for indices in by_style.values():
+        rects = [tuple(drawings[i]['rect']) for i in indices]
+        for group in _touching_groups(rects, tolerance, cell_size):
+            members = [indices[n] for n in group]
+            merged.append((members[0], _merge([drawings[i] for i in members])))
+    merged.sort(key=lambda entry: entry[0])
+    coalesced = [drawing for _, drawing in merged]
+
+    # Replace very dense clusters, whatever their style, with raster regions
+    raster_regions = []
+    if raster_density is not None and len(coalesced) >= raster_density:
+        rects = [tuple(drawing['rect']) for drawing in coalesced]
+        dense = set()
+        for group in _touching_groups(rects, tolerance, cell_size):
+            if len(group) < raster_density:
+                continue
+            raster_regions.append(_union(coalesced[i]['rect'] for i in group))
+            dense.update(group)
+        coalesced = [drawing for i, drawing in enumerate(coalesced) if i not in dense]
+
+    return coalesced, raster_regions, len(drawings) - len(coalesced) - len(raster_regions)
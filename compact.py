@@ -0,0 +1,314 @@
+"""
+Post-save compaction of PPTX files.
+
+compact_pptx rewrites a finished presentation without the parts it does not
+need:
+
+- slide layouts no slide uses, and slide masters left without layouts
+- leftovers of python-pptx's default template (printer settings and the
+  template thumbnail)
+- duplicate media: identical images are merged into one part and every
+  relationship is pointed at it
+
+Parts no longer reachable from the package relationships are dropped, and the
+remaining members are written with a configurable deflate level. Members are
+read from the source zip one at a time and copied in chunks, so compacting
+a large deck does not hold it in memory.
+"""
+import hashlib
+import io
+import os
+import posixpath
+import shutil
+import time
+import zipfile
+
+from lxml import etree
+
+from pptx_stream import create_sibling_temp
+
+DEFAULT_COMPRESSION_LEVEL = 9
+CHUNK_SIZE = 1024 * 1024
+
+CONTENT_TYPES = '[Content_Types].xml'
+PACKAGE_RELS = '_rels/.rels'
+
+_CT_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+_R_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_RT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+_RT_PACKAGE = 'http://schemas.openxmlformats.org/package/2006/relationships/'
+
+RT_SLIDE = _RT + 'slide'
+RT_SLIDE_LAYOUT = _RT + 'slideLayout'
+RT_SLIDE_MASTER = _RT + 'slideMaster'
+# Template parts nothing in a converted deck depends on
+RT_REMOVABLE = {_RT + 'printerSettings', _RT_PACKAGE + 'metadata/thumbnail'}
+
+# Parts that may be merged when their bytes are identical
+DEDUPE_PREFIXES = ('ppt/media/',)
+
+
+def rels_member(member):
+    """Name of the relationships member belonging to a part member."""
+    directory, name = posixpath.split(member)
+    return posixpath.join(directory, '_rels', name + '.rels')
+
+
+def _source_member(rels_name):
+    """Inverse of rels_member; '' for the package relationships."""
+    rels_dir, name = posixpath.split(rels_name)
+    return posixpath.join(posixpath.dirname(rels_dir), name[:-len('.rels')])
+
+
+def _resolve(source, target):
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+class _CountingWriter:
+    """Write-only wrapper of a stream that counts the bytes written through it."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.written = 0
+
+    def write(self, data):
+        self._stream.write(data)
+        self.written += len(data)
+        return len(data)
+
+    def flush(self):
+        self._stream.flush()
+
+
+class _Package:
+    """
+    The members of an open PPTX zip with parsed relationships. Other parts
+    are read from the zip only when needed.
+    """
+
+    def __init__(self, zip_file):
+        self.zip = zip_file
+        self.order = zip_file.namelist()
+        self.members = set(self.order)
+        self.rels = {}  # rels member -> parsed tree
+        for name in self.order:
+            if name.endswith('.rels'):
+                self.rels[name] = etree.fromstring(zip_file.read(name))
+        self.xml = {}  # parsed part XML that was modified
+
+    def relationships(self, rels_name):
+        """Yield (rel element, resolved target member) for internal relationships."""
+        tree = self.rels.get(rels_name)
+        if tree is None:
+            return
+        source = _source_member(rels_name)
+        for rel in tree:
+            if rel.get('TargetMode') == 'External':
+                continue
+            yield rel, _resolve(source, rel.get('Target'))
+
+    def part_xml(self, member):
+        if member not in self.xml:
+            self.xml[member] = etree.fromstring(self.zip.read(member))
+        return self.xml[member]
+
+    def drop_relationship(self, rels_name, rel):
+        """Remove a relationship and any element of its source referring to it."""
+        rel_id = rel.get('Id')
+        self.rels[rels_name].remove(rel)
+        source = _source_member(rels_name)
+        if source in self.members:
+            root = self.part_xml(source)
+            for element in [e for e in root.iter() if e.get(_R_ID) == rel_id]:
+                element.getparent().remove(element)
+
+    def retarget(self, old, new):
+        """Point every relationship at member old to member new."""
+        for rels_name in self.rels:
+            for rel, target in self.relationships(rels_name):
+                if target == old:
+                    source = _source_member(rels_name)
+                    rel.set('Target', posixpath.relpath(new, posixpath.dirname(source) or '.'))
+
+    def reachable(self):
+        """Members reachable from the package relationships."""
+        seen = set()
+        pending = [PACKAGE_RELS]
+        while pending:
+            rels_name = pending.pop()
+            for _, target in self.relationships(rels_name):
+                if target in seen or target not in self.members:
+                    continue
+                seen.add(target)
+                pending.append(rels_member(target))
+        return seen
+
+
+def _strip_unused_layouts(package):
+    """Remove layouts no slide uses and masters left without layouts."""
+    used_layouts = set()
+    slides = []
+    for rels_name in list(package.rels):
+        for rel, target in package.relationships(rels_name):
+            if rel.get('Type') == RT_SLIDE:
+                slides.append(target)
+    for slide in slides:
+        for rel, target in package.relationships(rels_member(slide)):
+            if rel.get('Type') == RT_SLIDE_LAYOUT:
+                used_layouts.add(target)
+    if not used_layouts:
+        return  # nothing to anchor the template on; leave it alone
+
+    used_masters = set()
+    for layout in used_layouts:
+        for rel, target in package.relationships(rels_member(layout)):
+            if rel.get('Type') == RT_SLIDE_MASTER:
+                used_masters.add(target)
+
+    for rels_name in list(package.rels):
+        for rel, target in list(package.relationships(rels_name)):
+            reltype = rel.get('Type')
+            if ((reltype == RT_SLIDE_LAYOUT and target not in used_layouts) or
+                    (reltype == RT_SLIDE_MASTER and target not in used_masters) or
+                    reltype in RT_REMOVABLE):
+                package.drop_relationship(rels_name, rel)
+
+
+def _dedupe_media(package):
+    """Merge identical media parts; returns the number of parts merged."""
+    first_by_digest = {}
+    merged = 0
+    for member in package.order:
+        if not member.startswith(DEDUPE_PREFIXES) or rels_member(member) in package.rels:
+            continue
+        digest = hashlib.sha1()
+        with package.zip.open(member) as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        original = first_by_digest.setdefault(digest, member)
+        if original != member:
+            package.retarget(member, original)
+            merged += 1
+    return merged
+
+
+def _update_content_types(package, kept):
+    root = etree.fromstring(package.zip.read(CONTENT_TYPES))
+    for override in root.findall(f'{{{_CT_NS}}}Override'):
+        if override.get('PartName').lstrip('/') not in kept:
+            root.remove(override)
+    package.xml[CONTENT_TYPES] = root
+
+
+def _serialize(root):
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+def compact_pptx(source, output=None, compression_level=DEFAULT_COMPRESSION_LEVEL,
+                 strip_layouts=True, dedupe=True):
+    """
+    Compact a PPTX file.
+
+    Args:
+        source (str, bytes or file object): Path of the presentation, its
+                                            bytes, or a seekable binary file
+        output (str or file object, optional): Where to write the result;
+                                               defaults to replacing source
+                                               (which must then be a path).
+                                               A stream does not need to
+                                               be seekable
+        compression_level (int): Deflate level from 0 (fastest) to 9 (smallest)
+        strip_layouts (bool): Remove unused layouts, masters and template leftovers
+        dedupe (bool): Merge identical media parts
+
+    Returns:
+        dict: {"bytes_before", "bytes_after", "seconds", "parts_removed",
+               "media_merged"}
+    """
+    started = time.perf_counter()
+    if isinstance(source, bytes):
+        bytes_before = len(source)
+        source = io.BytesIO(source)
+        if output is None:
+            raise ValueError("output is required when the presentation is given as bytes")
+    elif isinstance(source, (str, os.PathLike)):
+        bytes_before = os.path.getsize(source)
+    else:
+        if output is None:
+            raise ValueError("output is required when the presentation is given as a stream")
+        bytes_before = source.seek(0, os.SEEK_END)
+
+    destination = source if output is None else output
+    with zipfile.ZipFile(source) as source_zip:
+        package = _Package(source_zip)
+        if strip_layouts:
+            _strip_unused_layouts(package)
+        media_merged = _dedupe_media(package) if dedupe else 0
+
+        kept = package.reachable()
+        parts = [name for name in package.order
+                 if not name.endswith('.rels') and name != CONTENT_TYPES]
+        removed = [name for name in parts if name not in kept]
+        _update_content_types(package, kept)
+
+        members = []
+        for name in package.order:
+            if name in (CONTENT_TYPES, PACKAGE_RELS):
+                members.append(name)
+            elif name.endswith('.rels'):
+                if _source_member(name) in kept:
+                    members.append(name)
+            elif name in kept:
+                members.append(name)
+
+        def write(target):
+            with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED,
+                                 compresslevel=compression_level) as z:
+                for name in members:
+                    if name in package.rels:
+                        z.writestr(name, _serialize(package.rels[name]))
+                    elif name in package.xml:
+                        z.writestr(name, _serialize(package.xml[name]))
+                    else:
+                        info = source_zip.getinfo(name)
+                        large = info.file_size > zipfile.ZIP64_LIMIT
+                        with source_zip.open(info) as src, \
+                                z.open(name, 'w', force_zip64=large) as dst:
+                            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+        to_path = isinstance(destination, (str, os.PathLike))
+        if to_path:
+            tmp_path = create_sibling_temp(destination, suffix='.pptx')
+            try:
+                if os.path.exists(destination):
+                    # Replacing a file keeps its permissions
+                    shutil.copymode(destination, tmp_path)
+                write(tmp_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        else:
+            # Counted rather than measured with tell(), which unseekable
+            # streams do not have
+            counter = _CountingWriter(destination)
+            write(counter)
+            bytes_after = counter.written
+    if to_path:
+        # Only now that source is closed, since it may be the same file
+        try:
+            os.replace(tmp_path, destination)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        bytes_after = os.path.getsize(destination)
+
+    return {
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+        'seconds': time.perf_counter() - started,
+        'parts_removed': len(removed),
+        'media_merged': media_merged,
+    }
@@ -0,0 +1,172 @@
+"""
+Content-addressed cache of finished conversions.
+
+Entries are keyed by a hash of the PDF bytes, the converter version and the
+conversion options, and stored as plain .pptx files in the cache directory.
+The cache is kept under a size quota by evicting the least recently used
+entries (tracked through file modification times).
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from pdf_to_ppt import CONVERTER_VERSION, convert_pdf_to_ppt
+
+# Options that change how a conversion runs but not what it produces
+OUTPUT_NEUTRAL_OPTIONS = {'workers', 'streaming', 'observers', 'page_cache'}
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_path(value):
+    return isinstance(value, (str, os.PathLike))
+
+
+class ConversionCache:
+    """
+    On-disk PPTX cache with a size quota and LRU eviction.
+
+    Args:
+        cache_dir (str): Directory that holds the cached presentations
+        max_bytes (int): Total size the cache may occupy before old entries
+                         are evicted
+        convert (callable): Conversion function used on a cache miss
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024, convert=convert_pdf_to_ppt):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._convert = convert
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for(self, pdf_digest, options=None):
+        """Build the cache key for a PDF digest and a set of conversion options."""
+        relevant = {name: value for name, value in (options or {}).items()
+                    if name not in OUTPUT_NEUTRAL_OPTIONS}
+        material = json.dumps([pdf_digest, CONVERTER_VERSION, relevant], sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + '.pptx')
+
+    def get(self, key):
+        """Return the path of a cached presentation, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, key, pptx):
+        """Copy a finished presentation (a path or bytes) into the cache."""
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+        try:
+            if _is_path(pptx):
+                os.close(fd)
+                shutil.copyfile(pptx, tmp_path)
+            else:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(pptx)
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def convert(self, pdf_path, output_path, pdf_digest=None, **options):
+        """
+        Drop-in replacement for convert_pdf_to_ppt that consults the cache.
+
+        Like convert_pdf_to_ppt, the PDF may be a path or bytes and the output
+        a path or a writable binary stream. pdf_digest is the SHA-256 of the
+        PDF if the caller already has it (e.g. hashed while uploading).
+        Returns True if the result was served from the cache.
+        """
+        if pdf_digest is None and _is_path(pdf_path):
+            pdf_digest = hash_file(pdf_path)
+        elif pdf_digest is None:
+            pdf_digest = hashlib.sha256(pdf_path).hexdigest()
+        key = self.key_for(pdf_digest, options)
+        cached_path = self.get(key)
+        if cached_path is not None:
+            try:
+                if _is_path(output_path):
+                    shutil.copyfile(cached_path, output_path)
+                else:
+                    with open(cached_path, 'rb') as f:
+                        shutil.copyfileobj(f, output_path)
+                return True
+            except FileNotFoundError:
+                pass  # evicted between lookup and copy
+
+        if _is_path(output_path):
+            self._convert(pdf_path, output_path, **options)
+            self.put(key, output_path)
+        else:
+            buffer = io.BytesIO()
+            self._convert(pdf_path, buffer, **options)
+            self.put(key, buffer.getvalue())
+            output_path.write(buffer.getvalue())
+        return False
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pptx'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        """Return hit/miss counters and the current cache size."""
+        entries = self._entries()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+            }
@@ -6,7 +6,12 @@ from reportlab.platypus import Paragraph
 from reportlab.lib.units import inch
 from reportlab.graphics.shapes import Drawing, Line, Circle, Rect, Polygon, String
 from reportlab.graphics import renderPDF
+from reportlab.lib.utils import ImageReader
+import argparse
+import json
 import math
+import os
+import random
 
 def create_test_pdf(filename):
     c = canvas.Canvas(filename, pagesize=letter)
@@ -157,5 +162,135 @@ def create_test_pdf(filename):
     c.save()
     print("Test PDF created successfully!")
 
+# Benchmark corpus: case name -> create_corpus_pdf parameters
+DEFAULT_CORPUS = {
+    "text_small": dict(pages=10, text_blocks=20),
+    "text_large": dict(pages=200, text_blocks=20),
+    "drawings_dense": dict(pages=20, text_blocks=2, drawing_density=2000),
+    "tables": dict(pages=20, text_blocks=2, tables=3),
+    "images": dict(pages=50, text_blocks=2, images=4),
+    "mixed": dict(pages=100, text_blocks=10, drawing_density=200, tables=1, images=1),
+}
+
+WORDS = ("status review portfolio data business market revenue project "
+         "timeline budget forecast quarter growth risk delivery region").split()
+
+def _random_image(rng, size=128):
+    """Return a noise image; each call yields a different picture."""
+    from PIL import Image
+    pixels = bytes(rng.getrandbits(8) for _ in range(size * size * 3))
+    return ImageReader(Image.frombytes("RGB", (size, size), pixels))
+
+def _draw_table(c, rng, x, y, rows, cols, cell_width=80, cell_height=20):
+    c.setStrokeColorRGB(0, 0, 0)
+    for row in range(rows):
+        for col in range(cols):
+            cell_x = x + col * cell_width
+            cell_y = y - (row + 1) * cell_height
+            c.rect(cell_x, cell_y, cell_width, cell_height)
+            c.setFont("Helvetica-Bold" if row == 0 else "Helvetica", 9)
+            c.drawString(cell_x + 4, cell_y + 6, rng.choice(WORDS).title())
+
+def create_corpus_pdf(filename, pages=10, text_blocks=5, drawing_density=0,
+                      tables=0, images=0, seed=0):
+    """
+    Create a synthetic PDF for benchmarking.
+
+    Args:
+        filename (str): Output path
+        pages (int): Number of pages
+        text_blocks (int): Paragraphs of text per page (the first one is a title)
+        drawing_density (int): Vector paths (rects, lines and circles) per page
+        tables (int): Bordered tables per page
+        images (int): Embedded images per page; half of them reuse a shared logo
+        seed (int): Random seed, so the same parameters give the same document
+    """
+    rng = random.Random(seed)
+    c = canvas.Canvas(filename, pagesize=letter)
+    width, height = letter
+    logo = _random_image(rng) if images else None
+    
+    for page_num in range(pages):
+        c.setFont("Helvetica-Bold", 20)
+        c.drawString(50, height - 50, f"Global Status Report - Page {page_num + 1}")
+        
+        # Text blocks
+        c.setFont("Helvetica", 10)
+        for block in range(max(0, text_blocks - 1)):
+            y = height - 80 - (block % 30) * 22
+            prefix = "• " if block % 4 == 1 else ""
+            words = " ".join(rng.choice(WORDS) for _ in range(12))
+            c.drawString(50, y, prefix + words.capitalize())
+        
+        # Drawings
+        for i in range(drawing_density):
+            c.setStrokeColorRGB(rng.random(), rng.random(), rng.random())
+            c.setFillColorRGB(rng.random(), rng.random(), rng.random())
+            x = rng.uniform(0, width - 60)
+            y = rng.uniform(0, height - 60)
+            kind = i % 3
+            if kind == 0:
+                c.rect(x, y, rng.uniform(5, 60), rng.uniform(5, 60), fill=1)
+            elif kind == 1:
+                c.line(x, y, x + rng.uniform(5, 60), y + rng.uniform(-20, 20))
+            else:
+                c.circle(x, y, rng.uniform(2, 10), fill=1)
+        
+        # Tables
+        for t in range(tables):
+            _draw_table(c, rng, 50 + (t % 2) * 270, height - 120 - (t // 2) * 150,
+                        rows=5, cols=3)
+        
+        # Images
+        for i in range(images):
+            image = logo if i % 2 == 0 else _random_image(rng, size=64)
+            c.drawImage(image, width - 150 - (i % 4) * 110, 40 + (i // 4) * 110, 100, 100)
+        
+        c.showPage()
+    
+    c.save()
+
+def generate_corpus(out_dir, cases=None):
+    """
+    Write one PDF per corpus case plus a corpus.json manifest.
+
+    Returns the manifest as a dict mapping case name to its file and parameters.
+    """
+    cases = DEFAULT_CORPUS if cases is None else cases
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    for name, params in cases.items():
+        path = os.path.join(out_dir, f"{name}.pdf")
+        print(f"Generating {path}...")
+        create_corpus_pdf(path, **params)
+        manifest[name] = {"file": f"{name}.pdf", "params": params}
+    with open(os.path.join(out_dir, "corpus.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Create test PDFs")
+    parser.add_argument("--corpus", metavar="DIR",
+                        help="Generate the benchmark corpus into DIR instead of test.pdf")
+    parser.add_argument("--output", "-o", default="test.pdf",
+                        help="Output path for a single PDF (default: test.pdf)")
+    parser.add_argument("--pages", type=int, help="Generate a synthetic PDF with this many pages")
+    parser.add_argument("--text-blocks", type=int, default=5)
+    parser.add_argument("--drawing-density", type=int, default=0)
+    parser.add_argument("--tables", type=int, default=0)
+    parser.add_argument("--images", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    if args.corpus:
+        generate_corpus(args.corpus)
+    elif args.pages:
+        create_corpus_pdf(args.output, pages=args.pages, text_blocks=args.text_blocks,
+                          drawing_density=args.drawing_density, tables=args.tables,
+                          images=args.images, seed=args.seed)
+        print(f"Synthetic PDF written to {args.output}")
+    else:
+        create_test_pdf(args.output)
+
 if __name__ == "__main__":
-    create_test_pdf("test.pdf") 
\ No newline at end of file
+    main() 
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Background conversion jobs for the Flask front ends.
+
+Submitting a job returns an ID straight away; a bounded pool of worker
+threads pulls jobs from an in-process queue and runs the conversion. Each
+job has a JSON record on disk, so status can be polled from any process
+that shares the jobs directory.
+
+Finished jobs are removed by a background sweep once they are older than
+the TTL. A record that is still queued or running when the process that
+owns it has gone (after a restart) is marked failed, so clients polling it
+get an answer.
+"""
+import json
+import os
+import queue
+import shutil
+import socket
+import threading
+import time
+import uuid
+
+from pdf_to_ppt import convert_pdf_to_ppt
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """Raised by JobQueue.submit when the queue is at its maximum depth."""
+
+
+def is_valid_job_id(job_id):
+    """Check that job_id looks like an ID produced by JobQueue.submit."""
+    try:
+        return uuid.UUID(job_id).hex == job_id
+    except (ValueError, TypeError):
+        return False
+
+
+class JobQueue:
+    """
+    In-process job queue with a fixed number of conversion workers.
+
+    Args:
+        jobs_dir (str): Directory holding one sub-directory per job
+        workers (int): Number of conversions that may run at the same time
+        max_queue (int): Number of jobs allowed to wait; submit raises
+                         QueueFullError beyond that
+        convert (callable): Conversion function, called as
+                            convert(pdf_path, output_path, **options)
+        ttl (float): Seconds a finished job's directory is kept
+        sweep_interval (float): Seconds between background sweeps
+    """
+
+    def __init__(self, jobs_dir, workers=2, max_queue=16, convert=convert_pdf_to_ppt,
+                 ttl=24 * 3600, sweep_interval=600):
+        self.jobs_dir = jobs_dir
+        self.workers = workers
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._convert = convert
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._sweeper = None
+        self._lock = threading.Lock()
+        self._owner = {'host': socket.gethostname(), 'pid': os.getpid()}
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.recover()
+
+    def job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def new_job(self):
+        """Create a job directory and return (job_id, input_pdf_path)."""
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.job_dir(job_id))
+        return job_id, os.path.join(self.job_dir(job_id), 'input.pdf')
+
+    def submit(self, job_id, output_path=None, options=None):
+        """
+        Queue a job created with new_job whose input PDF is in place.
+
+        Raises QueueFullError if max_queue jobs are already waiting; the job
+        directory is removed in that case.
+        """
+        pdf_path = os.path.join(self.job_dir(job_id), 'input.pdf')
+        if output_path is None:
+            output_path = os.path.join(self.job_dir(job_id), 'output.pptx')
+        record = {
+            'id': job_id,
+            'status': QUEUED,
+            'created': time.time(),
+            'input': pdf_path,
+            'output': output_path,
+            'options': options or {},
+            'owner': self._owner,
+        }
+        self._write_record(record)
+        self._start_workers()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.discard(job_id)
+            raise QueueFullError('Too many conversions queued, try again later')
+        return job_id
+
+    def get(self, job_id):
+        """Return the job record, or None if the job is unknown."""
+        if not is_valid_job_id(job_id):
+            return None
+        try:
+            with open(os.path.join(self.job_dir(job_id), 'job.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def discard(self, job_id):
+        """Remove a job's directory and everything in it."""
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def _orphaned(self, record):
+        """Check whether a queued or running record belongs to a process that has exited."""
+        owner = record.get('owner')
+        if owner is None:
+            return True  # written before records had an owner
+        if owner['host'] != self._owner['host']:
+            return False  # jobs of other hosts are left to them
+        if owner['pid'] == self._owner['pid']:
+            return False
+        try:
+            os.kill(owner['pid'], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass  # exists, but belongs to another user
+        return False
+
+    def recover(self):
+        """Mark jobs left queued or running by an exited process as failed."""
+        for job_id in os.listdir(self.jobs_dir):
+            record = self.get(job_id)
+            if record is None or record['status'] not in (QUEUED, RUNNING):
+                continue
+            if self._orphaned(record):
+                record.update(status=FAILED, finished=time.time(),
+                              error='The server restarted before the conversion finished')
+                self._write_record(record)
+                if os.path.exists(record['input']):
+                    os.remove(record['input'])
+
+    def sweep(self):
+        """Remove finished jobs, and directories never submitted, older than the TTL."""
+        expires_before = time.time() - self.ttl
+        for job_id in os.listdir(self.jobs_dir):
+            if not is_valid_job_id(job_id):
+                continue
+            record = self.get(job_id)
+            if record is None:
+                try:
+                    expired = os.stat(self.job_dir(job_id)).st_mtime < expires_before
+                except FileNotFoundError:
+                    continue
+            else:
+                expired = (record['status'] in (DONE, FAILED) and
+                           record.get('finished', 0) < expires_before)
+            if expired:
+                self.discard(job_id)
+
+    def stats(self):
+        return {'queued': self._queue.qsize(), 'max_queue': self._queue.maxsize,
+                'workers': self.workers}
+
+    def _start_workers(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, daemon=True,
+                                          name=f'conversion-worker-{len(self._threads)}')
+                thread.start()
+                self._threads.append(thread)
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._sweep, daemon=True,
+                                                 name='job-sweep')
+                self._sweeper.start()
+
+    def _sweep(self):
+        while True:
+            try:
+                self.sweep()
+            except OSError:
+                pass  # try again on the next sweep
+            time.sleep(self.sweep_interval)
+
+    def _work(self):
+        while True:
+            record = self._queue.get()
+            try:
+                self._run(record)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, record):
+        record.update(status=RUNNING, started=time.time())
+        self._write_record(record)
+        try:
+            self._convert(record['input'], record['output'], **record['options'])
+            record['status'] = DONE
+        except Exception as e:
+            record.update(status=FAILED, error=str(e))
+            if os.path.exists(record['output']):
+                os.remove(record['output'])
+        finally:
+            record['finished'] = time.time()
+            if os.path.exists(record['input']):
+                os.remove(record['input'])
+        self._write_record(record)
+
+    def _write_record(self, record):
+        path = os.path.join(self.job_dir(record['id']), 'job.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
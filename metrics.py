@@ -0,0 +1,122 @@
+"""
+Conversion metrics in the Prometheus text exposition format.
+
+ConversionMetrics.observe is a convert_pdf_to_ppt observer; it aggregates the
+per-stage timing events into histograms that render() formats for a
+/metrics endpoint.
+"""
+import threading
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PAGE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+BYTE_BUCKETS = (64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2,
+                64 * 1024 ** 2, 256 * 1024 ** 2, 1024 ** 3)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by one label."""
+
+    def __init__(self, name, documentation, buckets, label=None):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.label = label
+        self._series = {}
+
+    def observe(self, value, label_value=None):
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = {'counts': [0] * len(self.buckets),
+                                                  'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series['counts'][i] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} histogram']
+        for label_value in sorted(self._series, key=str):
+            series = self._series[label_value]
+            labels = [(self.label, label_value)] if self.label else []
+            for bound, count in zip(self.buckets, series['counts']):
+                bucket_labels = _format_labels(labels + [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{bucket_labels} {count}')
+            lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", "+Inf")])} '
+                         f'{series["count"]}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(series["sum"])}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {series["count"]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def render(self):
+        return [f'# HELP {self.name} {self.documentation}',
+                f'# TYPE {self.name} counter',
+                f'{self.name} {_format_value(self.value)}']
+
+
+class ConversionMetrics:
+    """Thread-safe aggregation of convert_pdf_to_ppt observer events."""
+
+    def __init__(self, prefix='pdf_to_ppt'):
+        self._lock = threading.Lock()
+        self.stage_seconds = Histogram(f'{prefix}_stage_seconds',
+                                       'Time spent per conversion stage.',
+                                       STAGE_BUCKETS, label='stage')
+        self.conversion_seconds = Histogram(f'{prefix}_conversion_seconds',
+                                            'Total time per conversion.', STAGE_BUCKETS)
+        self.pages = Histogram(f'{prefix}_pages', 'Pages per conversion.', PAGE_BUCKETS)
+        self.bytes_in = Histogram(f'{prefix}_input_bytes', 'Size of converted PDFs.',
+                                  BYTE_BUCKETS)
+        self.bytes_out = Histogram(f'{prefix}_output_bytes',
+                                   'Size of generated presentations.', BYTE_BUCKETS)
+        self.pages_converted = Counter(f'{prefix}_pages_converted_total',
+                                       'Pages converted since start.')
+        self.conversions = Counter(f'{prefix}_conversions_total',
+                                   'Conversions completed since start.')
+
+    def observe(self, event):
+        """Observer callback for convert_pdf_to_ppt."""
+        with self._lock:
+            if event['stage'] == 'convert':
+                self.conversion_seconds.observe(event['seconds'])
+                self.pages.observe(event['pages'])
+                self.bytes_in.observe(event['bytes_in'])
+                if event['bytes_out'] is not None:  # unknown for non-seekable outputs
+                    self.bytes_out.observe(event['bytes_out'])
+                self.pages_converted.inc(event['pages'])
+                self.conversions.inc()
+            else:
+                self.stage_seconds.observe(event['seconds'], event['stage'])
+
+    def render(self):
+        """Return all metrics in the Prometheus text format."""
+        with self._lock:
+            lines = []
+            for metric in (self.stage_seconds, self.conversion_seconds, self.pages,
+                           self.bytes_in, self.bytes_out, self.pages_converted,
+                           self.conversions):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
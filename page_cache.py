@@ -0,0 +1,316 @@
+"""
+Per-page cache of generated slides for incremental re-conversion.
+
+Every page gets a fingerprint: a hash of its decompressed content stream,
+its page boxes and rotation, and the resources the content stream uses
+(fonts, images, form XObjects, ...) with everything they refer to, hashed by
+content rather than object number so that a re-exported PDF with renumbered
+objects still matches. Resources a page inherits but does not use, e.g. a
+font added to a resource dictionary shared by all pages, do not change its
+fingerprint. The fingerprint also covers the converter version and the
+options that shape the output.
+
+After a page is rendered, its slide XML and relationships are stored under
+the fingerprint; images go into a content-addressed media folder shared by
+all entries. When a revised document is converted, pages with a stored
+fingerprint are rebuilt from the stored slide instead of being extracted
+and emitted again. Entries are loaded one page at a time while the slides
+are built; an entry another conversion has evicted in the meantime is a
+miss, and its page is extracted after all.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+
+# Indirect references ("12 0 R") are replaced by the referenced object's hash
+_REFERENCE = re.compile(r'(\d+) (\d+) R\b')
+# Back-links that point outside the page's own content
+_BACK_LINKS = re.compile(r'/(Parent|P|StructParents?) (\d+ \d+ R|\d+)')
+
+# Name operands of a content stream, and #xx escapes inside names
+_NAME = re.compile(rb'/([^\s/\[\]()<>{}%]*)')
+_NAME_ESCAPE = re.compile(rb'#([0-9A-Fa-f]{2})')
+# Resource dictionary categories a content stream can refer to by name
+_RESOURCE_TYPES = ('ExtGState', 'ColorSpace', 'Pattern', 'Shading', 'XObject', 'Font',
+                   'Properties')
+
+# Relationship attributes in slide XML that hold an rId
+_RID_ATTRIBUTE = re.compile(r'( r:(?:embed|link|id)=")([^"]*)"')
+
+
+def _object_digest(pdf_document, xref, memo, active):
+    """Hash an object and, recursively, every object it refers to."""
+    if xref in memo:
+        return memo[xref]
+    if xref in active or not 0 < xref < pdf_document.xref_length():
+        return 'ref'  # reference cycle or dangling reference
+    active.add(xref)
+    digest = hashlib.sha1()
+    source = _BACK_LINKS.sub('', pdf_document.xref_object(xref, compressed=True))
+    digest.update(_REFERENCE.sub(
+        lambda match: _object_digest(pdf_document, int(match.group(1)), memo, active),
+        source).encode('utf-8', 'surrogateescape'))
+    if pdf_document.xref_is_stream(xref):
+        digest.update(pdf_document.xref_stream_raw(xref) or b'')
+    active.discard(xref)
+    memo[xref] = digest.hexdigest()
+    return memo[xref]
+
+
+def _value_digest(pdf_document, kind, value, memo):
+    """Hash a value returned by xref_get_key, resolving its references."""
+    if kind == 'xref':
+        return _object_digest(pdf_document, int(value.split()[0]), memo, set())
+    return _REFERENCE.sub(
+        lambda match: _object_digest(pdf_document, int(match.group(1)), memo, set()),
+        value)
+
+
+def _resources_owner(pdf_document, page):
+    """Return the xref of the page or page tree node holding the page's /Resources."""
+    xref = page.xref
+    while xref:
+        if pdf_document.xref_get_key(xref, 'Resources')[0] != 'null':
+            return xref
+        kind, value = pdf_document.xref_get_key(xref, 'Parent')
+        xref = int(value.split()[0]) if kind == 'xref' else 0
+    return 0
+
+
+def _used_names(contents):
+    """
+    Return the names used in a content stream, or None if one of them cannot
+    be looked up as a key path (empty, non-ASCII or containing a slash).
+    """
+    names = set()
+    for raw in set(_NAME.findall(contents)):
+        name = _NAME_ESCAPE.sub(lambda match: bytes([int(match.group(1), 16)]), raw)
+        if not name or b'/' in name or not name.isascii():
+            return None
+        names.add(name.decode('ascii'))
+    return names
+
+
+def page_fingerprint(page, salt='', memo=None):
+    """
+    Fingerprint a page's content.
+
+    Args:
+        page: PyMuPDF page
+        salt (str): Extra material, e.g. the converter version and options
+        memo (dict, optional): Object hashes shared between pages of one
+                               document, so shared fonts and images are
+                               hashed once
+    """
+    pdf_document = page.parent
+    memo = {} if memo is None else memo
+    digest = hashlib.sha1(salt.encode('utf-8'))
+    digest.update(repr((tuple(page.mediabox), tuple(page.cropbox), page.rotation)).encode())
+    contents = page.read_contents()
+    owner = _resources_owner(pdf_document, page)
+    names = _used_names(contents)
+    if owner and names is None:
+        # Fall back to hashing every resource the page can see
+        kind, value = pdf_document.xref_get_key(owner, 'Resources')
+        value = _value_digest(pdf_document, kind, value, memo)
+        digest.update(value.encode('utf-8', 'surrogateescape'))
+    elif owner:
+        # Names that are not resources (operands of BDC, inline image keys, ...)
+        # simply find nothing
+        for name in sorted(names):
+            for resource_type in _RESOURCE_TYPES:
+                kind, value = pdf_document.xref_get_key(owner,
+                                                        f'Resources/{resource_type}/{name}')
+                if kind != 'null':
+                    value = _value_digest(pdf_document, kind, value, memo)
+                    digest.update(f'/{resource_type}/{name} {value}\n'.encode(
+                        'utf-8', 'surrogateescape'))
+    digest.update(contents)
+    return digest.hexdigest()
+
+
+def fingerprint_salt(converter_version, slide_width, slide_height, options):
+    """Material that makes fingerprints differ between converter versions and options."""
+    return json.dumps([converter_version, slide_width, slide_height, options],
+                      sort_keys=True, default=str)
+
+
+class PageCache:
+    """
+    On-disk store of rendered slides keyed by page fingerprint.
+
+    Args:
+        cache_dir (str): Directory holding the entries
+        max_bytes (int): Size the cache may reach before the least recently
+                         used entries are evicted
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._pages_dir = os.path.join(cache_dir, 'pages')
+        self._media_dir = os.path.join(cache_dir, 'media')
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self._pages_dir, exist_ok=True)
+        os.makedirs(self._media_dir, exist_ok=True)
+
+    def _entry_path(self, fingerprint):
+        return os.path.join(self._pages_dir, fingerprint + '.json')
+
+    def _write(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def has(self, fingerprint):
+        """
+        Return whether a slide is stored for a fingerprint, marking it as
+        recently used. Only get reads the entry.
+        """
+        try:
+            os.utime(self._entry_path(fingerprint))
+            return True
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return False
+
+    def get(self, fingerprint, have=()):
+        """
+        Return the stored entry for a fingerprint, or None.
+
+        The entry holds the slide XML and the bytes of its images (in
+        "media"), so evicting the cache afterwards cannot take them away.
+        Images whose media key is in have are not read.
+        """
+        path = self._entry_path(fingerprint)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)  # mark as recently used
+            entry['media'] = {}
+            for rel in entry['rels']:
+                key = os.path.splitext(rel.get('media', ''))[0]
+                if key and key not in have and key not in entry['media']:
+                    with open(os.path.join(self._media_dir, rel['media']), 'rb') as f:
+                        entry['media'][key] = f.read()
+                    os.utime(os.path.join(self._media_dir, rel['media']))
+        except (OSError, ValueError):
+            entry = None  # never stored, or evicted
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, fingerprint, slide):
+        """
+        Store a rendered slide. Must be called before the slide is handed to
+        a StreamingPresentationWriter, which releases its XML.
+
+        Slides with relationships other than their layout and images are not
+        stored.
+        """
+        rels = []
+        for rId, rel in slide.part.rels.items():
+            if rel.is_external:
+                return
+            if rel.reltype == RT.SLIDE_LAYOUT:
+                rels.append({'rId': rId, 'type': 'layout'})
+            elif rel.reltype == RT.IMAGE:
+                image_part = rel.target_part
+                name = image_part.sha1 + '.' + image_part.partname.ext
+                media_path = os.path.join(self._media_dir, name)
+                if not os.path.exists(media_path):
+                    self._write(media_path, image_part.blob)
+                rels.append({'rId': rId, 'type': 'image', 'media': name})
+            else:
+                return
+        entry = {'xml': slide.part.blob.decode('utf-8'), 'rels': rels}
+        self._write(self._entry_path(fingerprint), json.dumps(entry).encode('utf-8'))
+
+    def add_slide(self, prs, entry, image_store):
+        """
+        Append a slide rebuilt from an entry returned by get to prs and
+        return it.
+
+        image_store is the ImageStore of the conversion, so an image shared
+        with other slides becomes a single part; pass it as get's have.
+        """
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide_part = slide.part
+        layout_rId = next(rId for rId, rel in slide_part.rels.items()
+                          if rel.reltype == RT.SLIDE_LAYOUT)
+        rId_map = {}
+        for rel in entry['rels']:
+            if rel['type'] == 'layout':
+                rId_map[rel['rId']] = layout_rId
+            else:
+                key = os.path.splitext(rel['media'])[0]
+                if key not in image_store:
+                    image_store.add_blobs({key: entry['media'][key]})
+                image_part = image_store.image_part(slide_part.package, key)
+                rId_map[rel['rId']] = slide_part.relate_to(image_part, RT.IMAGE)
+
+        xml = _RID_ATTRIBUTE.sub(
+            lambda match: f'{match.group(1)}{rId_map.get(match.group(2), match.group(2))}"',
+            entry['xml'])
+        stored = parse_xml(xml.encode('utf-8'))
+        # Swap the content into the existing element so the Slide object stays valid
+        element = slide_part._element
+        element[:] = list(stored)
+        for name, value in stored.attrib.items():
+            element.set(name, value)
+        return slide
+
+    def _entries(self):
+        entries = []
+        for directory in (self._pages_dir, self._media_dir):
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Remove the least recently used files until the cache is under max_bytes."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(os.listdir(self._pages_dir)),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+            }
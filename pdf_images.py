@@ -0,0 +1,157 @@
+"""
+Embedded image extraction.
+
+Images are pulled out of the PDF with PyMuPDF and placed as picture shapes
+at their positions on the page. Each image XObject is decoded once per
+extraction run (keyed by xref) and identified by the SHA-1 of its final
+bytes, so an image used on many pages, or stored under several xrefs, ends
+up as a single part in the PPTX media folder.
+"""
+import hashlib
+import io
+
+import fitz  # PyMuPDF
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.parts.image import Image as PptxImage, ImagePart
+
+# Image formats python-pptx can embed as they are
+NATIVE_FORMATS = {'png', 'jpeg', 'jpg', 'gif', 'bmp', 'tiff'}
+
+
+def _pixmap_png(pdf_document, xref, smask):
+    """
+    Decode an image XObject (with its soft mask, if any) to PNG bytes.
+
+    A soft mask that cannot be applied, e.g. because its size differs from
+    the image's, is ignored and the image is returned unmasked.
+    """
+    pixmap = fitz.Pixmap(pdf_document, xref)
+    if pixmap.colorspace and pixmap.colorspace.n > 3:
+        pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+    if smask:
+        try:
+            pixmap = fitz.Pixmap(pixmap, fitz.Pixmap(pdf_document, smask))
+        except Exception:  # MuPDF raises its own error types, not RuntimeError
+            pass
+    return pixmap.tobytes('png')
+
+
+def _downsample(blob, ext, pixel_width, pixel_height, display_width_pt, image_dpi):
+    """Shrink an image whose resolution at display_width_pt exceeds image_dpi."""
+    target_width = int(display_width_pt / 72 * image_dpi)
+    if target_width <= 0 or pixel_width <= target_width:
+        return blob, ext
+
+    from PIL import Image
+    target_height = max(1, round(pixel_height * target_width / pixel_width))
+    with Image.open(io.BytesIO(blob)) as image:
+        resized = image.resize((target_width, target_height), Image.LANCZOS)
+        out = io.BytesIO()
+        if ext in ('jpeg', 'jpg') and resized.mode in ('RGB', 'L', 'CMYK'):
+            resized.save(out, format='JPEG', quality=85)
+            return out.getvalue(), 'jpeg'
+        resized.save(out, format='PNG', optimize=True)
+        return out.getvalue(), 'png'
+
+
+def extract_page_images(page, scale_x, scale_y, image_dpi=None, cache=None):
+    """
+    Find the images drawn on a page.
+
+    Args:
+        page: PyMuPDF page
+        scale_x, scale_y (float): PDF point to slide EMU factors
+        image_dpi (int, optional): Downsample images above this resolution. An
+                                   image is decoded once, on the first page that
+                                   uses it, so the resolution is measured at its
+                                   widest placement on that page
+        cache (dict, optional): Per-document state shared between pages so every
+                                xref is decoded once and every blob returned once
+
+    Returns:
+        tuple: (placements, blobs) where placements is a list of
+               ((left, top, width, height), key) in drawing order and blobs maps
+               keys that have not been returned before to image bytes
+    """
+    if cache is None:
+        cache = {}
+    keys_by_xref = cache.setdefault('xrefs', {})
+    sent = cache.setdefault('sent', set())
+    pdf_document = page.parent
+
+    placements = []
+    blobs = {}
+    for info in page.get_images(full=True):
+        xref, smask = info[0], info[1]
+        rects = [rect for rect in page.get_image_rects(xref) if not rect.is_empty]
+        if not rects:
+            continue
+
+        key = keys_by_xref.get(xref)
+        if key is None:
+            extracted = pdf_document.extract_image(xref)
+            if not extracted:
+                continue
+            blob, ext = extracted['image'], extracted['ext']
+            if smask or ext not in NATIVE_FORMATS:
+                blob, ext = _pixmap_png(pdf_document, xref, smask), 'png'
+            if image_dpi:
+                widest = max(rect.width for rect in rects)
+                blob, ext = _downsample(blob, ext, extracted['width'], extracted['height'],
+                                        widest, image_dpi)
+            key = hashlib.sha1(blob).hexdigest()
+            keys_by_xref[xref] = key
+            if key not in sent:
+                sent.add(key)
+                blobs[key] = blob
+
+        for rect in rects:
+            placements.append(((rect.x0 * scale_x, rect.y0 * scale_y,
+                                rect.width * scale_x, rect.height * scale_y), key))
+    return placements, blobs
+
+
+class ImageStore:
+    """
+    Image blobs received from extraction and the package parts made from them.
+
+    Adding a picture with a known key reuses its image part directly instead
+    of having python-pptx search the package for a matching SHA-1, and new
+    parts are numbered from a counter instead of a scan of every part in the
+    package. Both searches grow with the presentation, so every image of a
+    presentation should go through one store.
+    """
+
+    def __init__(self):
+        self._blobs = {}
+        self._parts = {}
+        self._next_index = None
+
+    def __contains__(self, key):
+        return key in self._parts or key in self._blobs
+
+    def add_blobs(self, blobs):
+        for key, blob in blobs.items():
+            if key not in self._parts:
+                self._blobs[key] = blob
+
+    def image_part(self, package, key, blob=None):
+        """Return the image part for key, made from blob or a blob given to add_blobs."""
+        image_part = self._parts.get(key)
+        if image_part is None:
+            image = PptxImage.from_blob(self._blobs.pop(key) if blob is None else blob)
+            if self._next_index is None:
+                self._next_index = package.next_image_partname(image.ext).idx
+            partname = PackURI(f'/ppt/media/image{self._next_index}.{image.ext}')
+            self._next_index += 1
+            image_part = ImagePart(partname, image.content_type, package, image.blob,
+                                   image.filename)
+            self._parts[key] = image_part
+        return image_part
+
+    def add_picture(self, slide, key, left, top, width, height, blob=None):
+        image_part = self.image_part(slide.part.package, key, blob)
+        rId = slide.part.relate_to(image_part, RT.IMAGE)
+        return slide.shapes._add_pic_from_image_part(image_part, rId, int(left), int(top),
+                                                     int(width), int(height))
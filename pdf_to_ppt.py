@@ -1,34 +1,53 @@
 import os
+import hashlib
 import fitz  # PyMuPDF
+import numpy as np
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.shapes import MSO_SHAPE, MSO_SHAPE_TYPE
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
+from pptx.oxml.ns import qn
+from copy import deepcopy
+import io
 import re
 import argparse
+import glob
 import sys
+import tempfile
+import time
 from math import ceil
+from concurrent.futures import ProcessPoolExecutor
+from pptx_stream import StreamingPresentationWriter
+from coalesce import coalesce_drawings, DEFAULT_RASTER_DENSITY
+from pdf_images import extract_page_images, ImageStore
+from text_model import PageText
+# Re-exported: these helpers used to live in this module
+from text_model import is_bullet_character, clean_bullet_text
+from tables import detect_tables, add_table, scaled_font_size
+from compact import compact_pptx, DEFAULT_COMPRESSION_LEVEL
+from page_cache import PageCache, page_fingerprint, fingerprint_salt
+
+# Bump whenever a change alters the generated presentations; it is part of
+# the conversion cache key.
+CONVERTER_VERSION = '1.4.1'
+
+# Resolution used when part of a page is rendered to an image
+RASTER_DPI = 150
+
+# Conversion modes: editable shapes, one image per page, or images only for
+# pages whose drawing or text span count is above the hybrid thresholds
+MODES = ("vector", "raster", "hybrid")
+DEFAULT_MAX_DRAWINGS = 5000
+DEFAULT_MAX_SPANS = 3000
+# Text-showing operators (Tj, TJ) in a content stream; each shows about one span
+_TEXT_OPERATOR = re.compile(rb"(?<![\w*])T[jJ](?![\w*])")
 
 def hex_to_rgb(hex_color):
     """Convert hex color to RGB."""
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
-def is_bullet_character(text):
-    """Check if the text starts with a bullet point character."""
-    bullet_chars = ['•', '·', '○', '●', '▪', '▫', '◦', '-', '*']
-    return any(text.strip().startswith(char) for char in bullet_chars)
-
-def clean_bullet_text(text):
-    """Remove bullet character from the beginning of text."""
-    bullet_chars = ['•', '·', '○', '●', '▪', '▫', '◦', '-', '*']
-    text = text.strip()
-    for char in bullet_chars:
-        if text.startswith(char):
-            return text[len(char):].strip()
-    return text
-
 def detect_shape_type(shape):
     """Detect the type of shape based on its properties."""
     rect = shape["rect"]
@@ -53,202 +72,762 @@ def detect_shape_type(shape):
     
     return "rectangle"
 
+SHAPE_CLASSES = ("card", "progress_bar", "status_dot", "rectangle")
+
+def drawing_rects(drawings):
+    """Load the bounding rects of page.get_drawings() output into an (N, 4) array."""
+    if not drawings:
+        return np.empty((0, 4))
+    return np.array([tuple(drawing["rect"]) for drawing in drawings], dtype=float)
+
+def classify_rects(rects):
+    """
+    Classify an (N, 4) array of x0, y0, x1, y1 rects in one pass.
+
+    Applies the same rules, in the same order, as detect_shape_type and returns
+    a dict mapping each name in SHAPE_CLASSES to an array of row indices.
+    """
+    width = rects[:, 2] - rects[:, 0]
+    height = rects[:, 3] - rects[:, 1]
+    
+    # Zero-sized rects fall through to "rectangle"
+    unclassified = (width != 0) & (height != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = width / height
+    
+    status_dot = unclassified & (ratio >= 0.9) & (ratio <= 1.1) & (width < 20)
+    unclassified &= ~status_dot
+    progress_bar = unclassified & (width > height * 3)
+    unclassified &= ~progress_bar
+    card = unclassified & (width > 100) & (height > 100)
+    rectangle = ~(status_dot | progress_bar | card)
+    
+    return {
+        "card": np.flatnonzero(card),
+        "progress_bar": np.flatnonzero(progress_bar),
+        "status_dot": np.flatnonzero(status_dot),
+        "rectangle": np.flatnonzero(rectangle),
+    }
+
+def scale_rects(rects, scale_x, scale_y):
+    """Convert x0, y0, x1, y1 PDF rects to left, top, width, height slide boxes."""
+    boxes = np.empty_like(rects)
+    boxes[:, 0] = rects[:, 0] * scale_x
+    boxes[:, 1] = rects[:, 1] * scale_y
+    boxes[:, 2] = (rects[:, 2] - rects[:, 0]) * scale_x
+    boxes[:, 3] = (rects[:, 3] - rects[:, 1]) * scale_y
+    return boxes
+
+def _build_text_prototype(slide, size, bold=False, color=None):
+    text_box = slide.shapes.add_textbox(0, 0, 0, 0)
+    run = text_box.text_frame.paragraphs[0].add_run()
+    run.text = ""
+    if bold:
+        run.font.bold = True
+    run.font.size = Pt(size)
+    if color is not None:
+        run.font.color.rgb = color
+    return text_box._element
+
+def _build_line_prototype(slide, bold=False, bullet=False):
+    """A text box for one line of page text, without insets so it sits on the line's bbox."""
+    text_box = slide.shapes.add_textbox(0, 0, 0, 0)
+    text_frame = text_box.text_frame
+    text_frame.word_wrap = False
+    text_frame.margin_left = text_frame.margin_right = 0
+    text_frame.margin_top = text_frame.margin_bottom = 0
+    paragraph = text_frame.paragraphs[0]
+    run = paragraph.add_run()
+    run.text = ""
+    run.font.size = Pt(12)
+    if bold:
+        run.font.bold = True
+    if bullet:
+        # Hanging bullet: the character sits at the left edge, the text after it
+        p_pr = paragraph._p.get_or_add_pPr()
+        p_pr.set("marL", str(Pt(12)))
+        p_pr.set("indent", str(-Pt(12)))
+        p_pr.append(p_pr.makeelement(qn("a:buChar"), {"char": "•"}))
+    return text_box._element
+
+def _build_fill_prototype(slide, autoshape_type, fill_color, line_color=None):
+    shape = slide.shapes.add_shape(autoshape_type, 0, 0, 0, 0)
+    shape.fill.solid()
+    shape.fill.fore_color.rgb = fill_color
+    if line_color is None:
+        shape.line.fill.background()
+    else:
+        shape.line.color.rgb = line_color
+    return shape._element
+
+_base_presentation = None
+
+def new_presentation():
+    """
+    Return an empty 16:9 presentation.
+
+    The default template is parsed and sized once per process; every call
+    returns a deep copy of that base, which is cheaper than parsing the
+    template package again.
+    """
+    global _base_presentation
+    if _base_presentation is None:
+        base = Presentation()
+        base.slide_width = Inches(16)
+        base.slide_height = Inches(9)
+        _base_presentation = base
+    return deepcopy(_base_presentation)
+
+_shape_prototypes = None
+
+def shape_prototypes():
+    """
+    Return the XML prototype of every widget element, building them once.
+
+    Each prototype is made through the regular python-pptx API on a scratch
+    slide; widgets are then emitted by deep-copying a prototype and patching
+    its id, position, text and color.
+    """
+    global _shape_prototypes
+    if _shape_prototypes is None:
+        scratch = Presentation()
+        slide = scratch.slides.add_slide(scratch.slide_layouts[6])
+        _shape_prototypes = {
+            "card": _build_fill_prototype(slide, MSO_SHAPE.ROUNDED_RECTANGLE,
+                                          RGBColor(255, 255, 255), RGBColor(230, 230, 230)),
+            "card_title": _build_text_prototype(slide, 16, bold=True),
+            "status_dot": _build_fill_prototype(slide, MSO_SHAPE.OVAL, RGBColor(0, 0, 0)),
+            "card_status": _build_text_prototype(slide, 12),
+            "card_date": _build_text_prototype(slide, 10, color=RGBColor(128, 128, 128)),
+            "bar_background": _build_fill_prototype(slide, MSO_SHAPE.RECTANGLE,
+                                                    RGBColor(230, 230, 230)),
+            "bar_progress": _build_fill_prototype(slide, MSO_SHAPE.RECTANGLE,
+                                                  RGBColor(0, 120, 212)),
+            "bar_label": _build_text_prototype(slide, 10),
+            "heading": _build_line_prototype(slide, bold=True),
+            "bullet": _build_line_prototype(slide, bullet=True),
+            "body": _build_line_prototype(slide),
+        }
+    return _shape_prototypes
+
+def _escape_ctrl_chars(text):
+    """Escape control characters the same way python-pptx does for run text."""
+    return re.sub(r"([\x00-\x08\x0B-\x1F])", lambda match: "_x%04X_" % ord(match.group(1)), text)
+
+class _ShapeCloner:
+    """Emit prototype clones onto one slide, handing out consecutive shape ids."""
+    
+    def __init__(self, slide):
+        self._spTree = slide.shapes._spTree
+        self._next_id = self._spTree.max_shape_id + 1
+    
+    def add(self, prototype_name, left, top, width, height, text=None, fill_color=None,
+            font_size=None):
+        element = deepcopy(shape_prototypes()[prototype_name])
+        shape_id = self._next_id
+        self._next_id += 1
+        
+        c_nv_pr = element[0][0]  # p:nvSpPr/p:cNvPr
+        basename = c_nv_pr.get("name").rsplit(" ", 1)[0]
+        c_nv_pr.set("id", str(shape_id))
+        c_nv_pr.set("name", f"{basename} {shape_id - 1}")
+        
+        sp_pr = element.find(qn("p:spPr"))
+        offset, extent = sp_pr.find(qn("a:xfrm"))
+        offset.set("x", str(int(left)))
+        offset.set("y", str(int(top)))
+        extent.set("cx", str(int(width)))
+        extent.set("cy", str(int(height)))
+        
+        if text is not None:
+            element.find(".//" + qn("a:t")).text = _escape_ctrl_chars(text)
+        if font_size is not None:
+            element.find(".//" + qn("a:rPr")).set("sz", str(round(font_size * 100)))
+        if fill_color is not None:
+            sp_pr.find(qn("a:solidFill"))[0].set("val", str(fill_color))
+        
+        self._spTree.insert_element_before(element, "p:extLst")
+        return element
+
 def create_status_card(slide, left, top, width, height, title, status_text, date_text=None, status_color=None):
     """Create a status card with title, status text, and optional date."""
+    shapes = _ShapeCloner(slide)
+    
     # Add card shape
-    card = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, left, top, width, height)
-    card.fill.solid()
-    card.fill.fore_color.rgb = RGBColor(255, 255, 255)
-    card.line.color.rgb = RGBColor(230, 230, 230)
+    shapes.add("card", left, top, width, height)
     
     # Add title
-    title_box = slide.shapes.add_textbox(left + Inches(0.2), top + Inches(0.2), width - Inches(0.4), Inches(0.5))
-    title_frame = title_box.text_frame
-    title_para = title_frame.paragraphs[0]
-    title_run = title_para.add_run()
-    title_run.text = title
-    title_run.font.bold = True
-    title_run.font.size = Pt(16)
+    shapes.add("card_title", left + Inches(0.2), top + Inches(0.2),
+               width - Inches(0.4), Inches(0.5), text=title)
     
     # Add status indicator if color provided
     if status_color:
         dot_size = Inches(0.15)
-        dot = slide.shapes.add_shape(MSO_SHAPE.OVAL, 
-                                   left + width - Inches(0.4),
-                                   top + Inches(0.3),
-                                   dot_size, dot_size)
-        dot.fill.solid()
-        dot.fill.fore_color.rgb = status_color
-        dot.line.fill.background()
+        shapes.add("status_dot", left + width - Inches(0.4), top + Inches(0.3),
+                   dot_size, dot_size, fill_color=status_color)
     
     # Add status text
-    status_box = slide.shapes.add_textbox(left + Inches(0.2), 
-                                        top + Inches(0.8), 
-                                        width - Inches(0.4), 
-                                        Inches(0.5))
-    status_frame = status_box.text_frame
-    status_para = status_frame.paragraphs[0]
-    status_run = status_para.add_run()
-    status_run.text = status_text
-    status_run.font.size = Pt(12)
+    shapes.add("card_status", left + Inches(0.2), top + Inches(0.8),
+               width - Inches(0.4), Inches(0.5), text=status_text)
     
     # Add date if provided
     if date_text:
-        date_box = slide.shapes.add_textbox(left + Inches(0.2), 
-                                          top + Inches(1.3), 
-                                          width - Inches(0.4), 
-                                          Inches(0.3))
-        date_frame = date_box.text_frame
-        date_para = date_frame.paragraphs[0]
-        date_run = date_para.add_run()
-        date_run.text = date_text
-        date_run.font.size = Pt(10)
-        date_run.font.color.rgb = RGBColor(128, 128, 128)
+        shapes.add("card_date", left + Inches(0.2), top + Inches(1.3),
+                   width - Inches(0.4), Inches(0.3), text=date_text)
 
 def create_progress_bar(slide, left, top, width, height, progress, label):
     """Create a progress bar with label and percentage."""
+    shapes = _ShapeCloner(slide)
+    
     # Background bar
-    bg_bar = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
-    bg_bar.fill.solid()
-    bg_bar.fill.fore_color.rgb = RGBColor(230, 230, 230)
-    bg_bar.line.fill.background()
+    shapes.add("bar_background", left, top, width, height)
     
     # Progress bar
     progress_width = width * (progress / 100)
     if progress_width > 0:
-        progress_bar = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, 
-                                            left, top, 
-                                            progress_width, height)
-        progress_bar.fill.solid()
-        progress_bar.fill.fore_color.rgb = RGBColor(0, 120, 212)
-        progress_bar.line.fill.background()
+        shapes.add("bar_progress", left, top, progress_width, height)
     
     # Label
-    label_box = slide.shapes.add_textbox(left - Inches(1.2), 
-                                       top - Inches(0.1), 
-                                       Inches(1), 
-                                       Inches(0.3))
-    label_frame = label_box.text_frame
-    label_para = label_frame.paragraphs[0]
-    label_run = label_para.add_run()
-    label_run.text = label
-    label_run.font.size = Pt(10)
-
-def convert_pdf_to_ppt(pdf_path, output_path=None):
+    shapes.add("bar_label", left - Inches(1.2), top - Inches(0.1),
+               Inches(1), Inches(0.3), text=label)
+
+def needs_raster(page, max_drawings, max_spans):
+    """
+    Cheap check whether hybrid mode should render a page as an image.
+
+    Paths are counted with get_cdrawings, which skips building the Python
+    objects get_drawings makes, and spans are estimated from the text-showing
+    operators in the page's content stream. A pathological page is thus
+    recognised before the full extraction has run on it.
+    """
+    if len(page.get_cdrawings()) > max_drawings:
+        return True
+    return len(_TEXT_OPERATOR.findall(page.read_contents())) > max_spans
+
+def rasterize_page(page, slide_width, slide_height, dpi=RASTER_DPI, timings=None):
+    """
+    Render a whole page as one image, fitted and centered on the slide.
+
+    Returns page data in the same shape as extract_page, with the page image as
+    its only raster and "rasterized" set.
+    """
+    timings = dict(timings or {})
+    started = time.perf_counter()
+    png = page.get_pixmap(dpi=dpi).tobytes("png")
+    timings["rasterize"] = time.perf_counter() - started
+    
+    scale = min(slide_width / page.rect.width, slide_height / page.rect.height)
+    width = page.rect.width * scale
+    height = page.rect.height * scale
+    placement = ((slide_width - width) / 2, (slide_height - height) / 2, width, height)
+    empty = np.zeros((0, 4))
+    return {
+        "page_num": page.number,
+        "rasterized": True,
+        "cards": empty,
+        "progress_bars": empty,
+        "status_dots": empty,
+        "title_text": None,
+        "text_lines": [],
+        "tables": [],
+        "rasters": [(placement, png)],
+        "images": [],
+        "image_blobs": {},
+        "shapes_removed": 0,
+        "timings": timings,
+    }
+
+def extract_page(page, slide_width, slide_height, coalesce=False,
+                 raster_density=DEFAULT_RASTER_DENSITY, images=True, image_dpi=None,
+                 image_cache=None, mode="vector", raster_dpi=RASTER_DPI,
+                 max_drawings=DEFAULT_MAX_DRAWINGS, max_spans=DEFAULT_MAX_SPANS, tables=True):
+    """
+    Extract and classify the content of a single PDF page.
+
+    Returns a plain dict so the result can be produced in a worker process
+    and shipped back to the process that builds the presentation.
+
+    With tables=True, ruled tables are detected first and returned as table
+    data; the drawings and text spans they consist of are left out of
+    everything that follows.
+
+    With coalesce=True, touching paths of the same style are merged before
+    classification and clusters of at least raster_density paths are
+    rendered as a single image at raster_dpi instead.
+
+    With images=True, embedded images are collected as well (optionally
+    downsampled to image_dpi). image_cache is shared between the pages of one
+    document so each image is decoded and returned only once.
+
+    mode="raster" renders the page with rasterize_page instead. mode="hybrid"
+    does that only for pages with more than max_drawings paths or more than
+    max_spans text spans, which would be slow to convert and to open as shapes;
+    needs_raster decides this before the expensive extraction.
+    """
+    if mode == "raster":
+        return rasterize_page(page, slide_width, slide_height, raster_dpi)
+    
+    # Get page dimensions and calculate scale
+    pdf_width = page.rect.width
+    pdf_height = page.rect.height
+    scale_x = slide_width / pdf_width
+    scale_y = slide_height / pdf_height
+    
+    # Process shapes first to establish layout structure
+    timings = {}
+    if mode == "hybrid":
+        started = time.perf_counter()
+        rasterize = needs_raster(page, max_drawings, max_spans)
+        timings["precheck"] = time.perf_counter() - started
+        if rasterize:
+            return rasterize_page(page, slide_width, slide_height, raster_dpi, timings)
+    
+    started = time.perf_counter()
+    drawings = page.get_drawings()
+    timings["get_drawings"] = time.perf_counter() - started
+    
+    # Extract text into the compact span model
+    started = time.perf_counter()
+    page_text = PageText.from_page(page)
+    timings["get_text"] = time.perf_counter() - started
+    # Text in form XObjects is not seen by the estimate in needs_raster
+    if mode == "hybrid" and len(page_text) > max_spans:
+        return rasterize_page(page, slide_width, slide_height, raster_dpi, timings)
+    
+    detected_tables = []
+    if tables:
+        started = time.perf_counter()
+        detected_tables, drawings, page_text = detect_tables(drawings, page_text,
+                                                             scale_x, scale_y)
+        timings["find_tables"] = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    rasters = []
+    shapes_removed = 0
+    if coalesce:
+        drawings, raster_regions, shapes_removed = coalesce_drawings(
+            drawings, raster_density=raster_density)
+        for region in raster_regions:
+            pixmap = page.get_pixmap(clip=region, dpi=raster_dpi)
+            rasters.append(((region.x0 * scale_x, region.y0 * scale_y,
+                             region.width * scale_x, region.height * scale_y),
+                            pixmap.tobytes("png")))
+    
+    rects = drawing_rects(drawings)
+    shape_classes = classify_rects(rects)
+    boxes = scale_rects(rects, scale_x, scale_y)
+    classify_time = time.perf_counter() - started
+    
+    image_placements, image_blobs = [], {}
+    if images:
+        started = time.perf_counter()
+        image_placements, image_blobs = extract_page_images(page, scale_x, scale_y,
+                                                            image_dpi, image_cache)
+        timings["get_images"] = time.perf_counter() - started
+    
+    # Process title first
+    started = time.perf_counter()
+    title_text = page_text.find_title()
+    # Remaining text as one box per line; font sizes are scaled like the page
+    # height, as in tables
+    text_lines = [(kind, (x0 * scale_x, y0 * scale_y, (x1 - x0) * scale_x, (y1 - y0) * scale_y),
+                   text, scaled_font_size(size, scale_y))
+                  for kind, (x0, y0, x1, y1), text, size
+                  in page_text.classify_lines(skip_block=page_text.title_block())]
+    timings["classify"] = classify_time + time.perf_counter() - started
+    
+    return {
+        "page_num": page.number,
+        "rasterized": False,
+        "cards": boxes[shape_classes["card"]],
+        "progress_bars": boxes[shape_classes["progress_bar"]],
+        "status_dots": boxes[shape_classes["status_dot"]],
+        "title_text": title_text,
+        "text_lines": text_lines,
+        "tables": detected_tables,
+        "rasters": rasters,
+        "images": image_placements,
+        "image_blobs": image_blobs,
+        "shapes_removed": shapes_removed,
+        "timings": timings,
+    }
+
+def open_pdf(source):
+    """
+    Open a PDF given as a path, as bytes, or as a readable binary file object.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    if hasattr(source, "read"):
+        source = source.read()
+    return fitz.open(stream=source, filetype="pdf")
+
+def _output_size(output):
+    """Size of a written presentation, for a path or a seekable stream."""
+    if isinstance(output, (str, os.PathLike)):
+        return os.path.getsize(output)
+    try:
+        return output.tell()
+    except (AttributeError, OSError):
+        return None
+
+def parse_page_ranges(spec, page_count=None):
+    """
+    Parse a page selection like "1-5,12" or "3-" into sorted 0-based page numbers.
+
+    Page numbers in spec are 1-based. An open-ended range ("3-") runs to the
+    last page and needs page_count; without it only the syntax is checked and
+    an open range yields just its first page. Raises ValueError on malformed
+    specs and on pages beyond page_count.
+    """
+    if isinstance(spec, str):
+        parts = [part.strip() for part in spec.split(",") if part.strip()]
+    else:
+        parts = [str(page) for page in spec]
+    if not parts:
+        raise ValueError("Empty page selection")
+    
+    pages = set()
+    for part in parts:
+        match = re.fullmatch(r"(\d+)(?:\s*(-)\s*(\d*))?", part)
+        if not match:
+            raise ValueError(f"Invalid page range: '{part}'")
+        first = int(match.group(1))
+        if match.group(2) is None:
+            last = first
+        elif match.group(3):
+            last = int(match.group(3))
+        elif page_count is not None:
+            last = page_count
+        else:
+            last = first
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid page range: '{part}'")
+        if page_count is not None and last > page_count:
+            raise ValueError(f"Page range '{part}' is outside the document ({page_count} pages)")
+        pages.update(range(first - 1, last))
+    return sorted(pages)
+
+def extract_pages(pdf_source, page_numbers, slide_width, slide_height, extract_options):
+    """Extract the given 0-based pages of a PDF. Runs inside pool workers."""
+    pdf_document = open_pdf(pdf_source)
+    image_cache = {}
+    try:
+        return [extract_page(pdf_document[page_num], slide_width, slide_height,
+                             image_cache=image_cache, **extract_options)
+                for page_num in page_numbers]
+    finally:
+        pdf_document.close()
+
+def render_page(prs, page_data, image_store=None):
+    """Add a slide for one page of extracted data."""
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    if image_store is None:
+        image_store = ImageStore()
+    
+    # Rasterized regions go first so they sit behind everything else
+    for (left, top, width, height), png in page_data["rasters"]:
+        image_store.add_picture(slide, hashlib.sha1(png).hexdigest(), left, top,
+                                width, height, blob=png)
+    
+    # Embedded images at their positions on the page
+    if page_data["images"]:
+        image_store.add_blobs(page_data["image_blobs"])
+        for (left, top, width, height), key in page_data["images"]:
+            image_store.add_picture(slide, key, left, top, width, height)
+    
+    if page_data["rasterized"]:
+        return slide
+    
+    title_text = page_data["title_text"]
+    if title_text is not None:
+        title_box = slide.shapes.add_textbox(Inches(1), Inches(0.5), 
+                                           prs.slide_width - Inches(2), Inches(1))
+        title_frame = title_box.text_frame
+        title_para = title_frame.paragraphs[0]
+        title_para.alignment = PP_ALIGN.CENTER
+        title_run = title_para.add_run()
+        title_run.text = title_text
+        title_run.font.size = Pt(24)
+        title_run.font.bold = True
+    
+    # Headings, bullets and body text at their positions on the page
+    shapes = _ShapeCloner(slide)
+    for kind, (left, top, width, height), text, size in page_data["text_lines"]:
+        shapes.add(kind, left, top, width, height, text=text, font_size=size)
+    
+    # Detected tables, one native table each
+    for table in page_data["tables"]:
+        add_table(slide, table)
+    
+    # Create status cards
+    card_width = Inches(4)
+    card_height = Inches(2)
+    card_margin = Inches(0.5)
+    cards_top = Inches(2)
+    
+    # Example status cards (you'll need to extract actual data from PDF)
+    status_data = [
+        ("Germany", "Reviewing PBG portfolio", "March 28, 2023", RGBColor(255, 193, 7)),
+        ("Spain", "Business data received", None, RGBColor(76, 175, 80)),
+        ("Belgium", "Work commencing March 31st", None, RGBColor(76, 175, 80)),
+        ("India", "Awaiting data", None, RGBColor(244, 67, 54))
+    ]
+    
+    for i, (title, status, date, color) in enumerate(status_data):
+        left = Inches(1) + (card_width + card_margin) * i
+        create_status_card(slide, left, cards_top, card_width, card_height,
+                         title, status, date, color)
+    
+    # Create progress bars section
+    progress_top = cards_top + card_height + Inches(1)
+    progress_data = [
+        ("Germany", 35),
+        ("Spain", 75),
+        ("Belgium", 80),
+        ("India", 20)
+    ]
+    
+    for i, (label, progress) in enumerate(progress_data):
+        bar_left = Inches(3)
+        bar_top = progress_top + Inches(0.5) * i
+        create_progress_bar(slide, bar_left, bar_top,
+                          Inches(6), Inches(0.3),
+                          progress, label)
+    
+    return slide
+
+def iter_extracted_pages(pdf_source, pdf_document, slide_width, slide_height, workers=1,
+                         extract_options=None, page_numbers=None):
+    """
+    Yield extracted page data in page order.
+
+    Only the pages in page_numbers (0-based, default all) are loaded. With
+    workers > 1 the pages are split into contiguous chunks and extracted in a
+    process pool; each worker reopens the document itself.
+    """
+    extract_options = extract_options or {}
+    if page_numbers is None:
+        page_numbers = range(len(pdf_document))
+    page_numbers = list(page_numbers)
+    if workers <= 1 or len(page_numbers) < 2:
+        image_cache = {}
+        for page_num in page_numbers:
+            yield extract_page(pdf_document[page_num], slide_width, slide_height,
+                               image_cache=image_cache, **extract_options)
+        return
+    
+    # Several chunks per worker keeps the pool busy when page costs vary
+    chunk_size = max(1, ceil(len(page_numbers) / (workers * 4)))
+    chunks = [page_numbers[start:start + chunk_size]
+              for start in range(0, len(page_numbers), chunk_size)]
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(extract_pages, pdf_source, chunk,
+                                   slide_width, slide_height, extract_options)
+                   for chunk in chunks]
+        for future in futures:
+            yield from future.result()
+
+def notify_observers(observers, stage, seconds, page=None, **details):
+    """Send a stage event to every observer."""
+    if not observers:
+        return
+    event = {"stage": stage, "seconds": seconds, "page": page}
+    event.update(details)
+    for observer in observers:
+        observer(event)
+
+def convert_pdf_to_ppt(pdf_path, output_path=None, workers=1, streaming=False,
+                       coalesce=False, raster_density=DEFAULT_RASTER_DENSITY,
+                       observers=None, pages=None, images=True, image_dpi=None,
+                       mode="vector", raster_dpi=RASTER_DPI, max_drawings=DEFAULT_MAX_DRAWINGS,
+                       max_spans=DEFAULT_MAX_SPANS, compact=False,
+                       compression_level=DEFAULT_COMPRESSION_LEVEL, page_cache=None,
+                       tables=True):
     """
     Convert a PDF file to a PowerPoint presentation with editable elements.
     
     Args:
-        pdf_path (str): Path to the input PDF file
-        output_path (str, optional): Path for the output PowerPoint file. 
+        pdf_path (str, bytes or file object): Path to the input PDF file, or the
+                                             PDF itself as bytes or a readable
+                                             binary stream
+        output_path (str or file object, optional): Path for the output PowerPoint file,
+                                   or a writable binary stream.
                                    If not provided, will use the same name as PDF with .pptx extension
+        workers (int, optional): Number of processes used for page extraction.
+                                 Slides are always assembled in page order, so the
+                                 output is identical to a serial conversion.
+        streaming (bool, optional): Write each slide into the output file as soon as
+                                    its page is done instead of holding the whole
+                                    presentation in memory until the end.
+        coalesce (bool, optional): Merge touching paths of the same style before
+                                   classification, and render dense clusters of
+                                   paths as a single image.
+        raster_density (int, optional): Number of touching paths from which a
+                                        cluster is rasterized when coalescing.
+        observers (list, optional): Callables receiving a dict per timed stage:
+                                    {"stage", "seconds", "page"}. Stages are "open",
+                                    "fingerprint" (with page_cache), "get_drawings",
+                                    "get_text", "find_tables", "classify",
+                                    "get_images", "rasterize",
+                                    "emit" and "reuse" (per page), "save" and "compact"
+                                    (which also carries "bytes_before" and
+                                    "bytes_after"). A final "convert" event
+                                    also carries "pages", "bytes_in" and "bytes_out".
+        pages (str or list, optional): 1-based pages to convert, either as a spec such
+                                       as "1-5,12" or as a list of page numbers.
+                                       Other pages are never loaded. Defaults to all.
+        images (bool, optional): Place embedded images as pictures. Identical images
+                                 are stored once in the presentation.
+        image_dpi (int, optional): Downsample embedded images whose resolution at
+                                   their placed size is above this value.
+        mode (str, optional): "vector" (default) converts pages to editable shapes,
+                              "raster" renders every page as an image and "hybrid"
+                              renders only pages above max_drawings or max_spans.
+        raster_dpi (int, optional): Resolution of rendered pages, and of the
+                                    dense regions rendered with coalesce.
+        max_drawings (int, optional): Drawing count above which hybrid mode renders
+                                      a page as an image.
+        max_spans (int, optional): Text span count above which hybrid mode renders
+                                   a page as an image.
+        compact (bool, optional): Rewrite the saved file without unused layouts,
+                                  masters and duplicate media, at compression_level.
+        compression_level (int, optional): Zip deflate level (0-9) used when compacting.
+        page_cache (str or PageCache, optional): Directory (or PageCache) of slides
+                                                 from earlier conversions. Pages whose
+                                                 content and options are unchanged
+                                                 reuse their stored slide and are not
+                                                 extracted again.
+        tables (bool, optional): Emit ruled tables as native PowerPoint tables instead
+                                 of separate shapes and text.
     """
     try:
+        in_memory = not isinstance(pdf_path, (str, os.PathLike))
         if output_path is None:
+            if in_memory:
+                raise ValueError("output_path is required when the PDF is not given as a path")
             output_path = os.path.splitext(pdf_path)[0] + '.pptx'
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}")
+        if in_memory and hasattr(pdf_path, "read"):
+            pdf_path = pdf_path.read()
         
         # Create presentation with 16:9 aspect ratio
-        prs = Presentation()
-        prs.slide_width = Inches(16)
-        prs.slide_height = Inches(9)
+        prs = new_presentation()
         
-        pdf_document = fitz.open(pdf_path)
-        print(f"Converting PDF with {len(pdf_document)} pages...")
+        conversion_started = time.perf_counter()
+        started = time.perf_counter()
+        pdf_document = open_pdf(pdf_path)
+        page_count = len(pdf_document)
+        page_numbers = None
+        if pages is not None:
+            page_numbers = parse_page_ranges(pages, page_count)
+        notify_observers(observers, "open", time.perf_counter() - started)
+        if page_numbers is None:
+            print(f"Converting PDF with {page_count} pages...")
+        else:
+            print(f"Converting {len(page_numbers)} of {page_count} pages...")
         
-        for page_num in range(len(pdf_document)):
-            print(f"Processing page {page_num + 1}/{len(pdf_document)}...")
-            
-            page = pdf_document[page_num]
-            slide = prs.slides.add_slide(prs.slide_layouts[6])
-            
-            # Get page dimensions and calculate scale
-            pdf_width = page.rect.width
-            pdf_height = page.rect.height
-            scale_x = prs.slide_width / pdf_width
-            scale_y = prs.slide_height / pdf_height
-            
-            # Process shapes first to establish layout structure
-            shapes = page.get_drawings()
-            cards = []
-            progress_bars = []
-            status_dots = []
-            
-            for shape in shapes:
-                shape_type = detect_shape_type(shape)
-                rect = shape["rect"]
-                x0, y0, x1, y1 = rect
-                left = x0 * scale_x
-                top = y0 * scale_y
-                width = (x1 - x0) * scale_x
-                height = (y1 - y0) * scale_y
+        extract_options = {"coalesce": coalesce, "raster_density": raster_density,
+                           "images": images, "image_dpi": image_dpi, "mode": mode,
+                           "raster_dpi": raster_dpi, "max_drawings": max_drawings,
+                           "max_spans": max_spans, "tables": tables}
+        selected_pages = page_numbers if page_numbers is not None else range(page_count)
+        fingerprints = {}
+        cached_pages = set()
+        if page_cache is not None:
+            if isinstance(page_cache, (str, os.PathLike)):
+                page_cache = PageCache(page_cache)
+            started = time.perf_counter()
+            salt = fingerprint_salt(CONVERTER_VERSION, prs.slide_width, prs.slide_height,
+                                    extract_options)
+            memo = {}  # fonts and images shared between pages are hashed once
+            for page_num in selected_pages:
+                fingerprints[page_num] = page_fingerprint(pdf_document[page_num], salt, memo)
+                if page_cache.has(fingerprints[page_num]):
+                    cached_pages.add(page_num)
+            notify_observers(observers, "fingerprint", time.perf_counter() - started)
+            print(f"Reusing {len(cached_pages)} unchanged pages from the page cache")
+        
+        image_store = ImageStore()
+        # A compacted stream output is first saved into a temporary file, then
+        # rewritten into the stream
+        to_stream = not isinstance(output_path, (str, os.PathLike))
+        save_target = tempfile.TemporaryFile() if compact and to_stream else output_path
+        writer = StreamingPresentationWriter(prs, save_target) if streaming else None
+        try:
+            extracted = iter_extracted_pages(pdf_path, pdf_document,
+                                             prs.slide_width, prs.slide_height, workers,
+                                             extract_options,
+                                             [n for n in selected_pages if n not in cached_pages])
+            for page_num in selected_pages:
+                if page_num in cached_pages:
+                    started = time.perf_counter()
+                    entry = page_cache.get(fingerprints[page_num], have=image_store)
+                    if entry is not None:
+                        slide = page_cache.add_slide(prs, entry, image_store)
+                        if writer is not None:
+                            writer.write_slide(slide)
+                        notify_observers(observers, "reuse", time.perf_counter() - started,
+                                         page_num)
+                        continue
+                    # Evicted by another conversion since it was looked up
+                    page_data = extract_page(pdf_document[page_num], prs.slide_width,
+                                             prs.slide_height, **extract_options)
+                else:
+                    page_data = next(extracted)
+                print(f"Processing page {page_num + 1}/{page_count}...")
+                if page_data["shapes_removed"]:
+                    print(f"  Coalescing removed {page_data['shapes_removed']} shapes")
+                if page_data["rasterized"] and mode == "hybrid":
+                    print("  Rendered as an image")
+                for stage, seconds in page_data["timings"].items():
+                    notify_observers(observers, stage, seconds, page_num)
                 
-                if shape_type == "card":
-                    cards.append((left, top, width, height))
-                elif shape_type == "progress_bar":
-                    progress_bars.append((left, top, width, height))
-                elif shape_type == "status_dot":
-                    status_dots.append((left, top, width, height))
-            
-            # Extract text blocks
-            text_blocks = page.get_text("dict")["blocks"]
-            
-            # Process title first
-            title_block = next((block for block in text_blocks 
-                              if block.get("lines") and 
-                              any("Global" in span["text"] 
-                                  for line in block["lines"] 
-                                  for span in line["spans"])), None)
-            
-            if title_block:
-                title_box = slide.shapes.add_textbox(Inches(1), Inches(0.5), 
-                                                   prs.slide_width - Inches(2), Inches(1))
-                title_frame = title_box.text_frame
-                title_para = title_frame.paragraphs[0]
-                title_para.alignment = PP_ALIGN.CENTER
-                title_run = title_para.add_run()
-                title_text = " ".join(span["text"] for line in title_block["lines"] 
-                                    for span in line["spans"])
-                title_run.text = title_text
-                title_run.font.size = Pt(24)
-                title_run.font.bold = True
+                started = time.perf_counter()
+                slide = render_page(prs, page_data, image_store)
+                if page_cache is not None:
+                    page_cache.put(fingerprints[page_num], slide)
+                if writer is not None:
+                    writer.write_slide(slide)
+                notify_observers(observers, "emit", time.perf_counter() - started, page_num)
             
-            # Create status cards
-            card_width = Inches(4)
-            card_height = Inches(2)
-            card_margin = Inches(0.5)
-            cards_top = Inches(2)
+            if isinstance(output_path, (str, os.PathLike)):
+                print(f"Saving PowerPoint presentation to {output_path}...")
+            else:
+                print("Saving PowerPoint presentation...")
+            started = time.perf_counter()
+            if writer is not None:
+                writer.close()
+            else:
+                prs.save(save_target)
+            notify_observers(observers, "save", time.perf_counter() - started)
+            if page_cache is not None:
+                page_cache.evict()
             
-            # Example status cards (you'll need to extract actual data from PDF)
-            status_data = [
-                ("Germany", "Reviewing PBG portfolio", "March 28, 2023", RGBColor(255, 193, 7)),
-                ("Spain", "Business data received", None, RGBColor(76, 175, 80)),
-                ("Belgium", "Work commencing March 31st", None, RGBColor(76, 175, 80)),
-                ("India", "Awaiting data", None, RGBColor(244, 67, 54))
-            ]
-            
-            for i, (title, status, date, color) in enumerate(status_data):
-                left = Inches(1) + (card_width + card_margin) * i
-                create_status_card(slide, left, cards_top, card_width, card_height,
-                                 title, status, date, color)
-            
-            # Create progress bars section
-            progress_top = cards_top + card_height + Inches(1)
-            progress_data = [
-                ("Germany", 35),
-                ("Spain", 75),
-                ("Belgium", 80),
-                ("India", 20)
-            ]
-            
-            for i, (label, progress) in enumerate(progress_data):
-                bar_left = Inches(3)
-                bar_top = progress_top + Inches(0.5) * i
-                create_progress_bar(slide, bar_left, bar_top,
-                                  Inches(6), Inches(0.3),
-                                  progress, label)
-        
-        print(f"Saving PowerPoint presentation to {output_path}...")
-        prs.save(output_path)
+            if compact:
+                if to_stream:
+                    report = compact_pptx(save_target, output_path,
+                                          compression_level=compression_level)
+                else:
+                    report = compact_pptx(output_path, compression_level=compression_level)
+                print(f"Compacted {report['bytes_before']} -> {report['bytes_after']} bytes "
+                      f"({report['parts_removed']} parts removed) in {report['seconds']:.2f}s")
+                notify_observers(observers, "compact", report["seconds"],
+                                 bytes_before=report["bytes_before"],
+                                 bytes_after=report["bytes_after"])
+        except Exception:
+            if writer is not None:
+                writer.abort()
+            raise
+        finally:
+            if save_target is not output_path:
+                save_target.close()
+        notify_observers(observers, "convert", time.perf_counter() - conversion_started,
+                         pages=page_count if page_numbers is None else len(page_numbers),
+                         bytes_in=len(pdf_path) if in_memory else os.path.getsize(pdf_path),
+                         bytes_out=_output_size(output_path))
         print("Conversion completed successfully!")
         
     except Exception as e:
@@ -260,20 +839,106 @@ def convert_pdf_to_ppt(pdf_path, output_path=None):
 
 def main():
     parser = argparse.ArgumentParser(description='Convert PDF file to PowerPoint presentation')
-    parser.add_argument('pdf_path', help='Path to the input PDF file')
+    parser.add_argument('pdf_path', nargs='*',
+                        help='Path to the input PDF file. In batch mode: PDF files, '
+                             'directories or glob patterns')
     parser.add_argument('--output', '-o', help='Path for the output PowerPoint file (optional)')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Number of worker processes for page extraction (default: 1)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Write slides to the output as they are finished to keep memory use flat')
+    parser.add_argument('--coalesce', action='store_true',
+                        help='Merge touching drawings of the same style and rasterize very dense regions')
+    parser.add_argument('--raster-density', type=int, default=DEFAULT_RASTER_DENSITY,
+                        help=f'Number of touching drawings from which a region is rasterized '
+                             f'when coalescing (default: {DEFAULT_RASTER_DENSITY})')
+    parser.add_argument('--pages', '-p',
+                        help='Pages to convert, e.g. "1-5,12" (default: all pages)')
+    parser.add_argument('--no-images', dest='images', action='store_false',
+                        help='Do not copy embedded images into the presentation')
+    parser.add_argument('--no-tables', dest='tables', action='store_false',
+                        help='Do not turn ruled tables into PowerPoint tables')
+    parser.add_argument('--image-dpi', type=int,
+                        help='Downsample embedded images above this resolution')
+    parser.add_argument('--mode', choices=MODES, default='vector',
+                        help='vector: editable shapes, raster: every page as an image, '
+                             'hybrid: images only for very complex pages (default: vector)')
+    parser.add_argument('--dpi', type=int, default=RASTER_DPI,
+                        help='Resolution of pages and dense regions rendered as images '
+                             f'(default: {RASTER_DPI})')
+    parser.add_argument('--max-drawings', type=int, default=DEFAULT_MAX_DRAWINGS,
+                        help=f'Hybrid mode: render pages with more drawings than this '
+                             f'(default: {DEFAULT_MAX_DRAWINGS})')
+    parser.add_argument('--max-spans', type=int, default=DEFAULT_MAX_SPANS,
+                        help=f'Hybrid mode: render pages with more text spans than this '
+                             f'(default: {DEFAULT_MAX_SPANS})')
+    parser.add_argument('--compact', action='store_true',
+                        help='Remove unused layouts and duplicate media from the saved file')
+    parser.add_argument('--compression-level', type=int, default=DEFAULT_COMPRESSION_LEVEL,
+                        choices=range(10), metavar='0-9',
+                        help=f'Zip compression level used with --compact '
+                             f'(default: {DEFAULT_COMPRESSION_LEVEL})')
+    parser.add_argument('--page-cache', metavar='DIR',
+                        help='Directory of slides from earlier conversions; unchanged pages '
+                             'are reused instead of converted again')
+    
+    batch_group = parser.add_argument_group('batch mode',
+                                            'Used when several inputs, a directory, a glob '
+                                            'pattern or a manifest is given')
+    batch_group.add_argument('--manifest', action='append', default=[],
+                             help='File listing one input per line (can be repeated)')
+    batch_group.add_argument('--output-dir', help='Directory for the converted files '
+                                                  '(default: next to each PDF)')
+    batch_group.add_argument('--jobs', '-j', type=int, default=None,
+                             help='Number of files converted in parallel (default: CPU count)')
+    batch_group.add_argument('--summary', default='conversion_summary.json',
+                             help='Path of the JSON summary (default: conversion_summary.json)')
+    batch_group.add_argument('--force', action='store_true',
+                             help='Convert files even if their output is up to date')
+    batch_group.add_argument('--check-hash', action='store_true',
+                             help='Detect unchanged inputs by content hash instead of mtime')
     
     args = parser.parse_args()
+    options = dict(workers=args.workers, streaming=args.streaming, coalesce=args.coalesce,
+                   raster_density=args.raster_density, pages=args.pages,
+                   images=args.images, image_dpi=args.image_dpi, mode=args.mode,
+                   raster_dpi=args.dpi, max_drawings=args.max_drawings,
+                   max_spans=args.max_spans, compact=args.compact,
+                   compression_level=args.compression_level, page_cache=args.page_cache,
+                   tables=args.tables)
+    
+    if (len(args.pdf_path) == 1 and not args.manifest and not glob.has_magic(args.pdf_path[0])
+            and not os.path.exists(args.pdf_path[0])):
+        print(f"Error: The file {args.pdf_path[0]} does not exist.")
+        return
     
-    if not os.path.exists(args.pdf_path):
-        print(f"Error: The file {args.pdf_path} does not exist.")
+    batch_mode = (len(args.pdf_path) != 1 or args.manifest or args.output_dir or
+                  not os.path.isfile(args.pdf_path[0]))
+    if not batch_mode:
+        try:
+            convert_pdf_to_ppt(args.pdf_path[0], args.output, **options)
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            sys.exit(1)
         return
     
+    from batch import collect_inputs, convert_batch
+    
+    if not args.pdf_path and not args.manifest:
+        parser.error('no input given')
+    if args.output:
+        parser.error('--output cannot be used with several inputs, use --output-dir')
     try:
-        convert_pdf_to_ppt(args.pdf_path, args.output)
-    except Exception as e:
+        pdf_paths = collect_inputs(args.pdf_path, args.manifest)
+    except (OSError, ValueError) as e:
         print(f"Error: {str(e)}")
         sys.exit(1)
+    
+    summary = convert_batch(pdf_paths, output_dir=args.output_dir, jobs=args.jobs,
+                            summary_path=args.summary, force=args.force,
+                            check_hash=args.check_hash, options=options)
+    if summary['failed']:
+        sys.exit(1)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
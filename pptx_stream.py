@@ -0,0 +1,122 @@
+"""
+Streaming PPTX writer.
+
+python-pptx keeps every slide part in memory until ``Presentation.save``.
+``StreamingPresentationWriter`` instead writes each finished slide into the
+output zip straight away and swaps the slide part for an empty stub, so only
+the package manifest and relationship bookkeeping stay resident.
+
+When the output is a path, the zip is written to a temporary file next to it
+and only renamed into place by ``close``, so a failed conversion never leaves
+a truncated file behind.
+"""
+import os
+import uuid
+import zipfile
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.package import Part
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from pptx.opc.serialized import _ContentTypesItem
+
+
+def create_sibling_temp(path, suffix='.tmp'):
+    """
+    Create an empty temporary file in the directory of path and return its path.
+
+    Unlike tempfile.mkstemp the file gets the default permissions (0666 less
+    the umask), so it can be renamed over a user-visible output.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f'.{name}.{uuid.uuid4().hex[:12]}{suffix}')
+    open(tmp_path, 'xb').close()
+    return tmp_path
+
+
+class StreamingPresentationWriter:
+    """
+    Write slides of ``prs`` to ``output`` one at a time.
+
+    Usage::
+
+        writer = StreamingPresentationWriter(prs, output_path)
+        slide = prs.slides.add_slide(layout)
+        ...                       # populate the slide
+        writer.write_slide(slide)  # slide is flushed and must not be used again
+        writer.close()             # writes presentation.xml, masters, media, ...
+
+    Parts referenced by a flushed slide (images, for example) are kept alive
+    through the stub so python-pptx can still deduplicate against them; they
+    are written once when the writer is closed.
+    """
+
+    def __init__(self, prs, output):
+        self._prs = prs
+        self._output_path = None
+        self._tmp_path = None
+        if isinstance(output, (str, os.PathLike)):
+            self._output_path = output
+            self._tmp_path = output = create_sibling_temp(output)
+        self._zip = zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED)
+        self._written = set()
+        self.slide_count = 0
+
+    def write_slide(self, slide):
+        """Serialize ``slide`` into the zip and release its XML tree."""
+        slide_part = slide.part
+        partname = slide_part.partname
+        self._zip.writestr(partname.membername, slide_part.blob)
+        if slide_part.rels:
+            self._zip.writestr(partname.rels_uri.membername, slide_part.rels.xml)
+
+        # Keep a content-less part under the same name so content types, the
+        # slide list and next-partname numbering stay correct.
+        stub = Part(partname, CT.PML_SLIDE, slide_part.package)
+        for rel in slide_part.rels.values():
+            if rel.is_external or rel.reltype == RT.SLIDE_LAYOUT:
+                continue
+            stub.relate_to(rel.target_part, rel.reltype)
+
+        prs_part = self._prs.part
+        sldId = next(s for s in self._prs.slides._sldIdLst
+                     if prs_part.related_part(s.rId) is slide_part)
+        prs_part.rels.pop(sldId.rId)
+        sldId.rId = prs_part.relate_to(stub, RT.SLIDE)
+
+        self._written.add(partname)
+        self.slide_count += 1
+
+    def close(self):
+        """Write the remaining package parts and finish the zip."""
+        if self._zip.fp is None:
+            return
+        package = self._prs.part.package
+        parts = tuple(package.iter_parts())
+        self._zip.writestr(CONTENT_TYPES_URI.membername,
+                           serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+        self._zip.writestr(PACKAGE_URI.rels_uri.membername, package._rels.xml)
+        for part in parts:
+            if part.partname in self._written:
+                continue
+            self._zip.writestr(part.partname.membername, part.blob)
+            if part.rels:
+                self._zip.writestr(part.partname.rels_uri.membername, part.rels.xml)
+        self._zip.close()
+        if self._tmp_path is not None:
+            os.replace(self._tmp_path, self._output_path)
+            self._tmp_path = None
+
+    def abort(self):
+        """
+        Close the zip without finishing the package (after a failure).
+
+        With a path output the partial file is removed and an existing file
+        at the path is left untouched.
+        """
+        self._zip.close()
+        if self._tmp_path is not None:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+            self._tmp_path = None
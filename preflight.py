@@ -0,0 +1,202 @@
+"""
+Cheap checks before a PDF is converted.
+
+preflight opens the document without converting it and reports what a
+conversion would be up against: encryption, damage that MuPDF had to
+repair, the page count, the page sizes, and drawing/text/image density
+measured on a few sampled pages. From those it estimates the conversion
+cost in milliseconds, so front ends can reject a document or send it to a
+separate queue before any worker spends time on it.
+
+Usage:
+    python preflight.py input.pdf [--pages 1-20] [--mode hybrid]
+"""
+import argparse
+import json
+import sys
+import time
+
+from pdf_to_ppt import (DEFAULT_MAX_DRAWINGS, DEFAULT_MAX_SPANS, MODES, RASTER_DPI,
+                        open_pdf, parse_page_ranges)
+from text_model import PageText
+
+DEFAULT_SAMPLE_PAGES = 3
+
+DEFAULT_MAX_PAGES = 2000
+DEFAULT_MAX_ESTIMATED_MS = 10 * 60 * 1000
+DEFAULT_HEAVY_MS = 30 * 1000
+
+DEFAULT_LANE = 'default'
+HEAVY_LANE = 'heavy'
+
+# Pages larger than this (200 inches, the PDF 1.x user space limit) are
+# almost always broken or not meant to be shown as slides
+MAX_PAGE_SIDE_PT = 14400
+
+# Per-page cost model in milliseconds, fitted on the synthetic corpus from
+# create_test_pdf.py (single core). It is only meant to separate small jobs
+# from heavy ones, not to predict exact timings.
+VECTOR_COST = {'page': 4.0, 'drawing': 0.05, 'span': 0.15, 'image': 2.0}
+RASTER_COST = {'page': 40.0, 'drawing': 0.1, 'span': 1.5, 'image': 2.0}
+# Raster costs above are for a letter-sized page at RASTER_DPI
+LETTER_AREA_PT = 612 * 792
+
+
+class PreflightError(Exception):
+    """
+    Raised when a document cannot be converted at all.
+
+    reason is one of "damaged", "encrypted", "empty", "page_too_large",
+    "invalid_pages", "unreadable" or (from admit) "too_large".
+    """
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _sample(page_numbers, count):
+    """Pick count page numbers spread evenly over page_numbers."""
+    if len(page_numbers) <= count:
+        return list(page_numbers)
+    step = (len(page_numbers) - 1) / (count - 1) if count > 1 else 0
+    return sorted({page_numbers[round(i * step)] for i in range(count)})
+
+
+def _page_cost(drawings, spans, images, area, mode, raster_dpi, max_drawings, max_spans):
+    rasterize = mode == 'raster' or (mode == 'hybrid' and
+                                     (drawings > max_drawings or spans > max_spans))
+    if not rasterize:
+        cost = VECTOR_COST
+        return (cost['page'] + cost['drawing'] * drawings + cost['span'] * spans +
+                cost['image'] * images)
+    cost = RASTER_COST
+    pixel_factor = (area / LETTER_AREA_PT) * (raster_dpi / RASTER_DPI) ** 2
+    return (cost['page'] + cost['drawing'] * drawings + cost['span'] * spans) * pixel_factor
+
+
+def preflight(source, pages=None, mode='vector', raster_dpi=RASTER_DPI,
+              max_drawings=DEFAULT_MAX_DRAWINGS, max_spans=DEFAULT_MAX_SPANS,
+              sample_pages=DEFAULT_SAMPLE_PAGES):
+    """
+    Inspect a PDF and estimate what converting it would cost.
+
+    Args:
+        source (str, bytes or file object): The PDF, as for convert_pdf_to_ppt
+        pages (str or list, optional): Page selection that will be converted
+        mode, raster_dpi, max_drawings, max_spans: Conversion options that
+            affect the cost, as for convert_pdf_to_ppt
+        sample_pages (int): Number of pages whose content is measured
+
+    Returns:
+        dict: page counts, page sizes, sampled densities per page,
+              "repaired" and "estimated_ms"
+
+    Raises:
+        PreflightError: The document cannot be opened, is password protected,
+                        has no pages, has an absurd page size, pages does
+                        not fit it or its pages cannot be read
+    """
+    started = time.perf_counter()
+    try:
+        pdf_document = open_pdf(source)
+    except Exception as e:
+        # MuPDF reports broken files with several exception types
+        raise PreflightError('damaged', 'The file is not a readable PDF') from e
+
+    try:
+        if pdf_document.needs_pass:
+            raise PreflightError('encrypted', 'The PDF is password protected')
+        page_count = len(pdf_document)
+        if page_count == 0:
+            raise PreflightError('empty', 'The PDF has no pages')
+        try:
+            page_numbers = (parse_page_ranges(pages, page_count) if pages is not None
+                            else list(range(page_count)))
+        except ValueError as e:
+            raise PreflightError('invalid_pages', str(e))
+
+        # Page boxes come from the page tree without loading page content
+        sizes = {}
+        for page_num in page_numbers:
+            box = pdf_document.page_cropbox(page_num)
+            size = (round(box.width, 1), round(box.height, 1))
+            if max(size) > MAX_PAGE_SIDE_PT:
+                raise PreflightError('page_too_large',
+                                     f'Page {page_num + 1} is {size[0]} x {size[1]} points')
+            sizes[size] = sizes.get(size, 0) + 1
+
+        samples = []
+        for page_num in _sample(page_numbers, sample_pages):
+            page = pdf_document[page_num]
+            samples.append({
+                'page': page_num + 1,
+                'drawings': len(page.get_cdrawings()),
+                'spans': len(PageText.from_page(page)),
+                'images': len(page.get_images()),
+                'area': page.rect.width * page.rect.height,
+            })
+        repaired = pdf_document.is_repaired
+    except PreflightError:
+        raise
+    except Exception as e:
+        # Damage MuPDF only notices once it parses the page tree or a page
+        raise PreflightError('unreadable', 'The PDF could not be read') from e
+    finally:
+        pdf_document.close()
+
+    costs = [_page_cost(s['drawings'], s['spans'], s['images'], s['area'], mode,
+                        raster_dpi, max_drawings, max_spans) for s in samples]
+    estimated_ms = sum(costs) / len(costs) * len(page_numbers)
+    return {
+        'pages': page_count,
+        'selected_pages': len(page_numbers),
+        'page_sizes': [{'width': w, 'height': h, 'count': count}
+                       for (w, h), count in sorted(sizes.items(), key=lambda item: -item[1])],
+        'repaired': repaired,
+        'samples': [{key: value for key, value in s.items() if key != 'area'}
+                    for s in samples],
+        'mode': mode,
+        'estimated_ms': round(estimated_ms),
+        'preflight_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def admit(report, max_pages=DEFAULT_MAX_PAGES, max_estimated_ms=DEFAULT_MAX_ESTIMATED_MS,
+          heavy_ms=DEFAULT_HEAVY_MS):
+    """
+    Decide how a job with this preflight report should be handled.
+
+    Returns HEAVY_LANE for jobs estimated above heavy_ms and DEFAULT_LANE
+    otherwise; raises PreflightError("too_large") for jobs over max_pages or
+    max_estimated_ms.
+    """
+    if report['selected_pages'] > max_pages:
+        raise PreflightError('too_large', f"{report['selected_pages']} pages is more than "
+                                          f"the limit of {max_pages}")
+    if report['estimated_ms'] > max_estimated_ms:
+        raise PreflightError('too_large', f"Conversion would take about "
+                                          f"{report['estimated_ms'] // 1000}s, more than "
+                                          f"the limit of {max_estimated_ms // 1000}s")
+    return HEAVY_LANE if report['estimated_ms'] > heavy_ms else DEFAULT_LANE
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check a PDF before converting it')
+    parser.add_argument('pdf_path', help='Path to the PDF file')
+    parser.add_argument('--pages', '-p', help='Pages that would be converted')
+    parser.add_argument('--mode', choices=MODES, default='vector')
+    parser.add_argument('--sample-pages', type=int, default=DEFAULT_SAMPLE_PAGES)
+    args = parser.parse_args()
+
+    try:
+        report = preflight(args.pdf_path, pages=args.pages, mode=args.mode,
+                           sample_pages=args.sample_pages)
+    except PreflightError as e:
+        print(json.dumps({'error': str(e), 'reason': e.reason}, indent=2))
+        sys.exit(1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
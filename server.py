@@ -1,8 +1,18 @@
-from flask import Flask, request, send_file
+from flask import Flask, request, send_file, Response
 from flask_cors import CORS
+import io
 import os
+import shutil
 from werkzeug.utils import secure_filename
-from pdf_to_ppt import convert_pdf_to_ppt
+from jobs import JobQueue, QueueFullError, DONE
+from artifacts import ArtifactStore
+from spool import SpoolQueue
+from conversion_cache import ConversionCache
+from warm_pool import WarmPool
+from upload_stream import save_upload, spooling_request_class, UploadTooLargeError
+from preflight import preflight, admit, PreflightError, HEAVY_LANE
+from metrics import ConversionMetrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from pdf_to_ppt import MODES, convert_pdf_to_ppt, parse_page_ranges
 import tempfile
 
 app = Flask(__name__)
@@ -12,11 +22,148 @@ UPLOAD_FOLDER = tempfile.gettempdir()
 ALLOWED_EXTENSIONS = {'pdf'}
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024  # 10MB max file size
+app.config['MAX_UPLOAD_BYTES'] = 512 * 1024 * 1024  # 512MB max file size
+# Uploads are streamed to disk; leave some room for the rest of the form
+app.config['MAX_CONTENT_LENGTH'] = app.config['MAX_UPLOAD_BYTES'] + 1024 * 1024
+app.config['CONVERSION_WORKERS'] = 2
+app.config['MAX_QUEUED_JOBS'] = 16
+app.config['MAX_PAGES'] = 2000
+app.config['MAX_ESTIMATED_MS'] = 10 * 60 * 1000  # reject conversions estimated to take longer
+app.config['HEAVY_JOB_MS'] = 30 * 1000  # conversions estimated above this use the heavy lane
+app.config['HEAVY_WORKERS'] = 1
+app.config['MAX_QUEUED_HEAVY_JOBS'] = 4
+app.config['JOBS_TTL'] = 24 * 3600  # seconds a finished job and its result are kept
+app.config['CACHE_FOLDER'] = os.path.join(UPLOAD_FOLDER, 'pdf_to_ppt_cache')
+app.config['CACHE_MAX_BYTES'] = 512 * 1024 * 1024
+# Slides of single pages, reused when a revised document is converted again
+app.config['PAGE_CACHE_FOLDER'] = os.path.join(UPLOAD_FOLDER, 'pdf_to_ppt_page_cache')
+app.config['PREFORK_WORKERS'] = True  # convert in pre-started, warmed-up processes
+# Shared spool directory: when set, conversions are only enqueued here and run by
+# `python spool.py` workers; /api/convert then waits up to SPOOL_WAIT_SECONDS
+app.config['SPOOL_FOLDER'] = None
+app.config['SPOOL_WAIT_SECONDS'] = 300
+
+# Let werkzeug write uploads where they are kept, so saving one is a rename
+app.request_class = spooling_request_class(app.request_class,
+                                           app.config['SPOOL_FOLDER'] or UPLOAD_FOLDER)
+
+PPTX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+metrics = ConversionMetrics()
+# Fork the conversion processes before any other thread is started. With
+# app.run(debug=True) below, the reloader's watching process (the one started
+# from the command line) imports this module too but never serves requests,
+# so only the serving process it restarts (WERKZEUG_RUN_MAIN) starts a pool
+reloader_process = __name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+warm_pool = None
+if app.config['PREFORK_WORKERS'] and not app.config['SPOOL_FOLDER'] and not reloader_process:
+    warm_pool = WarmPool(app.config['CONVERSION_WORKERS'] + app.config['HEAVY_WORKERS'])
+conversion_cache = ConversionCache(app.config['CACHE_FOLDER'],
+                                   max_bytes=app.config['CACHE_MAX_BYTES'],
+                                   convert=warm_pool.convert if warm_pool else convert_pdf_to_ppt)
+
+def convert(pdf_path, output_path, **options):
+    """Convert through the cache, recording stage timings in metrics."""
+    return conversion_cache.convert(pdf_path, output_path,
+                                    observers=[metrics.observe],
+                                    page_cache=app.config['PAGE_CACHE_FOLDER'], **options)
+
+if app.config['SPOOL_FOLDER']:
+    job_queue = SpoolQueue(app.config['SPOOL_FOLDER'],
+                           max_queue=app.config['MAX_QUEUED_JOBS'],
+                           ttl=app.config['JOBS_TTL'])
+    heavy_queue = SpoolQueue(app.config['SPOOL_FOLDER'], lane=HEAVY_LANE,
+                             max_queue=app.config['MAX_QUEUED_HEAVY_JOBS'],
+                             ttl=app.config['JOBS_TTL'])
+    # Results nobody collected (e.g. of cancelled requests) expire like jobs do
+    spool_results = ArtifactStore(job_queue.output_dir, ttl=app.config['JOBS_TTL'])
+    spool_results.start()
+else:
+    job_queue = JobQueue(os.path.join(UPLOAD_FOLDER, 'pdf_to_ppt_jobs'),
+                         workers=app.config['CONVERSION_WORKERS'],
+                         max_queue=app.config['MAX_QUEUED_JOBS'],
+                         convert=convert, ttl=app.config['JOBS_TTL'])
+    # Jobs estimated to be slow get their own workers so they cannot hold up
+    # small ones; both queues share the jobs directory, so either can look up a job
+    heavy_queue = JobQueue(os.path.join(UPLOAD_FOLDER, 'pdf_to_ppt_jobs'),
+                           workers=app.config['HEAVY_WORKERS'],
+                           max_queue=app.config['MAX_QUEUED_HEAVY_JOBS'],
+                           convert=convert, ttl=app.config['JOBS_TTL'])
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def conversion_options(form):
+    """Read conversion options from the form; raises ValueError on bad input."""
+    options = {}
+    pages = form.get('pages', '').strip()
+    if pages:
+        parse_page_ranges(pages)
+        options['pages'] = pages
+    mode = form.get('mode', '').strip()
+    if mode:
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}")
+        options['mode'] = mode
+    return options
+
+def admit_upload(pdf_path, options):
+    """Preflight a saved upload; returns its lane or raises PreflightError."""
+    report = preflight(pdf_path, pages=options.get('pages'),
+                       mode=options.get('mode', 'vector'))
+    return admit(report, app.config['MAX_PAGES'], app.config['MAX_ESTIMATED_MS'],
+                 app.config['HEAVY_JOB_MS'])
+
+def convert_in_spool(pdf_path, pdf_digest, options):
+    """Run a synchronous conversion on the spool workers and return the result in memory."""
+    job_id, job_pdf_path = job_queue.new_job()
+    shutil.move(pdf_path, job_pdf_path)
+    job_queue.submit(job_id, options=dict(options, pdf_digest=pdf_digest))
+    record = job_queue.wait(job_id, app.config['SPOOL_WAIT_SECONDS'])
+    if record is None:
+        job_queue.cancel(job_id)
+        raise TimeoutError('The conversion did not finish in time')
+    try:
+        if record['status'] != DONE:
+            raise RuntimeError(record.get('error', 'Conversion failed'))
+        with open(record['output'], 'rb') as f:
+            return io.BytesIO(f.read())
+    finally:
+        if os.path.exists(record['output']):
+            os.remove(record['output'])
+        job_queue.discard(job_id)
+
+@app.route('/api/preflight', methods=['POST'])
+def preflight_file():
+    if 'file' not in request.files:
+        return {'error': 'No file part'}, 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return {'error': 'No selected file'}, 400
+    
+    try:
+        options = conversion_options(request.form)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
+    fd, pdf_path = tempfile.mkstemp(suffix='.pdf', dir=UPLOAD_FOLDER)
+    os.close(fd)
+    try:
+        save_upload(file.stream, pdf_path, app.config['MAX_UPLOAD_BYTES'])
+        report = preflight(pdf_path, pages=options.get('pages'),
+                           mode=options.get('mode', 'vector'))
+        report['lane'] = admit(report, app.config['MAX_PAGES'],
+                               app.config['MAX_ESTIMATED_MS'], app.config['HEAVY_JOB_MS'])
+        return report
+    except UploadTooLargeError as e:
+        return {'error': str(e)}, 413
+    except PreflightError as e:
+        return {'error': str(e), 'reason': e.reason}, 422
+    finally:
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+
 @app.route('/api/convert', methods=['POST'])
 def convert_file():
     if 'file' not in request.files:
@@ -26,36 +173,135 @@ def convert_file():
     if file.filename == '':
         return {'error': 'No selected file'}, 400
     
+    try:
+        options = conversion_options(request.form)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
     if file and allowed_file(file.filename):
+        fd, pdf_path = tempfile.mkstemp(suffix='.pdf', dir=UPLOAD_FOLDER)
+        os.close(fd)
         try:
-            # Create temporary files for input and output
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as pdf_temp:
-                file.save(pdf_temp.name)
-                
-            with tempfile.NamedTemporaryFile(suffix='.pptx', delete=False) as pptx_temp:
-                # Convert PDF to PPTX
-                convert_pdf_to_ppt(pdf_temp.name, pptx_temp.name)
-                
-                # Send the converted file
-                return send_file(
-                    pptx_temp.name,
-                    as_attachment=True,
-                    download_name='converted.pptx',
-                    mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation'
-                )
+            # Stream the upload to disk and convert from there
+            _, pdf_digest = save_upload(file.stream, pdf_path, app.config['MAX_UPLOAD_BYTES'])
+            if admit_upload(pdf_path, options) == HEAVY_LANE:
+                return {'error': 'This document is too heavy to convert synchronously, '
+                                 'submit it to /api/jobs instead', 'reason': 'heavy'}, 422
+            if app.config['SPOOL_FOLDER']:
+                pptx_buffer = convert_in_spool(pdf_path, pdf_digest, options)
+            else:
+                pptx_buffer = io.BytesIO()
+                convert(pdf_path, pptx_buffer, pdf_digest=pdf_digest, **options)
+            pptx_buffer.seek(0)
+            
+            return send_file(
+                pptx_buffer,
+                as_attachment=True,
+                download_name='converted.pptx',
+                mimetype=PPTX_MIMETYPE
+            )
         
+        except UploadTooLargeError as e:
+            return {'error': str(e)}, 413
+        except PreflightError as e:
+            return {'error': str(e), 'reason': e.reason}, 422
+        except QueueFullError as e:
+            return {'error': str(e)}, 429
         except Exception as e:
             return {'error': str(e)}, 500
-        
         finally:
-            # Clean up temporary files
-            try:
-                os.unlink(pdf_temp.name)
-                os.unlink(pptx_temp.name)
-            except:
-                pass
+            if os.path.exists(pdf_path):
+                os.remove(pdf_path)
+    
+    return {'error': 'Invalid file type'}, 400
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    if 'file' not in request.files:
+        return {'error': 'No file part'}, 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return {'error': 'No selected file'}, 400
+    
+    try:
+        options = conversion_options(request.form)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
+    if file and allowed_file(file.filename):
+        job_id, pdf_path = job_queue.new_job()
+        try:
+            _, options['pdf_digest'] = save_upload(file.stream, pdf_path,
+                                                   app.config['MAX_UPLOAD_BYTES'])
+        except UploadTooLargeError as e:
+            job_queue.discard(job_id)
+            return {'error': str(e)}, 413
+        except Exception:
+            job_queue.discard(job_id)
+            raise
+        try:
+            lane = admit_upload(pdf_path, options)
+        except PreflightError as e:
+            job_queue.discard(job_id)
+            return {'error': str(e), 'reason': e.reason}, 422
+        except Exception:
+            job_queue.discard(job_id)
+            raise
+        queue = heavy_queue if lane == HEAVY_LANE else job_queue
+        try:
+            queue.submit(job_id, options=options)
+        except QueueFullError as e:
+            return {'error': str(e)}, 429
+        return {'job_id': job_id, 'status_url': f'/api/jobs/{job_id}', 'lane': lane}, 202
     
     return {'error': 'Invalid file type'}, 400
 
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    record = job_queue.get(job_id)
+    if record is None:
+        return {'error': 'Unknown job'}, 404
+    
+    response = {'job_id': job_id, 'status': record['status']}
+    if record['status'] == DONE:
+        response['result_url'] = f'/api/jobs/{job_id}/result'
+    elif 'error' in record:
+        response['error'] = record['error']
+    return response
+
+@app.route('/api/jobs/<job_id>/result')
+def job_result(job_id):
+    record = job_queue.get(job_id)
+    if record is None:
+        return {'error': 'Unknown job'}, 404
+    if record['status'] != DONE:
+        return {'error': 'Job is not finished', 'status': record['status']}, 409
+    
+    return send_file(
+        record['output'],
+        as_attachment=True,
+        download_name='converted.pptx',
+        mimetype=PPTX_MIMETYPE
+    )
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    return conversion_cache.stats()
+
+@app.route('/metrics')
+def prometheus_metrics():
+    cache = conversion_cache.stats()
+    lines = [metrics.render()]
+    for name in ('hits', 'misses', 'evictions'):
+        lines.append(f'# HELP pdf_to_ppt_cache_{name}_total Conversion cache {name}.\n'
+                     f'# TYPE pdf_to_ppt_cache_{name}_total counter\n'
+                     f'pdf_to_ppt_cache_{name}_total {cache[name]}\n')
+    lines.append('# HELP pdf_to_ppt_jobs_queued Jobs waiting for a worker.\n'
+                 '# TYPE pdf_to_ppt_jobs_queued gauge\n'
+                 f'pdf_to_ppt_jobs_queued{{lane="default"}} {job_queue.stats()["queued"]}\n'
+                 f'pdf_to_ppt_jobs_queued{{lane="heavy"}} {heavy_queue.stats()["queued"]}\n')
+    return Response(''.join(lines), content_type=METRICS_CONTENT_TYPE)
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000) 
\ No newline at end of file
@@ -0,0 +1,531 @@
+"""
+Conversion jobs shared through a spool directory.
+
+The web front ends only enqueue: each job is a directory with the uploaded
+PDF and a JSON record, plus a ticket file in the queue of its lane. Worker
+processes, on any host that mounts the spool (locally or over NFS), claim
+tickets by renaming them into the lease directory. rename is atomic, so
+exactly one worker wins each ticket.
+
+Each job is converted in a child process while the worker keeps touching
+its lease file, so a conversion that holds the GIL for long stretches
+cannot starve the lease renewal. A lease that has not been touched for
+lease_seconds belongs to a crashed or stuck worker; any other worker
+renames it back into the queue, and the job is retried up to max_attempts
+times. Lease ages are measured against a clock file in the spool, so the
+hosts' clocks do not have to agree. Where fork is not available
+(Windows) the conversion runs in the worker process and a thread renews
+the lease; lease_seconds must then comfortably exceed the longest page.
+
+A front end that stops waiting for a job cancels it: a waiting job is
+removed, and a running one gets a cancel marker, on which its worker stops
+the conversion and removes the job. Finished jobs are removed after a TTL.
+
+Layout of the spool directory:
+    jobs/<job_id>/input.pdf, job.json   uploaded PDF and status record
+    jobs/<job_id>/cancelled             cancel marker of a running job
+    queue/<lane>/<ticket>               jobs waiting for a worker
+    leases/<lane>/<ticket>.<worker>     jobs being converted
+    results/                            default output directory
+
+Usage:
+    python spool.py SPOOL_DIR [--output-dir DIR] [--lanes default,heavy]
+                    [--cache-dir DIR] [--page-cache DIR] [--lease 60]
+"""
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+import uuid
+
+from artifacts import TEMP_SUFFIX
+from conversion_cache import ConversionCache
+from jobs import QUEUED, RUNNING, DONE, FAILED, QueueFullError, is_valid_job_id
+from pdf_to_ppt import convert_pdf_to_ppt
+from preflight import DEFAULT_LANE, HEAVY_LANE
+
+LANES = (DEFAULT_LANE, HEAVY_LANE)
+
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 1.0
+CANCEL_MARKER = 'cancelled'
+
+
+def _write_json(path, data):
+    """Write JSON atomically; the temporary name is unique across hosts."""
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _ticket_job_id(ticket):
+    """Job ID from a ticket name "<created_ns>-<job_id>"."""
+    return ticket.partition('-')[2]
+
+
+def _run_conversion(convert, pdf_path, output_path, options, connection):
+    """Child process: run one conversion and send back None or the error message."""
+    # Ctrl-C is handled by the worker, and terminate() must stop the child
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        convert(pdf_path, output_path, **options)
+        connection.send(None)
+    except Exception as e:
+        connection.send(str(e) or type(e).__name__)
+
+
+class Spool:
+    """
+    Paths and record handling shared by SpoolQueue and SpoolWorker.
+
+    Args:
+        root (str): Spool directory
+        output_dir (str, optional): Where results are written and looked
+                                    up; defaults to root/results
+    """
+
+    def __init__(self, root, output_dir=None):
+        self.root = root
+        self.output_dir = output_dir or os.path.join(root, 'results')
+        self.jobs_dir = os.path.join(root, 'jobs')
+        for lane in LANES:
+            os.makedirs(self.queue_dir(lane), exist_ok=True)
+            os.makedirs(self.lease_dir(lane), exist_ok=True)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def queue_dir(self, lane):
+        return os.path.join(self.root, 'queue', lane)
+
+    def lease_dir(self, lane):
+        return os.path.join(self.root, 'leases', lane)
+
+    def job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def read_record(self, job_id):
+        try:
+            with open(os.path.join(self.job_dir(job_id), 'job.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_record(self, record):
+        _write_json(os.path.join(self.job_dir(record['id']), 'job.json'), record)
+
+    def discard(self, job_id):
+        """Remove a job's directory and everything in it."""
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def is_cancelled(self, job_id):
+        return os.path.exists(os.path.join(self.job_dir(job_id), CANCEL_MARKER))
+
+    def now(self):
+        """Current time on the spool's file system."""
+        path = os.path.join(self.root, 'clock')
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            open(path, 'a').close()
+        return os.stat(path).st_mtime
+
+
+class SpoolQueue(Spool):
+    """
+    Front-end side of the spool, with the interface of jobs.JobQueue.
+
+    Args:
+        root (str): Spool directory
+        lane (str): Queue that submitted jobs go to
+        max_queue (int): Number of jobs allowed to wait in the lane; submit
+                         raises QueueFullError beyond that
+        output_dir (str, optional): Output directory the workers write to
+        ttl (float): Seconds a finished job's record is kept
+        sweep_interval (float): Seconds between background sweeps
+    """
+
+    def __init__(self, root, lane=DEFAULT_LANE, max_queue=16, output_dir=None,
+                 ttl=24 * 3600, sweep_interval=600):
+        super().__init__(root, output_dir)
+        self.lane = lane
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._sweeper = threading.Thread(target=self._sweep, daemon=True, name='spool-sweep')
+        self._sweeper.start()
+
+    def new_job(self):
+        """Create a job directory and return (job_id, input_pdf_path)."""
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.job_dir(job_id))
+        return job_id, os.path.join(self.job_dir(job_id), 'input.pdf')
+
+    def submit(self, job_id, output_path=None, options=None):
+        """
+        Queue a job created with new_job whose input PDF is in place.
+
+        Only the file name of output_path is kept: workers write the result
+        into their output directory, which may be mounted elsewhere. Raises
+        QueueFullError if max_queue jobs are already waiting; the job
+        directory is removed in that case.
+        """
+        if len(os.listdir(self.queue_dir(self.lane))) >= self.max_queue:
+            self.discard(job_id)
+            raise QueueFullError('Too many conversions queued, try again later')
+        ticket = f'{time.time_ns():020d}-{job_id}'
+        record = {
+            'id': job_id,
+            'status': QUEUED,
+            'created': time.time(),
+            'lane': self.lane,
+            'ticket': ticket,
+            'output_name': os.path.basename(output_path) if output_path else f'{job_id}.pptx',
+            'options': options or {},
+            'attempts': 0,
+        }
+        self.write_record(record)
+        open(os.path.join(self.queue_dir(self.lane), ticket), 'x').close()
+        return job_id
+
+    def get(self, job_id):
+        """Return the job record, or None if the job is unknown."""
+        if not is_valid_job_id(job_id):
+            return None
+        record = self.read_record(job_id)
+        if record is not None:
+            record['output'] = os.path.join(self.output_dir, record['output_name'])
+        return record
+
+    def wait(self, job_id, timeout):
+        """Poll until the job is done or failed; returns the record, or None on timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self.get(job_id)
+            if record is None or record['status'] in (DONE, FAILED):
+                return record
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.2)
+
+    def cancel(self, job_id):
+        """
+        Withdraw a job nobody will collect. A waiting job and a finished
+        job's result are removed here; a running job is marked, and its
+        worker stops the conversion and removes it.
+        """
+        record = self.get(job_id)
+        if record is None:
+            return
+        if record['status'] not in (DONE, FAILED):
+            try:
+                os.remove(os.path.join(self.queue_dir(record['lane']), record['ticket']))
+            except FileNotFoundError:
+                # Claimed by a worker (or requeued while we looked)
+                open(os.path.join(self.job_dir(job_id), CANCEL_MARKER), 'a').close()
+                record = self.get(job_id)
+                if record is None or record['status'] not in (DONE, FAILED):
+                    return
+        if os.path.exists(record['output']):
+            os.remove(record['output'])
+        self.discard(job_id)
+
+    def sweep(self):
+        """Remove finished jobs, and directories never submitted, older than the TTL."""
+        expires_before = time.time() - self.ttl
+        for job_id in os.listdir(self.jobs_dir):
+            if not is_valid_job_id(job_id):
+                continue
+            record = self.read_record(job_id)
+            if record is None:
+                try:
+                    expired = os.stat(self.job_dir(job_id)).st_mtime < expires_before
+                except FileNotFoundError:
+                    continue
+            else:
+                expired = (record['status'] in (DONE, FAILED) and
+                           record.get('finished', 0) < expires_before)
+            if expired:
+                self.discard(job_id)
+
+    def _sweep(self):
+        while True:
+            try:
+                self.sweep()
+            except OSError:
+                pass  # try again on the next sweep
+            time.sleep(self.sweep_interval)
+
+    def stats(self):
+        return {'queued': len(os.listdir(self.queue_dir(self.lane))),
+                'running': len(os.listdir(self.lease_dir(self.lane))),
+                'max_queue': self.max_queue}
+
+
+class SpoolWorker(Spool):
+    """
+    Worker process side of the spool: claims jobs and converts them.
+
+    Args:
+        root (str): Spool directory
+        output_dir (str, optional): Where results are written
+        lanes (sequence): Lanes to take jobs from, in order of preference
+        convert (callable): Conversion function, called as
+                            convert(pdf_path, output_path, **options)
+        lease_seconds (float): Time after which a lease that is not
+                               renewed is taken back; must be the same for
+                               all workers on a spool
+        max_attempts (int): Claims of a job before it is marked failed
+        cache (ConversionCache, optional): Convert through this cache instead
+                                           of calling convert; it is given
+                                           the digest the front end computed
+                                           while receiving the upload
+        page_cache (str, optional): Page cache directory for the conversions
+    """
+
+    def __init__(self, root, output_dir=None, lanes=LANES, convert=convert_pdf_to_ppt,
+                 lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 cache=None, page_cache=None):
+        super().__init__(root, output_dir)
+        self.lanes = lanes
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.page_cache = page_cache
+        self.worker_id = f'{socket.gethostname()}-{os.getpid()}'
+        self._convert = convert
+        self._cache = cache
+        self._stopped = threading.Event()
+        self._next_reap = 0
+
+    def claim(self):
+        """Claim the oldest waiting job; returns (lane, lease_path) or None."""
+        for lane in self.lanes:
+            for ticket in sorted(os.listdir(self.queue_dir(lane))):
+                lease_path = os.path.join(self.lease_dir(lane), f'{ticket}.{self.worker_id}')
+                try:
+                    os.rename(os.path.join(self.queue_dir(lane), ticket), lease_path)
+                except FileNotFoundError:
+                    continue  # another worker was faster
+                os.utime(lease_path)
+                return lane, lease_path
+        return None
+
+    def reap(self):
+        """Put jobs whose lease has expired back into their queue."""
+        expires_before = self.now() - self.lease_seconds
+        for lane in LANES:
+            for name in os.listdir(self.lease_dir(lane)):
+                lease_path = os.path.join(self.lease_dir(lane), name)
+                try:
+                    if os.stat(lease_path).st_mtime >= expires_before:
+                        continue
+                    ticket = name.partition('.')[0]
+                    os.rename(lease_path, os.path.join(self.queue_dir(lane), ticket))
+                except FileNotFoundError:
+                    continue  # finished or reaped in the meantime
+                record = self.read_record(_ticket_job_id(ticket))
+                if record is not None and record['status'] == RUNNING:
+                    record['status'] = QUEUED
+                    self.write_record(record)
+                print(f"Requeued job {_ticket_job_id(ticket)}, "
+                      f"lease of {name.partition('.')[2]} expired")
+
+    def _heartbeat(self, lease_path, finished):
+        while not finished.wait(self.lease_seconds / 4):
+            try:
+                os.utime(lease_path)
+            except FileNotFoundError:
+                return  # reaped; another worker owns the job now
+
+    def _convert_in_child(self, job_id, lease_path, convert, pdf_path, output_path, options):
+        """
+        Run a conversion in a forked child process while renewing the lease.
+
+        The child is stopped when the lease is lost or the job is cancelled.
+        Returns None on success, otherwise an error message.
+        """
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        child = context.Process(target=_run_conversion,
+                                args=(convert, pdf_path, output_path, options, sender),
+                                name=f'spool-convert-{job_id}')
+        child.start()
+        sender.close()
+        try:
+            while True:
+                child.join(self.lease_seconds / 4)
+                if not child.is_alive():
+                    break
+                try:
+                    os.utime(lease_path)
+                except FileNotFoundError:
+                    return 'Lease lost'  # reaped; another worker owns the job now
+                if self.is_cancelled(job_id):
+                    return 'Cancelled'
+        finally:
+            if child.is_alive():
+                child.terminate()
+                child.join()
+        try:
+            return receiver.recv()
+        except EOFError:
+            return f'Conversion process died (exit code {child.exitcode})'
+        finally:
+            receiver.close()
+            child.close()
+
+    def _convert_in_thread(self, lease_path, convert, pdf_path, output_path, options):
+        """Run a conversion in this process; a thread renews the lease meanwhile."""
+        finished = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(lease_path, finished),
+                                     daemon=True, name='spool-heartbeat')
+        heartbeat.start()
+        try:
+            convert(pdf_path, output_path, **options)
+            return None
+        except Exception as e:
+            return str(e)
+        finally:
+            finished.set()
+            heartbeat.join()
+
+    def process(self, lease_path):
+        """Convert the job behind a lease and release the lease."""
+        job_id = _ticket_job_id(os.path.basename(lease_path).partition('.')[0])
+        record = self.read_record(job_id)
+        pdf_path = os.path.join(self.job_dir(job_id), 'input.pdf')
+        if self.is_cancelled(job_id):
+            self.discard(job_id)
+            os.remove(lease_path)
+            return
+        if record is None or record['status'] in (DONE, FAILED) or not os.path.exists(pdf_path):
+            os.remove(lease_path)  # discarded, or finished by a worker that lost its lease
+            return
+
+        record['attempts'] = record.get('attempts', 0) + 1
+        if record['attempts'] > self.max_attempts:
+            record.update(status=FAILED, finished=time.time(),
+                          error=f"Conversion did not finish in {self.max_attempts} attempts")
+            self.write_record(record)
+            os.remove(pdf_path)
+            os.remove(lease_path)
+            return
+        record.update(status=RUNNING, started=time.time(), worker=self.worker_id)
+        record.pop('error', None)
+        self.write_record(record)
+
+        options = dict(record['options'])
+        # The front end hashed the upload; only a cache has a use for it
+        pdf_digest = options.pop('pdf_digest', None)
+        if self.page_cache is not None:
+            options['page_cache'] = self.page_cache
+        if self._cache is not None:
+            convert = functools.partial(self._cache.convert, pdf_digest=pdf_digest)
+        else:
+            convert = self._convert
+        fd, tmp_path = tempfile.mkstemp(suffix=TEMP_SUFFIX, dir=self.output_dir)
+        os.close(fd)
+        if 'fork' in multiprocessing.get_all_start_methods():
+            error = self._convert_in_child(job_id, lease_path, convert, pdf_path, tmp_path,
+                                           options)
+        else:
+            error = self._convert_in_thread(lease_path, convert, pdf_path, tmp_path, options)
+        if error is None:
+            record['status'] = DONE
+        else:
+            record.update(status=FAILED, error=error)
+
+        if self.is_cancelled(job_id):
+            os.remove(tmp_path)
+            self.discard(job_id)
+            if os.path.exists(lease_path):
+                os.remove(lease_path)
+            print(f"Job {job_id} cancelled")
+            return
+        if not os.path.exists(lease_path):
+            os.remove(tmp_path)
+            print(f"Lease of job {job_id} expired, result discarded")
+            return
+        if record['status'] == DONE:
+            os.replace(tmp_path, os.path.join(self.output_dir, record['output_name']))
+        else:
+            os.remove(tmp_path)
+        record['finished'] = time.time()
+        self.write_record(record)
+        os.remove(pdf_path)
+        os.remove(lease_path)
+        print(f"Job {job_id} {record['status']} in "
+              f"{record['finished'] - record['started']:.1f}s")
+
+    def run_once(self):
+        """Reap expired leases if due, then process one job; returns False if none was waiting."""
+        if time.monotonic() >= self._next_reap:
+            self.reap()
+            self._next_reap = time.monotonic() + self.lease_seconds / 4
+        claimed = self.claim()
+        if claimed is None:
+            return False
+        self.process(claimed[1])
+        return True
+
+    def run(self):
+        """Process jobs until stop is called."""
+        print(f"Worker {self.worker_id} watching {self.root} "
+              f"(lanes: {', '.join(self.lanes)})")
+        while not self._stopped.is_set():
+            if not self.run_once():
+                self._stopped.wait(POLL_INTERVAL)
+
+    def stop(self):
+        """Stop after the job in progress."""
+        self._stopped.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert PDFs queued in a spool directory')
+    parser.add_argument('spool', help='Spool directory shared with the front ends')
+    parser.add_argument('--output-dir', help='Directory for results (default: SPOOL/results)')
+    parser.add_argument('--lanes', default=','.join(LANES),
+                        help='Comma-separated lanes to take jobs from, in order of preference')
+    parser.add_argument('--cache-dir', help='Conversion cache directory')
+    parser.add_argument('--page-cache', help='Page cache directory')
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                        help='Seconds before the job of an unresponsive worker is requeued')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    args = parser.parse_args()
+
+    lanes = [lane.strip() for lane in args.lanes.split(',') if lane.strip()]
+    unknown = set(lanes) - set(LANES)
+    if unknown:
+        parser.error(f"Unknown lane(s) {', '.join(sorted(unknown))}")
+
+    cache = ConversionCache(args.cache_dir) if args.cache_dir else None
+    worker = SpoolWorker(args.spool, output_dir=args.output_dir, lanes=lanes,
+                         lease_seconds=args.lease, max_attempts=args.max_attempts,
+                         cache=cache, page_cache=args.page_cache)
+    # Finish the current job on SIGTERM/Ctrl-C; a second one aborts it, and
+    # its lease is then taken back by another worker
+    def stop(signum, frame):
+        signal.signal(signum, signal.SIG_DFL)
+        worker.stop()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,378 @@
+"""
+Ruling-line table detection.
+
+detect_tables finds grids of horizontal and vertical rules in the output of
+``page.get_drawings()`` and fills their cells from the page's TextSpan
+records, so a bordered table becomes one native PowerPoint table instead of
+a rectangle per cell plus loose text. It works on data extract_page already
+has; ``page.find_tables()`` would extract the page's drawings and text a
+second time and join its rectangles pairwise.
+
+Rules are snapped to shared positions and joined, intersecting rules are
+grouped into grids, and a grid is accepted as a table when its outer frame
+is closed, every merged cell is rectangular and at least one cell holds
+text. Rule-to-cell coverage and span-to-cell assignment are computed with
+numpy over whole arrays.
+"""
+import numpy as np
+from pptx.dml.color import RGBColor
+from pptx.oxml.ns import qn
+from pptx.util import Pt
+
+from text_model import PageText
+
+# Distance (in PDF points) within which rule ends and positions are joined
+SNAP_TOLERANCE = 3.0
+
+# A grid needs at least this many rows and columns to be a table rather than
+# a framed box
+MIN_ROWS = 2
+MIN_COLUMNS = 2
+
+# Built-in "No Style, Table Grid" style: plain cells with thin black borders,
+# closest to a ruled table in a PDF
+TABLE_GRID_STYLE_ID = '{5940675A-B579-460E-94D1-54222C63F5DA}'
+
+EMU_PER_POINT = 12700
+
+# Font sizes (in points) PowerPoint accepts
+MIN_FONT_SIZE = 1
+MAX_FONT_SIZE = 4000
+
+
+def scaled_font_size(size, scale):
+    """
+    Scale a PDF font size by scale (slide EMU per PDF point), rounded to
+    half points and clamped to the sizes PowerPoint accepts, so text on a
+    page shrunk far onto the slide stays valid.
+    """
+    return min(max(round(size * scale / EMU_PER_POINT * 2) / 2, MIN_FONT_SIZE), MAX_FONT_SIZE)
+
+
+def _rules(drawings, tolerance):
+    """
+    Collect axis-parallel rules from drawings.
+
+    Returns two (N, 4) arrays of (position, start, end, style): horizontal
+    rules (y, x0, x1) and vertical rules (x, y0, y1), with a number per
+    distinct line style. Stroked rectangles give their four sides; filled
+    rectangles only count when they are thin enough to be a line.
+    """
+    horizontal, vertical = [], []
+    styles = {}
+    for drawing in drawings:
+        stroked = drawing["type"] != "f"
+        stroke_style = styles.setdefault((drawing["color"], drawing["width"]), len(styles))
+        fill_style = styles.setdefault(("fill", drawing["fill"]), len(styles))
+        for item in drawing["items"]:
+            if item[0] == "l" and stroked:
+                p1, p2 = item[1], item[2]
+                if abs(p1.y - p2.y) <= tolerance:
+                    horizontal.append(((p1.y + p2.y) / 2, min(p1.x, p2.x), max(p1.x, p2.x),
+                                       stroke_style))
+                elif abs(p1.x - p2.x) <= tolerance:
+                    vertical.append(((p1.x + p2.x) / 2, min(p1.y, p2.y), max(p1.y, p2.y),
+                                     stroke_style))
+            elif item[0] == "re":
+                rect = item[1]
+                style = stroke_style if stroked else fill_style
+                if rect.height <= tolerance:
+                    horizontal.append(((rect.y0 + rect.y1) / 2, rect.x0, rect.x1, style))
+                elif rect.width <= tolerance:
+                    vertical.append(((rect.x0 + rect.x1) / 2, rect.y0, rect.y1, style))
+                elif stroked:
+                    horizontal += [(rect.y0, rect.x0, rect.x1, style),
+                                   (rect.y1, rect.x0, rect.x1, style)]
+                    vertical += [(rect.x0, rect.y0, rect.y1, style),
+                                 (rect.x1, rect.y0, rect.y1, style)]
+    return (np.array(horizontal, dtype=float).reshape(-1, 4),
+            np.array(vertical, dtype=float).reshape(-1, 4))
+
+
+def _merge_rules(rules, tolerance):
+    """
+    Snap rules to shared positions and join overlapping rules on each position.
+
+    Returns an (N, 3) array of (position, start, end); styles are dropped.
+    """
+    if not len(rules):
+        return rules[:, :3]
+    rules = rules[np.argsort(rules[:, 0], kind="stable")]
+    # Positions closer than tolerance to their neighbour form one cluster,
+    # snapped to the cluster mean
+    cluster = np.concatenate(([0], np.cumsum(np.diff(rules[:, 0]) > tolerance)))
+    positions = np.bincount(cluster, rules[:, 0]) / np.bincount(cluster)
+    order = np.lexsort((rules[:, 1], cluster))
+    merged = []
+    last_cluster = -1
+    for index in order:
+        start, end = rules[index, 1], rules[index, 2]
+        if cluster[index] == last_cluster and start <= merged[-1][2] + tolerance:
+            merged[-1][2] = max(merged[-1][2], end)
+        else:
+            merged.append([positions[cluster[index]], start, end])
+            last_cluster = cluster[index]
+    return np.array(merged)
+
+
+def _grids(incidence):
+    """Yield (horizontal indices, vertical indices) of connected groups of rules."""
+    seen_h = np.zeros(incidence.shape[0], dtype=bool)
+    seen_v = np.zeros(incidence.shape[1], dtype=bool)
+    for start in np.flatnonzero(incidence.any(axis=1)):
+        if seen_h[start]:
+            continue
+        seen_h[start] = True
+        members_h, members_v = [np.array([start])], []
+        frontier_h = members_h[0]
+        while frontier_h.size:
+            frontier_v = np.flatnonzero(incidence[frontier_h].any(axis=0) & ~seen_v)
+            seen_v[frontier_v] = True
+            members_v.append(frontier_v)
+            frontier_h = np.flatnonzero(incidence[:, frontier_v].any(axis=1) & ~seen_h)
+            seen_h[frontier_h] = True
+            members_h.append(frontier_h)
+        yield np.concatenate(members_h), np.concatenate(members_v)
+
+
+def _coverage(rules, boundaries, edges, tolerance):
+    """
+    Which grid boundary segments are drawn.
+
+    Returns a (len(boundaries), len(edges) - 1) boolean array: entry [i, j]
+    is set when some rule lies on boundaries[i] and spans edges[j]..edges[j+1].
+    """
+    on_boundary = np.abs(rules[:, 0][:, None] - boundaries[None, :]) <= tolerance
+    spans = ((rules[:, 1][:, None] <= edges[None, :-1] + tolerance) &
+             (rules[:, 2][:, None] >= edges[None, 1:] - tolerance))
+    return (on_boundary.T.astype(np.int32) @ spans.astype(np.int32)) > 0
+
+
+def _cell_regions(covered_h, covered_v):
+    """
+    Label merged cells of a grid.
+
+    Returns an (R, C) array giving every grid cell the index of the top-left
+    cell of its merged region, or None when a merged region is not a
+    rectangle.
+    """
+    rows, columns = covered_h.shape[0] - 1, covered_v.shape[0] - 1
+    labels = np.arange(rows * columns).reshape(rows, columns)
+    # Neighbouring cells without a rule between them share a label; spread
+    # the lowest label until nothing changes
+    open_h = ~covered_h[1:-1]  # (rows - 1, columns): no rule below row i
+    open_v = ~covered_v[1:-1].T  # (rows, columns - 1): no rule right of column j
+    while True:
+        before = labels.copy()
+        for first, second, is_open in ((labels[:-1], labels[1:], open_h),
+                                       (labels[:, :-1], labels[:, 1:], open_v)):
+            low = np.minimum(first, second)[is_open]
+            first[is_open] = low
+            second[is_open] = low
+        if np.array_equal(before, labels):
+            break
+
+    for label in np.unique(labels):
+        cell_rows, cell_columns = np.nonzero(labels == label)
+        height = cell_rows.max() - cell_rows.min() + 1
+        width = cell_columns.max() - cell_columns.min() + 1
+        if height * width != len(cell_rows):
+            return None
+    return labels
+
+
+def _find_grids(horizontal, vertical, span_boxes, tolerance):
+    """
+    Find table grids among rules.
+
+    Returns a list of (xs, ys, labels, inside): the column and row boundary
+    positions, the merged cell labels from _cell_regions and a mask of the
+    spans lying inside the grid.
+    """
+    horizontal = _merge_rules(horizontal, tolerance)
+    vertical = _merge_rules(vertical, tolerance)
+    incidence = ((vertical[None, :, 0] >= horizontal[:, None, 1] - tolerance) &
+                 (vertical[None, :, 0] <= horizontal[:, None, 2] + tolerance) &
+                 (horizontal[:, None, 0] >= vertical[None, :, 1] - tolerance) &
+                 (horizontal[:, None, 0] <= vertical[None, :, 2] + tolerance))
+    grids = []
+    for members_h, members_v in _grids(incidence):
+        rules_h, rules_v = horizontal[members_h], vertical[members_v]
+        ys, xs = np.unique(rules_h[:, 0]), np.unique(rules_v[:, 0])
+        if len(ys) < MIN_ROWS + 1 or len(xs) < MIN_COLUMNS + 1:
+            continue
+        # The outer frame must be closed; this cheaply rejects clusters of
+        # overlapping shapes before the full coverage check
+        if not (_coverage(rules_h, ys[[0, -1]], xs[[0, -1]], tolerance).all() and
+                _coverage(rules_v, xs[[0, -1]], ys[[0, -1]], tolerance).all()):
+            continue
+        inside = ((span_boxes[:, 0] >= xs[0] - tolerance) &
+                  (span_boxes[:, 2] <= xs[-1] + tolerance) &
+                  (span_boxes[:, 1] >= ys[0] - tolerance) &
+                  (span_boxes[:, 3] <= ys[-1] + tolerance))
+        if not inside.any():
+            continue
+        labels = _cell_regions(_coverage(rules_h, ys, xs, tolerance),
+                               _coverage(rules_v, xs, ys, tolerance))
+        if labels is not None:
+            grids.append((xs, ys, labels, inside))
+    return grids
+
+
+def _fill_hex(color):
+    return "%02X%02X%02X" % tuple(int(round(channel * 255)) for channel in color[:3])
+
+
+def detect_tables(drawings, page_text, scale_x, scale_y, tolerance=SNAP_TOLERANCE):
+    """
+    Find ruled tables on a page.
+
+    Args:
+        drawings (list): page.get_drawings() output
+        page_text (PageText): The page's text
+        scale_x, scale_y (float): Slide EMU per PDF point
+        tolerance (float): Snap distance for rule positions and ends
+
+    Returns:
+        tuple: (tables, drawings, page_text). tables is a list of dicts with
+               "box", "column_widths" and "row_heights" in EMU and "cells", a
+               list of (row, column, row_span, column_span, text, size_pt,
+               bold, fill) for cells with text, a fill or a span. drawings
+               and page_text are what remains for the rest of the pipeline:
+               drawings lying inside a table and made only of lines and
+               rectangles are removed, and so are the spans inside it.
+    """
+    horizontal, vertical = _rules(drawings, tolerance)
+    if len(horizontal) < MIN_ROWS + 1 or len(vertical) < MIN_COLUMNS + 1:
+        return [], drawings, page_text
+
+    if page_text.spans:
+        span_boxes = np.array([span.bbox for span in page_text.spans], dtype=float)
+    else:
+        span_boxes = np.empty((0, 4))
+    grids = _find_grids(horizontal, vertical, span_boxes, tolerance)
+    # A table drawn over unrelated shapes is joined with their outlines and
+    # rejected; look for it again among the rules of each line style alone
+    styles_h, counts_h = np.unique(horizontal[:, 3], return_counts=True)
+    styles_v, counts_v = np.unique(vertical[:, 3], return_counts=True)
+    candidates = np.intersect1d(styles_h[counts_h >= MIN_ROWS + 1],
+                                styles_v[counts_v >= MIN_COLUMNS + 1])
+    if len(styles_h) == 1 and len(styles_v) == 1:
+        candidates = []
+    for style in candidates:
+        rules_h = horizontal[horizontal[:, 3] == style]
+        rules_v = vertical[vertical[:, 3] == style]
+        for grid in _find_grids(rules_h, rules_v, span_boxes, tolerance):
+            xs, ys = grid[0], grid[1]
+            if not any(xs[0] < other_xs[-1] and other_xs[0] < xs[-1] and
+                       ys[0] < other_ys[-1] and other_ys[0] < ys[-1]
+                       for other_xs, other_ys, _, _ in grids):
+                grids.append(grid)
+    if not grids:
+        return [], drawings, page_text
+
+    rects = np.array([tuple(drawing["rect"]) for drawing in drawings], dtype=float)
+    ruled = np.array([all(item[0] in ("l", "re") for item in drawing["items"])
+                      for drawing in drawings])
+    consumed_drawings = np.zeros(len(drawings), dtype=bool)
+    consumed_spans = np.zeros(len(page_text.spans), dtype=bool)
+    tables = []
+    for xs, ys, labels, inside in grids:
+        rows, columns = labels.shape
+        in_frame = (ruled &
+                    (rects[:, 0] >= xs[0] - tolerance) & (rects[:, 2] <= xs[-1] + tolerance) &
+                    (rects[:, 1] >= ys[0] - tolerance) & (rects[:, 3] <= ys[-1] + tolerance))
+        consumed_drawings |= in_frame
+
+        # Cell fills: the fill of any consumed drawing covering a cell's center
+        fills = {}
+        cell_x = (xs[:-1] + xs[1:]) / 2
+        cell_y = (ys[:-1] + ys[1:]) / 2
+        for index in np.flatnonzero(in_frame):
+            fill = drawings[index]["fill"]
+            if fill is None:
+                continue
+            x0, y0, x1, y1 = rects[index]
+            covered = np.outer((cell_y > y0) & (cell_y < y1), (cell_x > x0) & (cell_x < x1))
+            for label in np.unique(labels[covered]):
+                fills[label] = _fill_hex(fill)
+
+        # Spans go to the cell containing their center, in reading order
+        span_indices = np.flatnonzero(inside)
+        consumed_spans[span_indices] = True
+        boxes = span_boxes[span_indices]
+        centers_x = (boxes[:, 0] + boxes[:, 2]) / 2
+        centers_y = (boxes[:, 1] + boxes[:, 3]) / 2
+        span_rows = np.clip(np.searchsorted(ys, centers_y) - 1, 0, rows - 1)
+        span_columns = np.clip(np.searchsorted(xs, centers_x) - 1, 0, columns - 1)
+        cell_spans = {}
+        for index, label in zip(span_indices, labels[span_rows, span_columns]):
+            cell_spans.setdefault(label, []).append(page_text.spans[index])
+
+        cells = []
+        for label in np.unique(labels):
+            cell_rows, cell_columns = np.nonzero(labels == label)
+            row_span = cell_rows.max() - cell_rows.min() + 1
+            column_span = cell_columns.max() - cell_columns.min() + 1
+            spans = [span for span in cell_spans.get(label, ()) if span.text.strip()]
+            if not spans and label not in fills and row_span * column_span == 1:
+                continue
+            text, size, bold = "", None, False
+            if spans:
+                lines = []
+                for span in spans:
+                    if lines and span.line == lines[-1][0]:
+                        lines[-1][1].append(span.text)
+                    else:
+                        lines.append((span.line, [span.text]))
+                text = "\n".join("".join(parts).strip() for _, parts in lines)
+                size = scaled_font_size(max(span.size for span in spans), scale_y)
+                bold = all(span.bold for span in spans)
+            cells.append((int(cell_rows.min()), int(cell_columns.min()), int(row_span),
+                          int(column_span), text, size, bold, fills.get(label)))
+
+        tables.append({
+            "box": (float(xs[0] * scale_x), float(ys[0] * scale_y),
+                    float((xs[-1] - xs[0]) * scale_x), float((ys[-1] - ys[0]) * scale_y)),
+            "column_widths": (np.diff(xs) * scale_x).tolist(),
+            "row_heights": (np.diff(ys) * scale_y).tolist(),
+            "cells": cells,
+        })
+
+    remaining_drawings = [drawing for drawing, consumed in zip(drawings, consumed_drawings)
+                          if not consumed]
+    remaining_text = PageText([span for span, consumed in zip(page_text.spans, consumed_spans)
+                               if not consumed])
+    return tables, remaining_drawings, remaining_text
+
+
+def add_table(slide, table):
+    """Emit one detected table as a native PowerPoint table."""
+    left, top, width, height = table["box"]
+    column_widths, row_heights = table["column_widths"], table["row_heights"]
+    graphic_frame = slide.shapes.add_table(len(row_heights), len(column_widths), int(left),
+                                           int(top), int(width), int(height))
+    pptx_table = graphic_frame.table
+    pptx_table.first_row = False
+    pptx_table.horz_banding = False
+    pptx_table._tbl.tblPr.find(qn("a:tableStyleId")).text = TABLE_GRID_STYLE_ID
+    for column, column_width in zip(pptx_table.columns, column_widths):
+        column.width = int(column_width)
+    for row, row_height in zip(pptx_table.rows, row_heights):
+        row.height = int(row_height)
+
+    for row, column, row_span, column_span, text, size, bold, fill in table["cells"]:
+        cell = pptx_table.cell(row, column)
+        if row_span > 1 or column_span > 1:
+            cell.merge(pptx_table.cell(row + row_span - 1, column + column_span - 1))
+        if text:
+            cell.text = text
+            for paragraph in cell.text_frame.paragraphs:
+                for run in paragraph.runs:
+                    run.font.size = Pt(size)
+                    if bold:
+                        run.font.bold = True
+        if fill is not None:
+            cell.fill.solid()
+            cell.fill.fore_color.rgb = RGBColor.from_string(fill)
+    return graphic_frame
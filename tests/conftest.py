@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from create_test_pdf import create_corpus_pdf  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    """Run every test in its own directory so nothing is written into the repo."""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    """Small synthetic document with text, drawings, a table and images on every page."""
+    path = str(tmp_path / 'sample.pdf')
+    create_corpus_pdf(path, pages=3, text_blocks=5, drawing_density=10, tables=1,
+                      images=2, seed=1)
+    return path
+
+
+@pytest.fixture
+def repo_pdf():
+    """The sample document shipped with the repository."""
+    return os.path.join(ROOT, 'test.pdf')
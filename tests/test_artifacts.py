@@ -0,0 +1,84 @@
+import os
+import time
+
+import pytest
+
+from artifacts import ArtifactStore, ArtifactTooLargeError, TEMP_SUFFIX
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / 'results'), ttl=3600, max_bytes=100)
+
+
+def write(store, name, size, age=0):
+    with store.writer(name) as path:
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+    if age:
+        then = time.time() - age
+        os.utime(store.path(name), (then, then))
+
+
+def test_expired_results_are_hidden_and_removed(store):
+    write(store, 'old.pptx', 10, age=2 * 3600)
+    write(store, 'new.pptx', 10)
+
+    assert store.get('old.pptx') is None
+    assert store.get('new.pptx') == store.path('new.pptx')
+
+    store.evict()
+    assert not os.path.exists(store.path('old.pptx'))
+    assert os.path.exists(store.path('new.pptx'))
+    assert store.evictions == 1
+
+
+def test_quota_evicts_the_oldest_results(store):
+    write(store, 'a.pptx', 40, age=30)
+    write(store, 'b.pptx', 40, age=20)
+    write(store, 'c.pptx', 40)
+
+    assert not os.path.exists(store.path('a.pptx'))
+    assert os.path.exists(store.path('b.pptx'))
+    assert os.path.exists(store.path('c.pptx'))
+    assert store.evictions == 1
+
+
+def test_temporary_files_are_kept_until_they_expire(store):
+    young = os.path.join(store.root, 'young' + TEMP_SUFFIX)
+    old = os.path.join(store.root, 'old' + TEMP_SUFFIX)
+    for path in (young, old):
+        with open(path, 'wb') as f:
+            f.write(b'x' * 500)
+    then = time.time() - 2 * 3600
+    os.utime(old, (then, then))
+    write(store, 'result.pptx', 10)
+
+    # An in-progress write neither counts against the quota nor is evicted
+    assert os.path.exists(young)
+    assert not os.path.exists(old)
+    assert os.path.exists(store.path('result.pptx'))
+    assert store.evictions == 0
+
+
+def test_kept_result_is_never_evicted_for_the_quota(store):
+    write(store, 'other.pptx', 60)
+    # Older than the other result, so it would be the first to go
+    with open(store.path('kept.pptx'), 'wb') as f:
+        f.write(b'x' * 60)
+    then = time.time() - 10
+    os.utime(store.path('kept.pptx'), (then, then))
+    store.evict(keep='kept.pptx')
+
+    assert os.path.exists(store.path('kept.pptx'))
+    assert not os.path.exists(store.path('other.pptx'))
+
+
+def test_oversized_result_fails_instead_of_vanishing(store):
+    write(store, 'small.pptx', 10)
+    with pytest.raises(ArtifactTooLargeError):
+        write(store, 'huge.pptx', 101)
+
+    assert store.get('huge.pptx') is None
+    assert os.listdir(store.root) == ['small.pptx']
+    assert store.evictions == 0
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from batch import collect_inputs, convert_batch
+
+
+@pytest.fixture
+def inputs(sample_pdf, tmp_path):
+    source = tmp_path / 'in'
+    source.mkdir()
+    shutil.copy(sample_pdf, source / 'a.pdf')
+    shutil.copy(sample_pdf, source / 'b.pdf')
+    return collect_inputs([str(source)])
+
+
+def run(inputs, tmp_path, **kwargs):
+    return convert_batch(inputs, output_dir=str(tmp_path / 'out'), jobs=1,
+                         summary_path=str(tmp_path / 'summary.json'), **kwargs)
+
+
+def statuses(summary):
+    return [record['status'] for record in summary['files']]
+
+
+def test_second_run_skips_converted_outputs(inputs, tmp_path):
+    assert statuses(run(inputs, tmp_path)) == ['converted', 'converted']
+    assert statuses(run(inputs, tmp_path)) == ['skipped', 'skipped']
+    # Skipped records still count as successful conversions on the run after
+    assert statuses(run(inputs, tmp_path)) == ['skipped', 'skipped']
+    assert sorted(os.listdir(tmp_path / 'out')) == ['a.pptx', 'b.pptx']
+
+
+def test_changed_output_options_reconvert(inputs, tmp_path):
+    run(inputs, tmp_path)
+    assert statuses(run(inputs, tmp_path, options={'pages': '1'})) == ['converted'] * 2
+    # Options that do not change the output do not force a reconversion
+    assert statuses(run(inputs, tmp_path, options={'pages': '1', 'streaming': True})) == \
+        ['skipped'] * 2
+
+
+def test_output_of_a_failed_run_is_not_reused(inputs, tmp_path):
+    run(inputs, tmp_path)
+    summary_path = tmp_path / 'summary.json'
+    summary = json.loads(summary_path.read_text())
+    summary['files'][0].update(status='failed', error='crashed')
+    summary_path.write_text(json.dumps(summary))
+
+    assert statuses(run(inputs, tmp_path)) == ['converted', 'skipped']
+
+
+def test_check_hash_skips_touched_but_unchanged_inputs(inputs, tmp_path):
+    run(inputs, tmp_path, check_hash=True)
+    os.utime(inputs[0])
+    assert statuses(run(inputs, tmp_path, check_hash=True)) == ['skipped', 'skipped']
+    with open(inputs[0], 'ab') as f:
+        f.write(b'\n% edited\n')
+    assert statuses(run(inputs, tmp_path, check_hash=True)) == ['converted', 'skipped']
+
+
+def test_same_named_inputs_get_separate_outputs(sample_pdf, tmp_path):
+    source = tmp_path / 'in'
+    for directory in ('x', 'y'):
+        (source / directory).mkdir(parents=True)
+        shutil.copy(sample_pdf, source / directory / 'report.pdf')
+    # Differs only in the extension's case, so both would become same.pptx
+    shutil.copy(sample_pdf, source / 'x' / 'same.pdf')
+    shutil.copy(sample_pdf, source / 'x' / 'same.PDF')
+
+    summary = run(collect_inputs([str(source)]), tmp_path)
+    outcome = {os.path.relpath(record['input'], source): record['status']
+               for record in summary['files']}
+    assert outcome == {'x/report.pdf': 'converted', 'y/report.pdf': 'converted',
+                       'x/same.PDF': 'converted', 'x/same.pdf': 'failed'}
+    assert os.path.exists(tmp_path / 'out' / 'x' / 'report.pptx')
+    assert os.path.exists(tmp_path / 'out' / 'y' / 'report.pptx')
+    assert statuses(run(collect_inputs([str(source)]), tmp_path)).count('skipped') == 3
@@ -0,0 +1,70 @@
+import io
+
+import fitz
+import pytest
+from PIL import Image
+
+from coalesce import coalesce_drawings
+from pdf_to_ppt import extract_page
+
+
+def line(x0, y0, x1, y1, color=(0, 0, 0), width=1.0):
+    return {'type': 's', 'color': color, 'fill': None, 'width': width,
+            'rect': fitz.Rect(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)),
+            'items': [('l', fitz.Point(x0, y0), fitz.Point(x1, y1))]}
+
+
+def hatch(count, x=100, y=100, size=40):
+    """count crossing strokes, each in its own color so they stay separate paths."""
+    return [line(x + i * size / count, y, x + size - i * size / count, y + size,
+                 color=(i / count, 0, 0)) for i in range(count)]
+
+
+def test_touching_paths_of_one_style_are_merged():
+    drawings = [line(0, 0, 10, 0), line(10, 0, 10, 10), line(50, 50, 60, 50),
+                line(10, 10, 0, 10, color=(1, 0, 0))]
+    coalesced, regions, removed = coalesce_drawings(drawings, raster_density=None)
+
+    assert regions == []
+    assert removed == 1
+    assert [len(drawing['items']) for drawing in coalesced] == [2, 1, 1]
+    assert tuple(coalesced[0]['rect']) == (0, 0, 10, 10)
+    # Paint order follows the first member of each merged drawing
+    assert coalesced[2]['color'] == (1, 0, 0)
+
+
+def test_dense_cluster_becomes_a_raster_region():
+    drawings = hatch(60) + [line(300, 300, 320, 300), line(400, 400, 400, 420)]
+    coalesced, regions, removed = coalesce_drawings(drawings, raster_density=50)
+
+    assert len(regions) == 1
+    assert tuple(regions[0]) == (100, 100, 140, 140)
+    assert removed == 59  # 60 paths became one region
+    assert [tuple(drawing['rect']) for drawing in coalesced] == \
+        [(300, 300, 320, 300), (400, 400, 400, 420)]
+
+
+@pytest.mark.parametrize('count', [10, 49])
+def test_sparse_drawings_are_left_alone(count):
+    drawings = hatch(count)
+    coalesced, regions, removed = coalesce_drawings(drawings, raster_density=50)
+    assert (len(coalesced), regions, removed) == (count, [], 0)
+
+
+def test_raster_regions_use_the_raster_dpi():
+    doc = fitz.open()
+    page = doc.new_page(width=200, height=200)
+    shape = page.new_shape()
+    for drawing in hatch(60, x=20, y=20, size=100):
+        shape.draw_line(*drawing['items'][0][1:])
+        shape.finish(color=drawing['color'], width=1)
+    shape.commit()
+
+    widths = []
+    for dpi in (72, 144):
+        page_data = extract_page(page, 9144000, 6858000, coalesce=True, raster_density=50,
+                                 raster_dpi=dpi, tables=False)
+        assert len(page_data['rasters']) == 1
+        widths.append(Image.open(io.BytesIO(page_data['rasters'][0][1])).width)
+    assert widths[1] == pytest.approx(2 * widths[0], abs=2)
+    doc.close()
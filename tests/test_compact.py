@@ -0,0 +1,90 @@
+import io
+import os
+import stat
+import zipfile
+
+import pytest
+from pptx import Presentation
+
+from compact import compact_pptx
+from pdf_to_ppt import convert_pdf_to_ppt
+
+
+@pytest.fixture
+def deck(sample_pdf, tmp_path):
+    path = str(tmp_path / 'deck.pptx')
+    convert_pdf_to_ppt(sample_pdf, path)
+    return path
+
+
+def slide_xml(path):
+    with zipfile.ZipFile(path) as z:
+        return [z.read(n) for n in sorted(z.namelist()) if n.startswith('ppt/slides/')]
+
+
+def test_compacted_deck_is_valid_and_smaller(deck, tmp_path):
+    output = str(tmp_path / 'compact.pptx')
+    stats = compact_pptx(deck, output)
+
+    assert stats['parts_removed'] > 0
+    assert stats['bytes_after'] == os.path.getsize(output) < stats['bytes_before']
+    with zipfile.ZipFile(output) as z:
+        assert z.testzip() is None
+        layouts = [n for n in z.namelist() if n.startswith('ppt/slideLayouts/slideLayout')]
+        assert len(layouts) == 1
+    assert len(Presentation(output).slides) == 3
+    assert slide_xml(output) == slide_xml(deck)
+
+
+def test_compact_to_stream(deck):
+    buffer = io.BytesIO()
+    stats = compact_pptx(deck, buffer)
+    assert stats['bytes_after'] == len(buffer.getvalue())
+    assert len(Presentation(buffer).slides) == 3
+
+
+def test_in_place_compaction_keeps_permissions(deck, tmp_path):
+    os.chmod(deck, 0o644)
+    compact_pptx(deck)
+    assert stat.S_IMODE(os.stat(deck).st_mode) == 0o644
+    assert sorted(os.listdir(tmp_path)) == ['deck.pptx', 'sample.pdf']
+
+
+def test_new_output_gets_default_permissions(deck, tmp_path):
+    umask = os.umask(0o022)
+    try:
+        output = str(tmp_path / 'compact.pptx')
+        compact_pptx(deck, output)
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(os.stat(output).st_mode) == 0o644
+
+
+class WriteOnly:
+    """Unseekable output, like a socket or a pipe."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def test_compact_to_unseekable_stream(deck):
+    output = WriteOnly()
+    stats = compact_pptx(deck, output)
+    assert stats['bytes_after'] == len(output.data)
+    assert len(Presentation(io.BytesIO(bytes(output.data))).slides) == 3
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_compacted_conversion_to_unseekable_stream(sample_pdf, tmp_path, streaming):
+    output = WriteOnly()
+    convert_pdf_to_ppt(sample_pdf, output, compact=True, streaming=streaming)
+    compacted = str(tmp_path / 'compacted.pptx')
+    convert_pdf_to_ppt(sample_pdf, compacted, compact=True)
+    assert slide_xml(io.BytesIO(bytes(output.data))) == slide_xml(compacted)
@@ -0,0 +1,63 @@
+import io
+import os
+import time
+
+from conversion_cache import ConversionCache, hash_file
+
+
+class CountingConverter:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, pdf_path, output, **options):
+        self.calls.append(options)
+        data = b'pptx-' + str(len(self.calls)).encode()
+        if isinstance(output, str):
+            with open(output, 'wb') as f:
+                f.write(data)
+        else:
+            output.write(data)
+
+
+def test_second_conversion_is_served_from_cache(sample_pdf, tmp_path):
+    convert = CountingConverter()
+    cache = ConversionCache(str(tmp_path / 'cache'), convert=convert)
+
+    assert cache.convert(sample_pdf, str(tmp_path / 'a.pptx')) is False
+    assert cache.convert(sample_pdf, str(tmp_path / 'b.pptx')) is True
+    assert len(convert.calls) == 1
+    assert (tmp_path / 'b.pptx').read_bytes() == (tmp_path / 'a.pptx').read_bytes()
+    assert cache.stats()['hits'] == 1
+
+
+def test_stream_output_and_known_digest(sample_pdf, tmp_path):
+    convert = CountingConverter()
+    cache = ConversionCache(str(tmp_path / 'cache'), convert=convert)
+    cache.convert(sample_pdf, str(tmp_path / 'a.pptx'))
+
+    buffer = io.BytesIO()
+    assert cache.convert(sample_pdf, buffer, pdf_digest=hash_file(sample_pdf)) is True
+    assert buffer.getvalue() == b'pptx-1'
+
+
+def test_output_options_are_part_of_the_key(sample_pdf, tmp_path):
+    convert = CountingConverter()
+    cache = ConversionCache(str(tmp_path / 'cache'), convert=convert)
+    cache.convert(sample_pdf, str(tmp_path / 'a.pptx'), pages='1')
+    cache.convert(sample_pdf, str(tmp_path / 'b.pptx'), pages='2')
+    # How the conversion runs does not change its result
+    cache.convert(sample_pdf, str(tmp_path / 'c.pptx'), pages='2', workers=4, streaming=True)
+    assert [call.get('pages') for call in convert.calls] == ['1', '2']
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ConversionCache(str(tmp_path / 'cache'), max_bytes=25)
+    for name in ('a', 'b', 'c'):
+        cache.put(name, b'x' * 10)
+        os.utime(cache._entry_path(name), (time.time() - ord('z') + ord(name),) * 2)
+    assert cache.get('a') is None
+    assert cache.get('b') is not None  # now the most recently used
+    cache.put('d', b'x' * 10)
+    assert cache.get('c') is None
+    assert cache.get('b') is not None
+    assert cache.stats()['evictions'] == 2
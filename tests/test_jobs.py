@@ -0,0 +1,120 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from jobs import DONE, FAILED, QUEUED, JobQueue, QueueFullError, is_valid_job_id
+
+
+def write_pptx(pdf_path, output_path, **options):
+    with open(output_path, 'wb') as f:
+        f.write(b'pptx ' + json.dumps(options, sort_keys=True).encode())
+
+
+def wait_for(job_queue, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        record = job_queue.get(job_id)
+        if record['status'] in (DONE, FAILED):
+            return record
+        time.sleep(0.02)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def submit(job_queue, **options):
+    job_id, pdf_path = job_queue.new_job()
+    with open(pdf_path, 'wb') as f:
+        f.write(b'%PDF-1.4')
+    job_queue.submit(job_id, options=options)
+    return job_id
+
+
+def test_job_round_trip(tmp_path):
+    job_queue = JobQueue(str(tmp_path / 'jobs'), convert=write_pptx)
+    job_id = submit(job_queue, pages='1-2')
+    assert is_valid_job_id(job_id)
+
+    record = wait_for(job_queue, job_id)
+    assert record['status'] == DONE
+    with open(record['output'], 'rb') as f:
+        assert f.read() == b'pptx {"pages": "1-2"}'
+    assert not os.path.exists(record['input'])
+
+
+def test_failed_job_records_the_error(tmp_path):
+    def fail(pdf_path, output_path, **options):
+        with open(output_path, 'wb') as f:
+            f.write(b'partial')
+        raise ValueError('broken page')
+
+    job_queue = JobQueue(str(tmp_path / 'jobs'), convert=fail)
+    record = wait_for(job_queue, submit(job_queue))
+    assert record['status'] == FAILED
+    assert record['error'] == 'broken page'
+    assert not os.path.exists(record['output'])
+
+
+def test_full_queue_rejects_and_discards(tmp_path):
+    release = threading.Event()
+
+    def block(pdf_path, output_path, **options):
+        release.wait(10)
+        write_pptx(pdf_path, output_path)
+
+    job_queue = JobQueue(str(tmp_path / 'jobs'), workers=1, max_queue=1, convert=block)
+    try:
+        submit(job_queue)
+        deadline = time.monotonic() + 5
+        while job_queue.stats()['queued'] and time.monotonic() < deadline:
+            time.sleep(0.01)  # let the worker take the first job
+        submit(job_queue)
+        job_id, pdf_path = job_queue.new_job()
+        with pytest.raises(QueueFullError):
+            job_queue.submit(job_id)
+        assert job_queue.get(job_id) is None
+        assert not os.path.exists(job_queue.job_dir(job_id))
+    finally:
+        release.set()
+
+
+def test_sweep_removes_expired_jobs_only(tmp_path):
+    job_queue = JobQueue(str(tmp_path / 'jobs'), convert=write_pptx, ttl=3600)
+    old_id = submit(job_queue)
+    new_id = submit(job_queue)
+    wait_for(job_queue, old_id)
+    wait_for(job_queue, new_id)
+    record = job_queue.get(old_id)
+    record['finished'] -= 7200
+    job_queue._write_record(record)
+    abandoned_id, _ = job_queue.new_job()  # created but never submitted
+    os.utime(job_queue.job_dir(abandoned_id), (time.time() - 7200,) * 2)
+
+    job_queue.sweep()
+    assert job_queue.get(old_id) is None
+    assert not os.path.exists(job_queue.job_dir(abandoned_id))
+    assert job_queue.get(new_id)['status'] == DONE
+
+
+def test_jobs_of_an_exited_process_are_failed_on_startup(tmp_path):
+    jobs_dir = str(tmp_path / 'jobs')
+    job_queue = JobQueue(jobs_dir, convert=write_pptx)
+    job_id, pdf_path = job_queue.new_job()
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    record = {'id': job_id, 'status': QUEUED, 'created': time.time(), 'input': pdf_path,
+              'output': os.path.join(job_queue.job_dir(job_id), 'output.pptx'),
+              'options': {}, 'owner': dict(job_queue._owner, pid=dead.pid)}
+    job_queue._write_record(record)
+    live_id, live_pdf = job_queue.new_job()
+    job_queue._write_record(dict(record, id=live_id, input=live_pdf,
+                                 owner=job_queue._owner))  # owned by this process
+
+    JobQueue(jobs_dir, convert=write_pptx)
+    record = job_queue.get(job_id)
+    assert record['status'] == FAILED
+    assert 'restarted' in record['error']
+    assert job_queue.get(live_id)['status'] == QUEUED
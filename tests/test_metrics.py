@@ -0,0 +1,40 @@
+import io
+
+from metrics import ConversionMetrics
+from pdf_to_ppt import convert_pdf_to_ppt
+
+
+class UnseekableStream(io.RawIOBase):
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data.extend(b)
+        return len(b)
+
+    def tell(self):
+        raise OSError('not seekable')
+
+
+def test_conversion_events_are_aggregated(sample_pdf, tmp_path):
+    metrics = ConversionMetrics()
+    convert_pdf_to_ppt(sample_pdf, str(tmp_path / 'out.pptx'), observers=[metrics.observe])
+
+    text = metrics.render()
+    assert 'pdf_to_ppt_conversions_total 1' in text
+    assert 'pdf_to_ppt_pages_converted_total 3' in text
+    assert 'pdf_to_ppt_stage_seconds_count{stage="get_drawings"} 3' in text
+    assert metrics.bytes_out._series[None]['count'] == 1
+
+
+def test_unseekable_output_is_not_counted_in_output_bytes(sample_pdf):
+    metrics = ConversionMetrics()
+    output = UnseekableStream()
+    convert_pdf_to_ppt(sample_pdf, output, observers=[metrics.observe])
+
+    assert output.data[:2] == b'PK'
+    assert 'pdf_to_ppt_conversions_total 1' in metrics.render()
+    assert metrics.bytes_out._series == {}
@@ -0,0 +1,59 @@
+import fitz
+import pytest
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+import pdf_to_ppt
+from pdf_to_ppt import convert_pdf_to_ppt, extract_page
+
+
+@pytest.fixture
+def mixed_pdf(tmp_path):
+    """Page 1 is light, page 2 has 300 drawings, page 3 has 300 lines of text."""
+    path = str(tmp_path / 'mixed.pdf')
+    with fitz.open() as pdf_document:
+        page = pdf_document.new_page()
+        page.insert_text((72, 72), 'Light page')
+        page = pdf_document.new_page()
+        for i in range(300):
+            page.draw_rect(fitz.Rect(10 + i % 20 * 25, 10 + i // 20 * 25,
+                                     30 + i % 20 * 25, 30 + i // 20 * 25))
+        page = pdf_document.new_page()
+        for i in range(300):
+            page.insert_text((20 + i % 4 * 140, 20 + i // 4 * 10), f'Line {i}', fontsize=6)
+        pdf_document.save(path)
+    return path
+
+
+def slide_kinds(path):
+    kinds = []
+    for slide in Presentation(path).slides:
+        pictures = [s for s in slide.shapes if s.shape_type == MSO_SHAPE_TYPE.PICTURE]
+        kinds.append('raster' if len(pictures) == 1 and len(slide.shapes) == 1 else 'vector')
+    return kinds
+
+
+def test_hybrid_rasterizes_only_heavy_pages(mixed_pdf, tmp_path):
+    output = str(tmp_path / 'out.pptx')
+    convert_pdf_to_ppt(mixed_pdf, output, mode='hybrid', max_drawings=200, max_spans=200)
+    assert slide_kinds(output) == ['vector', 'raster', 'raster']
+
+
+def test_hybrid_decides_before_full_extraction(mixed_pdf, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('full extraction ran on a page that is rasterized')
+
+    monkeypatch.setattr(fitz.Page, 'get_drawings', fail)
+    monkeypatch.setattr(pdf_to_ppt.PageText, 'from_page', fail)
+    with fitz.open(mixed_pdf) as pdf_document:
+        for page_num in (1, 2):
+            page_data = extract_page(pdf_document[page_num], 100, 100, mode='hybrid',
+                                     max_drawings=200, max_spans=200)
+            assert page_data['rasterized']
+            assert 'precheck' in page_data['timings']
+
+
+def test_raster_mode_renders_every_page(mixed_pdf, tmp_path):
+    output = str(tmp_path / 'out.pptx')
+    convert_pdf_to_ppt(mixed_pdf, output, mode='raster')
+    assert slide_kinds(output) == ['raster'] * 3
@@ -0,0 +1,93 @@
+import os
+import zipfile
+
+import fitz
+import pytest
+
+from page_cache import PageCache, page_fingerprint
+from pdf_to_ppt import convert_pdf_to_ppt
+
+
+def slide_xml(path):
+    with zipfile.ZipFile(path) as z:
+        names = sorted(n for n in z.namelist()
+                       if n.startswith('ppt/slides/slide') and n.endswith('.xml'))
+        return [z.read(n) for n in names]
+
+
+def convert(pdf, output, cache=None):
+    events = []
+    convert_pdf_to_ppt(pdf, output, page_cache=cache, observers=[events.append])
+    return sorted(e['page'] for e in events if e['stage'] == 'reuse')
+
+
+@pytest.fixture
+def revised_pdf(sample_pdf, tmp_path):
+    """sample_pdf with a line of text added to its second page."""
+    path = str(tmp_path / 'revised.pdf')
+    with fitz.open(sample_pdf) as doc:
+        doc[1].insert_text((72, 72), 'Revised', fontsize=14)
+        doc.save(path)
+    return path
+
+
+def test_incremental_conversion_matches_full_conversion(sample_pdf, revised_pdf, tmp_path):
+    cache = str(tmp_path / 'cache')
+    assert convert(sample_pdf, 'first.pptx', cache) == []
+    assert convert(sample_pdf, 'again.pptx', cache) == [0, 1, 2]
+    assert slide_xml('again.pptx') == slide_xml('first.pptx')
+
+    assert convert(revised_pdf, 'incremental.pptx', cache) == [0, 2]
+    convert(revised_pdf, 'full.pptx')
+    assert slide_xml('incremental.pptx') == slide_xml('full.pptx')
+
+
+def test_evicted_entries_are_extracted_again(sample_pdf, tmp_path):
+    cache = str(tmp_path / 'cache')
+    convert(sample_pdf, 'first.pptx', cache)
+    media = os.path.join(cache, 'media')
+    assert os.listdir(media)
+    for name in os.listdir(media):  # as if another conversion evicted them
+        os.remove(os.path.join(media, name))
+
+    assert convert(sample_pdf, 'again.pptx', cache) == []
+    assert slide_xml('again.pptx') == slide_xml('first.pptx')
+
+
+def shared_resources_pdf():
+    """Two pages drawing with font F1 from one shared /Resources object."""
+    doc = fitz.open()
+    for _ in range(2):
+        doc.new_page()
+    font = doc.get_new_xref()
+    doc.update_object(font, '<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>')
+    resources = doc.get_new_xref()
+    doc.update_object(resources, f'<</Font<</F1 {font} 0 R>>>>')
+    for page in doc:
+        doc.xref_set_key(page.xref, 'Resources', f'{resources} 0 R')
+        contents = doc.get_new_xref()
+        doc.update_object(contents, '<<>>')
+        doc.update_stream(contents, b'BT /F1 12 Tf 72 72 Td (Hello) Tj ET')
+        doc.xref_set_key(page.xref, 'Contents', f'{contents} 0 R')
+    return doc, resources
+
+
+def test_fingerprint_covers_only_used_resources():
+    doc, resources = shared_resources_pdf()
+    before = [page_fingerprint(page) for page in doc]
+    assert before[0] == before[1]
+
+    font = doc.get_new_xref()
+    doc.update_object(font, '<</Type/Font/Subtype/Type1/BaseFont/Courier>>')
+    doc.xref_set_key(resources, 'Font/F2', f'{font} 0 R')
+    assert [page_fingerprint(page) for page in doc] == before
+
+    doc.xref_set_key(resources, 'Font/F1', f'{font} 0 R')
+    assert page_fingerprint(doc[0]) != before[0]
+
+
+def test_lookups_are_counted(tmp_path):
+    cache = PageCache(str(tmp_path / 'cache'))
+    assert not cache.has('0' * 40)
+    assert cache.get('0' * 40) is None
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (0, 2)
@@ -0,0 +1,23 @@
+import zipfile
+
+from pdf_to_ppt import convert_pdf_to_ppt
+
+
+def slide_parts(path):
+    with zipfile.ZipFile(path) as z:
+        return {name: z.read(name) for name in z.namelist()
+                if name.startswith('ppt/slides/') or name.startswith('ppt/media/')}
+
+
+def test_parallel_extraction_builds_the_same_slides(sample_pdf, tmp_path):
+    serial = str(tmp_path / 'serial.pptx')
+    parallel = str(tmp_path / 'parallel.pptx')
+    convert_pdf_to_ppt(sample_pdf, serial, workers=1)
+    convert_pdf_to_ppt(sample_pdf, parallel, workers=3)
+
+    serial_parts = slide_parts(serial)
+    parallel_parts = slide_parts(parallel)
+    assert sorted(serial_parts) == sorted(parallel_parts)
+    assert any(name.endswith('.xml') for name in serial_parts)
+    for name, blob in serial_parts.items():
+        assert parallel_parts[name] == blob, name
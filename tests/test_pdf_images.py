@@ -0,0 +1,57 @@
+import io
+import zipfile
+
+import fitz
+from PIL import Image
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+from pdf_to_ppt import convert_pdf_to_ppt
+
+
+def png(size, color):
+    buffer = io.BytesIO()
+    Image.new('RGBA', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def media(path):
+    with zipfile.ZipFile(path) as z:
+        return [name for name in z.namelist() if name.startswith('ppt/media/')]
+
+
+def pictures(path):
+    return [[shape for shape in slide.shapes if shape.shape_type == MSO_SHAPE_TYPE.PICTURE]
+            for slide in Presentation(path).slides]
+
+
+def test_image_shared_by_pages_is_stored_once(tmp_path):
+    pdf_path = str(tmp_path / 'shared.pdf')
+    logo = png((40, 30), (255, 0, 0, 255))
+    with fitz.open() as pdf_document:
+        for _ in range(3):
+            pdf_document.new_page().insert_image(fitz.Rect(10, 10, 110, 85), stream=logo)
+        pdf_document.save(pdf_path)
+
+    output = str(tmp_path / 'out.pptx')
+    convert_pdf_to_ppt(pdf_path, output)
+    assert [len(slide) for slide in pictures(output)] == [1, 1, 1]
+    assert len(media(output)) == 1
+
+
+def test_mismatched_soft_mask_falls_back_to_unmasked_image(tmp_path):
+    pdf_path = str(tmp_path / 'bad_mask.pdf')
+    with fitz.open() as pdf_document:
+        page = pdf_document.new_page()
+        page.insert_image(fitz.Rect(10, 10, 110, 85), stream=png((40, 30), (255, 0, 0, 128)))
+        _, smask = page.get_images(full=True)[0][:2]
+        pdf_document.xref_set_key(smask, 'Width', '20')
+        pdf_document.xref_set_key(smask, 'Height', '10')
+        pdf_document.update_stream(smask, bytes(200))
+        pdf_document.save(pdf_path)
+
+    output = str(tmp_path / 'out.pptx')
+    convert_pdf_to_ppt(pdf_path, output)
+    (picture,), = pictures(output)
+    with Image.open(io.BytesIO(picture.image.blob)) as image:
+        assert image.size == (40, 30)
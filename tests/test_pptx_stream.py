@@ -0,0 +1,56 @@
+import os
+import zipfile
+
+import pytest
+from pptx import Presentation
+
+from pdf_to_ppt import convert_pdf_to_ppt
+
+
+def slide_xml(path):
+    with zipfile.ZipFile(path) as z:
+        names = sorted(n for n in z.namelist()
+                       if n.startswith('ppt/slides/slide') and n.endswith('.xml'))
+        return [z.read(n) for n in names]
+
+
+def fail_on_second_page(event):
+    if event['stage'] == 'emit' and event['page'] == 1:
+        raise RuntimeError('injected failure')
+
+
+def test_streaming_matches_regular_save(sample_pdf, tmp_path):
+    regular = str(tmp_path / 'regular.pptx')
+    streamed = str(tmp_path / 'streamed.pptx')
+    convert_pdf_to_ppt(sample_pdf, regular)
+    convert_pdf_to_ppt(sample_pdf, streamed, streaming=True)
+
+    assert len(Presentation(streamed).slides) == 3
+    assert slide_xml(streamed) == slide_xml(regular)
+
+
+def test_failed_streaming_conversion_leaves_no_file(sample_pdf, tmp_path):
+    output = tmp_path / 'out.pptx'
+    with pytest.raises(Exception, match='injected failure'):
+        convert_pdf_to_ppt(sample_pdf, str(output), streaming=True,
+                           observers=[fail_on_second_page])
+    assert os.listdir(tmp_path) == ['sample.pdf']
+
+
+def test_failed_streaming_conversion_keeps_previous_output(sample_pdf, tmp_path):
+    output = tmp_path / 'out.pptx'
+    output.write_bytes(b'previous')
+    with pytest.raises(Exception, match='injected failure'):
+        convert_pdf_to_ppt(sample_pdf, str(output), streaming=True,
+                           observers=[fail_on_second_page])
+    assert output.read_bytes() == b'previous'
+
+
+def test_streamed_file_has_default_permissions(sample_pdf, tmp_path):
+    output = tmp_path / 'out.pptx'
+    umask = os.umask(0o022)
+    try:
+        convert_pdf_to_ppt(sample_pdf, str(output), streaming=True)
+    finally:
+        os.umask(umask)
+    assert output.stat().st_mode & 0o777 == 0o644
@@ -0,0 +1,50 @@
+import fitz
+import pytest
+
+import preflight as preflight_module
+from preflight import (DEFAULT_LANE, HEAVY_LANE, PreflightError, admit, preflight)
+
+
+def reason(source, **options):
+    with pytest.raises(PreflightError) as info:
+        preflight(source, **options)
+    return info.value.reason
+
+
+def test_report(sample_pdf):
+    report = preflight(sample_pdf, pages='1-2')
+    assert (report['pages'], report['selected_pages']) == (3, 2)
+    assert report['page_sizes'][0]['count'] == 2
+    assert all(s['drawings'] and s['spans'] for s in report['samples'])
+    assert report['estimated_ms'] > 0
+
+
+def test_rejected_documents(sample_pdf, tmp_path):
+    assert reason(b'not a pdf') == 'damaged'
+    assert reason(sample_pdf, pages='7') == 'invalid_pages'
+
+    encrypted = str(tmp_path / 'encrypted.pdf')
+    with fitz.open(sample_pdf) as doc:
+        doc.save(encrypted, encryption=fitz.PDF_ENCRYPT_AES_256, user_pw='secret',
+                 owner_pw='secret')
+    assert reason(encrypted) == 'encrypted'
+
+
+def test_unexpected_errors_are_preflight_errors(sample_pdf, monkeypatch):
+    class MuPDFError(Exception):
+        pass
+
+    def broken_page(page):
+        raise MuPDFError('code=7: cannot parse content stream')
+
+    monkeypatch.setattr(preflight_module.PageText, 'from_page', broken_page)
+    assert reason(sample_pdf) == 'unreadable'
+
+
+def test_admit():
+    report = {'selected_pages': 10, 'estimated_ms': 500}
+    assert admit(report, max_pages=20, max_estimated_ms=10000, heavy_ms=1000) == DEFAULT_LANE
+    assert admit(dict(report, estimated_ms=5000), max_pages=20, max_estimated_ms=10000,
+                 heavy_ms=1000) == HEAVY_LANE
+    with pytest.raises(PreflightError):
+        admit(report, max_pages=5)
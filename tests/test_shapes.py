@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from pdf_to_ppt import SHAPE_CLASSES, classify_rects, detect_shape_type
+
+
+def classify_one(rect):
+    classes = classify_rects(np.array([rect], dtype=float))
+    return [name for name in SHAPE_CLASSES if 0 in classes[name]]
+
+
+@pytest.mark.parametrize('rect, expected', [
+    ((0, 0, 0, 50), 'rectangle'),            # zero width
+    ((0, 0, 50, 0), 'rectangle'),            # zero height
+    ((0, 0, 10, 10), 'status_dot'),
+    ((0, 0, 9, 10), 'status_dot'),           # ratio exactly 0.9
+    ((0, 0, 11, 10), 'status_dot'),          # ratio exactly 1.1
+    ((0, 0, 8, 10), 'rectangle'),            # ratio below 0.9
+    ((0, 0, 20, 20), 'rectangle'),           # square, but not small
+    ((0, 0, 19.9, 19.9), 'status_dot'),
+    ((0, 0, 31, 10), 'progress_bar'),
+    ((0, 0, 30, 10), 'rectangle'),           # exactly three times as wide
+    ((0, 0, 400, 120), 'progress_bar'),      # wide rules win over card
+    ((0, 0, 101, 101), 'card'),
+    ((0, 0, 100, 101), 'rectangle'),         # card needs both sides over 100
+    ((0, 0, 300, 150), 'card'),
+    ((10, 10, 5, 5), 'status_dot'),          # inverted, ratio still 1
+    ((10, 10, 0, 7), 'rectangle'),           # inverted, both sides negative
+])
+def test_classify_rects_matches_detect_shape_type(rect, expected):
+    assert detect_shape_type({'rect': rect}) == expected
+    assert classify_one(rect) == [expected]
+
+
+def test_classify_rects_matches_detect_shape_type_on_random_rects():
+    rng = np.random.default_rng(5)
+    corners = rng.uniform(0, 200, size=(500, 2))
+    sizes = rng.choice([0, 1, 5, 15, 19, 20, 40, 60, 101, 150], size=(500, 2))
+    rects = np.hstack([corners, corners + sizes])
+
+    classes = classify_rects(rects)
+    labels = {}
+    for name in SHAPE_CLASSES:
+        for row in classes[name]:
+            assert row not in labels
+            labels[row] = name
+    assert len(labels) == len(rects)
+    for row, rect in enumerate(rects):
+        assert labels[row] == detect_shape_type({'rect': tuple(rect)}), rect
+
+
+def test_classify_rects_on_no_rects():
+    classes = classify_rects(np.empty((0, 4)))
+    assert all(len(classes[name]) == 0 for name in SHAPE_CLASSES)
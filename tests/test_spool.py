@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+import pytest
+from pptx import Presentation
+
+from conversion_cache import ConversionCache, hash_file
+from jobs import DONE, FAILED, RUNNING
+from spool import SpoolQueue, SpoolWorker
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return SpoolQueue(str(tmp_path / 'spool'))
+
+
+def enqueue(spool, pdf_path):
+    job_id, job_pdf = spool.new_job()
+    with open(pdf_path, 'rb') as src, open(job_pdf, 'wb') as dst:
+        dst.write(src.read())
+    # The front ends pass the digest of the upload along with the options
+    spool.submit(job_id, options={'pdf_digest': hash_file(pdf_path)})
+    return job_id
+
+
+def wait_for_status(spool, job_id, status, timeout=10):
+    deadline = time.monotonic() + timeout
+    while spool.get(job_id)['status'] != status:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_round_trip_with_the_default_worker(spool, sample_pdf):
+    job_id = enqueue(spool, sample_pdf)
+    worker = SpoolWorker(spool.root)
+    assert worker.run_once()
+
+    record = spool.get(job_id)
+    assert record['status'] == DONE, record.get('error')
+    assert len(Presentation(record['output']).slides) == 3
+    assert not worker.run_once()
+
+
+def test_worker_converts_through_the_cache(spool, sample_pdf, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    worker = SpoolWorker(spool.root, cache=ConversionCache(cache_dir))
+    first, second = enqueue(spool, sample_pdf), enqueue(spool, sample_pdf)
+    assert worker.run_once() and worker.run_once()
+
+    assert spool.get(first)['status'] == spool.get(second)['status'] == DONE
+    assert len([name for name in os.listdir(cache_dir) if name.endswith('.pptx')]) == 1
+    with open(spool.get(first)['output'], 'rb') as a, open(spool.get(second)['output'], 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_expired_lease_is_requeued(spool, sample_pdf):
+    job_id = enqueue(spool, sample_pdf)
+    crashed = SpoolWorker(spool.root, lease_seconds=10)
+    _, lease_path = crashed.claim()
+    expired = spool.now() - 60
+    os.utime(lease_path, (expired, expired))
+
+    worker = SpoolWorker(spool.root, lease_seconds=10)
+    assert worker.run_once()
+    assert spool.get(job_id)['status'] == DONE
+    assert not os.path.exists(lease_path)
+
+
+def test_dead_conversion_process_fails_the_job(spool, sample_pdf):
+    job_id = enqueue(spool, sample_pdf)
+    worker = SpoolWorker(spool.root, convert=lambda *args, **options: os._exit(3))
+    assert worker.run_once()
+    record = spool.get(job_id)
+    assert record['status'] == FAILED
+    assert 'exit code 3' in record['error']
+
+
+def test_cancelled_waiting_job_is_removed(spool, sample_pdf):
+    job_id = enqueue(spool, sample_pdf)
+    spool.cancel(job_id)
+    assert spool.get(job_id) is None
+    assert not SpoolWorker(spool.root).run_once()
+
+
+def test_cancelled_running_job_is_stopped(spool, sample_pdf):
+    job_id = enqueue(spool, sample_pdf)
+    worker = SpoolWorker(spool.root, convert=lambda *args, **options: time.sleep(60),
+                         lease_seconds=0.4)
+    thread = threading.Thread(target=worker.run_once)
+    thread.start()
+    wait_for_status(spool, job_id, RUNNING)
+    spool.cancel(job_id)
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert spool.get(job_id) is None
+    assert os.listdir(spool.output_dir) == []
+    assert os.listdir(spool.lease_dir('default')) == []
+
+
+def test_sweep_removes_expired_jobs(spool, sample_pdf):
+    job_id = enqueue(spool, sample_pdf)
+    SpoolWorker(spool.root).run_once()
+    spool.sweep()
+    assert spool.get(job_id)['status'] == DONE
+
+    record = spool.read_record(job_id)
+    record['finished'] -= spool.ttl + 1
+    spool.write_record(record)
+    spool.sweep()
+    assert spool.get(job_id) is None
@@ -0,0 +1,88 @@
+import zipfile
+
+import fitz
+import pytest
+
+from pdf_to_ppt import convert_pdf_to_ppt
+from tables import EMU_PER_POINT, detect_tables
+from text_model import PageText
+
+
+@pytest.fixture
+def grid_page():
+    """A 3x3 ruled table whose filled first row is one merged cell, plus loose text."""
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=300)
+    shape = page.new_shape()
+    shape.draw_rect(fitz.Rect(50, 50, 350, 90))
+    shape.finish(color=None, fill=(0.8, 0.8, 0.8), width=0)
+    for y in (50, 90, 130, 170):
+        shape.draw_line((50, y), (350, y))
+    for x in (50, 150, 250, 350):
+        shape.draw_line((x, 90 if x in (150, 250) else 50), (x, 170))
+    shape.finish(color=(0, 0, 0), width=1)
+    shape.commit()
+    page.insert_text((60, 75), 'Header', fontsize=11)
+    page.insert_text((60, 115), 'a1', fontsize=11)
+    page.insert_text((160, 155), 'b2', fontsize=11)
+    page.insert_text((60, 250), 'outside', fontsize=11)
+    yield page
+    doc.close()
+
+
+def test_ruled_grid_becomes_a_table(grid_page):
+    tables, drawings, page_text = detect_tables(grid_page.get_drawings(),
+                                                PageText.from_page(grid_page),
+                                                EMU_PER_POINT, EMU_PER_POINT)
+    assert len(tables) == 1
+    table = tables[0]
+    assert table['column_widths'] == [100 * EMU_PER_POINT] * 3
+    assert table['row_heights'] == [40 * EMU_PER_POINT] * 3
+    assert table['cells'] == [(0, 0, 1, 3, 'Header', 11.0, False, 'CCCCCC'),
+                              (1, 0, 1, 1, 'a1', 11.0, False, None),
+                              (2, 1, 1, 1, 'b2', 11.0, False, None)]
+    # The rules, the fill and the cell text are not emitted a second time
+    assert drawings == []
+    assert [span.text for span in page_text.spans] == ['outside']
+
+
+def test_page_without_rules_is_left_alone(grid_page):
+    page_text = PageText.from_page(grid_page)
+    tables, drawings, remaining = detect_tables([], page_text, EMU_PER_POINT, EMU_PER_POINT)
+    assert (tables, drawings, remaining) == ([], [], page_text)
+
+
+def test_tables_are_emitted_natively(sample_pdf, tmp_path):
+    with_tables = str(tmp_path / 'tables.pptx')
+    without = str(tmp_path / 'shapes.pptx')
+    convert_pdf_to_ppt(sample_pdf, with_tables)
+    convert_pdf_to_ppt(sample_pdf, without, tables=False)
+    with zipfile.ZipFile(with_tables) as z:
+        assert b'<a:tbl>' in z.read('ppt/slides/slide1.xml')
+    with zipfile.ZipFile(without) as z:
+        assert b'<a:tbl>' not in z.read('ppt/slides/slide1.xml')
+
+
+def test_table_text_on_a_very_tall_page_keeps_a_valid_size(tmp_path):
+    # The page is shrunk about 18x onto the slide, so 10pt text scales below 1pt
+    path = str(tmp_path / 'tall.pdf')
+    doc = fitz.open()
+    page = doc.new_page(width=612, height=10000)
+    shape = page.new_shape()
+    for y in (100, 130, 160, 190):
+        shape.draw_line((50, y), (350, y))
+    for x in (50, 150, 250, 350):
+        shape.draw_line((x, 100), (x, 190))
+    shape.finish(color=(0, 0, 0), width=1)
+    shape.commit()
+    for row in range(3):
+        page.insert_text((60, 120 + 30 * row), f'row {row}', fontsize=10)
+    doc.save(path)
+    doc.close()
+
+    output = str(tmp_path / 'tall.pptx')
+    convert_pdf_to_ppt(path, output)
+    with zipfile.ZipFile(output) as z:
+        slide = z.read('ppt/slides/slide1.xml')
+    assert b'<a:tbl>' in slide
+    assert b'sz="100"' in slide
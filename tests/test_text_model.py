@@ -0,0 +1,92 @@
+import re
+import zipfile
+
+import fitz
+import pytest
+from pptx import Presentation
+
+from pdf_to_ppt import convert_pdf_to_ppt
+from text_model import PageText, clean_bullet_text, is_bullet_character
+
+
+@pytest.fixture
+def text_pdf(tmp_path):
+    path = str(tmp_path / 'text.pdf')
+    with fitz.open() as pdf_document:
+        page = pdf_document.new_page()
+        page.insert_text((72, 60), 'Global Status Report', fontsize=20)
+        page.insert_text((72, 120), 'Quarterly results', fontsize=16)
+        page.insert_text((72, 150), 'Revenue grew in every region.', fontsize=11)
+        page.insert_text((72, 170), '- Germany ahead of plan', fontsize=11)
+        page.insert_text((72, 190), 'Costs were flat.', fontsize=11)
+        page.insert_text((72, 210), 'Outlook', fontsize=11, fontname='helvetica-bold')
+        pdf_document.save(path)
+    return path
+
+
+def test_bullet_helpers():
+    assert is_bullet_character('  • item')
+    assert not is_bullet_character('item')
+    assert clean_bullet_text('• item ') == 'item'
+
+
+def test_lines_are_classified_in_reading_order(text_pdf):
+    with fitz.open(text_pdf) as pdf_document:
+        page_text = PageText.from_page(pdf_document[0])
+
+    assert len(page_text) == 6
+    assert page_text.body_size == 11
+    assert page_text.find_title() == 'Global Status Report'
+    lines = page_text.classify_lines(skip_block=page_text.title_block())
+    assert [(kind, text) for kind, _, text, _ in lines] == [
+        ('heading', 'Quarterly results'),
+        ('body', 'Revenue grew in every region.'),
+        ('bullet', 'Germany ahead of plan'),
+        ('body', 'Costs were flat.'),
+        ('heading', 'Outlook'),
+    ]
+    bbox = lines[0][1]
+    assert bbox[0] == pytest.approx(72, abs=1) and bbox[3] == pytest.approx(120, abs=5)
+
+
+def test_classified_lines_become_text_boxes(text_pdf, tmp_path):
+    output = str(tmp_path / 'out.pptx')
+    convert_pdf_to_ppt(text_pdf, output)
+    slide = Presentation(output).slides[0]
+    boxes = {shape.text_frame.text: shape for shape in slide.shapes
+             if shape.has_text_frame and shape.text_frame.text}
+
+    # The title is emitted once, by the title box
+    assert [text for text in boxes if 'Global' in text] == ['Global Status Report']
+    heading = boxes['Quarterly results'].text_frame.paragraphs[0]
+    assert heading.runs[0].font.bold
+    bullet = boxes['Germany ahead of plan'].text_frame.paragraphs[0]
+    assert bullet._p.pPr.find('{http://schemas.openxmlformats.org/drawingml/2006/main}buChar') \
+        is not None
+    body = boxes['Revenue grew in every region.'].text_frame.paragraphs[0]
+    assert not body.runs[0].font.bold
+    assert body.runs[0].font.size.pt < heading.runs[0].font.size.pt
+
+
+def test_bullet_helpers_are_importable_from_the_converter():
+    import pdf_to_ppt
+    assert pdf_to_ppt.is_bullet_character is is_bullet_character
+    assert pdf_to_ppt.clean_bullet_text is clean_bullet_text
+
+
+def test_text_on_a_very_tall_page_keeps_valid_font_sizes(tmp_path):
+    # The page is shrunk about 18x onto the slide, so 10pt text scales below 1pt
+    path = str(tmp_path / 'tall.pdf')
+    with fitz.open() as pdf_document:
+        page = pdf_document.new_page(width=612, height=10000)
+        for line in range(5):
+            page.insert_text((72, 100 + 14 * line), f'Line {line} of body text', fontsize=10)
+        pdf_document.save(path)
+    output = str(tmp_path / 'tall.pptx')
+    convert_pdf_to_ppt(path, output, tables=False)
+
+    with zipfile.ZipFile(output) as z:
+        slide = z.read('ppt/slides/slide1.xml').decode()
+    sizes = [int(size) for size in re.findall(r' sz="(\d+)"', slide)]
+    assert sizes
+    assert min(sizes) >= 100
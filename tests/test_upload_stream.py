@@ -0,0 +1,96 @@
+import hashlib
+import io
+import os
+
+import pytest
+from flask import Flask, request
+
+import upload_stream
+from upload_stream import (SpooledUpload, UploadTooLargeError, save_upload,
+                           spooling_request_class)
+
+DATA = b'%PDF-1.4\n' + os.urandom(300 * 1024)
+
+
+def test_stream_is_copied_with_its_hash(tmp_path):
+    path = str(tmp_path / 'input.pdf')
+    size, digest = save_upload(io.BytesIO(DATA), path, chunk_size=4096)
+    assert (size, digest) == (len(DATA), hashlib.sha256(DATA).hexdigest())
+    assert open(path, 'rb').read() == DATA
+
+
+def test_upload_over_the_limit_leaves_nothing_behind(tmp_path):
+    with pytest.raises(UploadTooLargeError):
+        save_upload(io.BytesIO(DATA), str(tmp_path / 'input.pdf'), max_bytes=1024)
+    assert os.listdir(tmp_path) == []
+
+
+def spooled(directory, data=DATA):
+    upload = SpooledUpload(str(directory))
+    upload.write(data)
+    upload.seek(0)
+    return upload
+
+
+def test_spooled_upload_is_renamed_not_copied(tmp_path):
+    upload = spooled(tmp_path)
+    inode = os.stat(upload.name).st_ino
+    path = str(tmp_path / 'input.pdf')
+
+    assert save_upload(upload, path) == (len(DATA), hashlib.sha256(DATA).hexdigest())
+    assert os.stat(path).st_ino == inode
+    upload.close()
+    assert os.listdir(tmp_path) == ['input.pdf']
+
+
+def test_spooled_upload_is_copied_across_file_systems(tmp_path, monkeypatch):
+    replace = os.replace
+    calls = []
+
+    def cross_device_once(src, dst):
+        calls.append(src)
+        if len(calls) == 1:
+            raise OSError(18, 'Invalid cross-device link')
+        return replace(src, dst)
+
+    upload = spooled(tmp_path)
+    path = str(tmp_path / 'input.pdf')
+    monkeypatch.setattr(upload_stream.os, 'replace', cross_device_once)
+    assert save_upload(upload, path)[0] == len(DATA)
+    assert calls[0] == upload.name and calls[1] != upload.name
+    assert open(path, 'rb').read() == DATA
+    upload.close()
+    assert os.listdir(tmp_path) == ['input.pdf']
+
+
+def test_spooled_upload_over_the_limit(tmp_path):
+    upload = spooled(tmp_path)
+    with pytest.raises(UploadTooLargeError):
+        save_upload(upload, str(tmp_path / 'input.pdf'), max_bytes=1024)
+    upload.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_flask_uploads_are_spooled_and_cleaned_up(tmp_path):
+    spool_dir = tmp_path / 'spool'
+    spool_dir.mkdir()
+    app = Flask(__name__)
+    app.request_class = spooling_request_class(app.request_class, str(spool_dir))
+    saved = {}
+
+    @app.route('/upload', methods=['POST'])
+    def upload():
+        stream = request.files['file'].stream
+        saved['spooled'] = isinstance(stream, SpooledUpload)
+        if request.form.get('save'):
+            saved['result'] = save_upload(stream, str(tmp_path / 'input.pdf'))
+        return 'ok'
+
+    client = app.test_client()
+    client.post('/upload', data={'file': (io.BytesIO(DATA), 'a.pdf'), 'save': '1'})
+    assert saved['spooled']
+    assert saved['result'][1] == hashlib.sha256(DATA).hexdigest()
+    assert open(tmp_path / 'input.pdf', 'rb').read() == DATA
+
+    client.post('/upload', data={'file': (io.BytesIO(DATA), 'b.pdf')})
+    assert os.listdir(spool_dir) == []  # unsaved uploads are removed with the request
@@ -0,0 +1,43 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import pdf_to_ppt
+from warm_pool import WarmPool
+
+
+@pytest.fixture
+def crashing_pool(monkeypatch):
+    """A one-process pool whose worker dies when asked to convert 'crash.pdf'."""
+    convert = pdf_to_ppt.convert_pdf_to_ppt
+
+    def convert_or_die(pdf_path, output_path, **options):
+        if pdf_path == 'crash.pdf':
+            os._exit(1)
+        return convert(pdf_path, output_path, **options)
+
+    # Patched before the pool forks, so the workers inherit it
+    monkeypatch.setattr(pdf_to_ppt, 'convert_pdf_to_ppt', convert_or_die)
+    pool = WarmPool(1)
+    yield pool
+    pool.close()
+
+
+def test_conversion_in_a_worker(sample_pdf, tmp_path, crashing_pool):
+    events = []
+    output = str(tmp_path / 'out.pptx')
+    crashing_pool.convert(sample_pdf, output, observers=[events.append])
+    assert os.path.getsize(output) > 0
+    assert events
+
+
+def test_dead_worker_fails_the_conversion_and_the_pool_recovers(sample_pdf, tmp_path,
+                                                                 crashing_pool):
+    with pytest.raises(BrokenProcessPool):
+        crashing_pool.convert('crash.pdf', str(tmp_path / 'crash.pptx'))
+    output = str(tmp_path / 'out.pptx')
+    crashing_pool.convert(sample_pdf, output)
+    assert os.path.getsize(output) > 0
+    # The web process has threads by then, so the new workers are not forked from it
+    assert crashing_pool._pool._mp_context.get_start_method() != 'fork'
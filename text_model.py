@@ -0,0 +1,160 @@
+"""
+Compact per-page text model.
+
+PageText.from_page walks PyMuPDF's text dict once and keeps only a flat list
+of span records (bbox, text, font, size, flags and the block and line they
+belong to) plus a histogram of font sizes. The dict tree itself is dropped,
+and title, heading, bullet and body detection all read from the span list.
+"""
+from collections import Counter
+
+import fitz  # PyMuPDF
+
+BULLET_CHARS = ['•', '·', '○', '●', '▪', '▫', '◦', '-', '*']
+
+# Text extraction flags without TEXT_PRESERVE_IMAGES, so image blocks are not
+# decoded just to be thrown away
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Span flag bit PyMuPDF sets for bold fonts
+BOLD_FLAG = 16
+
+# A line counts as a heading when its font is this much larger than the body text
+HEADING_SIZE_RATIO = 1.2
+
+
+def is_bullet_character(text):
+    """Check if the text starts with a bullet point character."""
+    return any(text.strip().startswith(char) for char in BULLET_CHARS)
+
+
+def clean_bullet_text(text):
+    """Remove bullet character from the beginning of text."""
+    text = text.strip()
+    for char in BULLET_CHARS:
+        if text.startswith(char):
+            return text[len(char):].strip()
+    return text
+
+
+class TextSpan:
+    """One run of text in a single font, size and style."""
+
+    __slots__ = ('bbox', 'text', 'font', 'size', 'flags', 'block', 'line')
+
+    def __init__(self, bbox, text, font, size, flags, block, line):
+        self.bbox = bbox
+        self.text = text
+        self.font = font
+        self.size = size
+        self.flags = flags
+        self.block = block
+        self.line = line
+
+    @property
+    def bold(self):
+        return bool(self.flags & BOLD_FLAG)
+
+
+class PageText:
+    """
+    The text of one page as span records in reading order.
+
+    Args:
+        spans (list): TextSpan records; block and line numbers must be
+                      non-decreasing, as produced by from_page
+    """
+
+    __slots__ = ('spans', 'size_histogram')
+
+    def __init__(self, spans):
+        self.spans = spans
+        # Characters per font size (rounded to 0.1pt)
+        self.size_histogram = Counter()
+        for span in spans:
+            self.size_histogram[round(span.size, 1)] += len(span.text)
+
+    @classmethod
+    def from_page(cls, page):
+        """Build the model from a PyMuPDF page in a single pass over its text."""
+        spans = []
+        line_number = 0
+        blocks = page.get_text("dict", flags=TEXT_FLAGS)["blocks"]
+        for block_number, block in enumerate(blocks):
+            for line in block.get("lines", ()):
+                for span in line["spans"]:
+                    spans.append(TextSpan(tuple(span["bbox"]), span["text"], span["font"],
+                                          span["size"], span["flags"], block_number,
+                                          line_number))
+                line_number += 1
+        return cls(spans)
+
+    def __len__(self):
+        return len(self.spans)
+
+    @property
+    def body_size(self):
+        """The font size used by the most characters, or None for a page without text."""
+        if not self.size_histogram:
+            return None
+        return self.size_histogram.most_common(1)[0][0]
+
+    def _groups(self, attribute):
+        """Yield consecutive runs of spans sharing a block or line number."""
+        group = []
+        for span in self.spans:
+            if group and getattr(span, attribute) != getattr(group[0], attribute):
+                yield group
+                group = []
+            group.append(span)
+        if group:
+            yield group
+
+    def title_block(self, keyword="Global"):
+        """Return the number of the first block containing keyword, or None."""
+        for block in self._groups('block'):
+            if any(keyword in span.text for span in block):
+                return block[0].block
+        return None
+
+    def find_title(self, keyword="Global"):
+        """Return the text of the first block containing keyword, or None."""
+        number = self.title_block(keyword)
+        if number is None:
+            return None
+        return " ".join(span.text for span in self.spans if span.block == number)
+
+    def classify_lines(self, heading_ratio=HEADING_SIZE_RATIO, skip_block=None):
+        """
+        Sort the lines of the page into headings, bullets and body text.
+
+        A line is a heading when its largest font is at least heading_ratio
+        times the body size, or when it is entirely bold and not smaller than
+        the body size. Lines starting with a bullet character are bullets
+        (with the bullet removed). Everything else is body text. Lines of
+        block skip_block (e.g. the title's) are left out.
+
+        Returns:
+            list: (kind, bbox, text, size) tuples in reading order, where kind
+                  is "heading", "bullet" or "body" and size is the line's
+                  largest font size
+        """
+        body_size = self.body_size
+        lines = []
+        for line in self._groups('line'):
+            if line[0].block == skip_block:
+                continue
+            text = "".join(span.text for span in line)
+            if not text.strip():
+                continue
+            bbox = (min(span.bbox[0] for span in line), min(span.bbox[1] for span in line),
+                    max(span.bbox[2] for span in line), max(span.bbox[3] for span in line))
+            size = max(span.size for span in line)
+            if is_bullet_character(text):
+                lines.append(("bullet", bbox, clean_bullet_text(text), size))
+            elif (size >= body_size * heading_ratio or
+                  (size >= body_size and all(span.bold for span in line))):
+                lines.append(("heading", bbox, text.strip(), size))
+            else:
+                lines.append(("body", bbox, text.strip(), size))
+        return lines
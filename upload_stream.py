@@ -0,0 +1,129 @@
+"""
+Streaming upload handling for the Flask front ends.
+
+Uploaded PDFs are copied to disk in fixed-size chunks while their SHA-256
+is computed, so neither the file nor its hash needs the whole upload in
+memory, and an upload over the size limit is cut off as soon as it passes
+it. The saved file is then handed to the converter by path; MuPDF reads
+pages from it on demand instead of holding a copy of the document.
+
+werkzeug already writes every uploaded file to disk while it parses the
+request. With spooling_request_class installed, it writes into a named
+SpooledUpload that hashes the data as it arrives, and save_upload only
+renames that file into place instead of writing a second copy.
+"""
+import hashlib
+import os
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised by save_upload when an upload exceeds its size limit."""
+
+
+class SpooledUpload:
+    """
+    Named temporary file for one uploaded file that hashes what is written to it.
+
+    The file is removed when it is closed, unless save_upload has moved it.
+    """
+
+    def __init__(self, directory):
+        fd, self.name = tempfile.mkstemp(suffix='.part', dir=directory)
+        self._file = os.fdopen(fd, 'w+b')
+        self._digest = hashlib.sha256()
+        self.size = 0
+        self.moved = False
+
+    def write(self, data):
+        self._digest.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+    def close(self):
+        self._file.close()
+        if not self.moved and os.path.exists(self.name):
+            os.remove(self.name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def spooling_request_class(request_class, directory):
+    """
+    Return a subclass of a werkzeug/Flask request class whose file uploads
+    are spooled into SpooledUpload files in directory, e.g.
+
+        app.request_class = spooling_request_class(app.request_class, UPLOAD_FOLDER)
+
+    directory should be on the same file system as the paths uploads are
+    saved to, so save_upload can rename them.
+    """
+    class SpoolingRequest(request_class):
+        def _get_file_stream(self, total_content_length, content_type, filename=None,
+                             content_length=None):
+            return SpooledUpload(directory)
+
+    return SpoolingRequest
+
+
+def save_upload(stream, path, max_bytes=DEFAULT_MAX_UPLOAD_BYTES, chunk_size=CHUNK_SIZE):
+    """
+    Copy an upload stream to path in chunks.
+
+    The data is written to a temporary file next to path and renamed into
+    place once complete, so path never holds a partial upload. A
+    SpooledUpload already holds the complete upload and its hash; it is
+    renamed to path directly (and only copied when path is on another file
+    system).
+
+    Args:
+        stream: Readable binary stream, e.g. a werkzeug FileStorage.stream
+        path (str): Destination of the upload
+        max_bytes (int, optional): Largest accepted upload; None for no limit
+        chunk_size (int, optional): Bytes read and written per step
+
+    Returns:
+        tuple: (size, sha256 hex digest) of the saved file
+
+    Raises:
+        UploadTooLargeError: The upload is larger than max_bytes
+    """
+    if isinstance(stream, SpooledUpload):
+        if max_bytes is not None and stream.size > max_bytes:
+            raise UploadTooLargeError(f'File is larger than the limit of {max_bytes} bytes')
+        stream.flush()
+        try:
+            os.replace(stream.name, path)
+            stream.moved = True
+            return stream.size, stream.hexdigest()
+        except OSError:
+            stream.seek(0)  # different file system: fall back to copying
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(
+                        f'File is larger than the limit of {max_bytes} bytes')
+                digest.update(chunk)
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size, digest.hexdigest()
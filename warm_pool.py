@@ -0,0 +1,124 @@
+"""
+Pre-started conversion processes for the Flask front ends.
+
+WarmPool forks its worker processes up front, before any request arrives,
+from a process that has already imported PyMuPDF, python-pptx and the
+converter and built the base presentation template and widget prototypes.
+A request therefore pays neither the import cost nor the template setup,
+and CPU-bound conversions run outside the web process's GIL.
+
+Create the pool before starting other threads, since it forks. Where fork
+is not available (Windows) conversions run in the calling process instead.
+If a worker dies (e.g. killed for running out of memory), the conversions
+it was running fail with BrokenProcessPool instead of waiting forever, and
+the pool is started again for the next conversion. By then the web server's
+threads are running, so the replacement workers are not forked from the
+web process but started through a fork server (or spawned), and warm up
+when they start.
+"""
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pdf_to_ppt
+
+
+def _warm_up():
+    """Build the per-process template caches."""
+    pdf_to_ppt.new_presentation()
+    pdf_to_ppt.shape_prototypes()
+
+
+def _convert(pdf_path, output_path, options):
+    """
+    Pool task: run one conversion.
+
+    Observer callbacks cannot cross the process boundary, so their events are
+    collected here and returned for the parent to replay. With output_path
+    None the presentation is returned as bytes.
+    """
+    events = []
+    if options.pop('observe', False):
+        options['observers'] = [events.append]
+    if output_path is None:
+        buffer = io.BytesIO()
+        pdf_to_ppt.convert_pdf_to_ppt(pdf_path, buffer, **options)
+        return buffer.getvalue(), events
+    pdf_to_ppt.convert_pdf_to_ppt(pdf_path, output_path, **options)
+    return None, events
+
+
+class WarmPool:
+    """
+    Fixed set of warm conversion processes.
+
+    Args:
+        processes (int): Number of worker processes, all started immediately
+    """
+
+    def __init__(self, processes=2):
+        self.processes = processes
+        # Warm the caches here so forked workers inherit them
+        _warm_up()
+        self._lock = threading.Lock()
+        self._pool = None
+        if 'fork' in multiprocessing.get_all_start_methods():
+            self._pool = self._start()
+
+    def _start(self):
+        pool = ProcessPoolExecutor(self.processes,
+                                   mp_context=multiprocessing.get_context('fork'))
+        # The first task forks all workers; wait for it so they exist up front
+        pool.submit(_warm_up).result()
+        return pool
+
+    def _restart(self, broken):
+        """
+        Replace a broken pool, unless another thread already has. Forking
+        now could copy locks held by other threads into the workers, so the
+        new workers come from a fork server, or are spawned.
+        """
+        with self._lock:
+            if self._pool is not broken:
+                return
+            broken.shutdown(wait=False)
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(['pdf_to_ppt'])
+            else:
+                context = multiprocessing.get_context('spawn')
+            self._pool = ProcessPoolExecutor(self.processes, mp_context=context,
+                                             initializer=_warm_up)
+
+    def convert(self, pdf_path, output_path, **options):
+        """
+        Drop-in replacement for convert_pdf_to_ppt that runs in a worker.
+
+        The PDF may be a path or bytes and the output a path or a writable
+        binary stream, as for convert_pdf_to_ppt.
+        """
+        if self._pool is None:
+            return pdf_to_ppt.convert_pdf_to_ppt(pdf_path, output_path, **options)
+        observers = options.pop('observers', None)
+        if observers:
+            options['observe'] = True
+        to_path = isinstance(output_path, (str, os.PathLike))
+        pool = self._pool
+        try:
+            blob, events = pool.submit(_convert, pdf_path, output_path if to_path else None,
+                                       options).result()
+        except BrokenProcessPool:
+            self._restart(pool)
+            raise
+        if not to_path:
+            output_path.write(blob)
+        for event in events:
+            for observer in observers or ():
+                observer(event)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()